@@ -1,12 +1,17 @@
 from .data_sources import Mal, Anilist, Kitsu, AnimePlanet, AniDB, MangaUpdates
-from .searcher import Searcher, AnimeSearcher, MangaSearcher, LightNovelSearcher
+from .searcher import Searcher, TypeSearcher, AnimeSearcher, MangaSearcher, LightNovelSearcher, SearchResult, MAX_WORKERS
 from .enums import DataSource
+from .refresher import BackgroundRefresher
+from .cache import create_cache
+from .id_mapping import create_id_mapping
+from .singleflight import SingleFlight
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Acerola:
-    def __init__(self, config, log_level=logging.INFO):
+    def __init__(self, config, log_level=logging.INFO, max_workers=MAX_WORKERS):
         self._config = config
 
         self._mal = Mal(self._config['MyAnimeList'])
@@ -20,9 +25,72 @@ class Acerola:
         self.logger = logging.getLogger('AcerolaLogger')
         self.logger.setLevel(log_level)
 
-        self.anime = Searcher(AnimeSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._anidb))
-        self.manga = Searcher(MangaSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu))
-        self.light_novel = Searcher(LightNovelSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu))
+        # shared by every searcher so fan-out searches are bounded per Acerola instance
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = create_cache(self._config)
+        self._single_flight = SingleFlight()
+        self._id_mapping = create_id_mapping(self._config)
+
+        self.anime = Searcher(AnimeSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._anidb,
+                                            executor=self._executor, cache=self._cache,
+                                            single_flight=self._single_flight, id_mapping=self._id_mapping))
+        self.manga = Searcher(MangaSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu,
+                                            executor=self._executor, cache=self._cache,
+                                            single_flight=self._single_flight, id_mapping=self._id_mapping))
+        self.light_novel = Searcher(LightNovelSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu,
+                                                       executor=self._executor, cache=self._cache,
+                                                       single_flight=self._single_flight,
+                                                       id_mapping=self._id_mapping))
+
+        self._anidb_refresher = BackgroundRefresher(self._anidb.refresh_database, name='AniDBRefresher')
+        if self._anidb.auto_refresh_database:
+            self._anidb_refresher.start()
+
+    def close(self):
+        self._anidb_refresher.stop()
+        self._executor.shutdown(wait=False)
+
+        for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._anidb, self._mu):
+            source.close()
+
+        self._cache.close()
+        self._id_mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def cache_stats(self):
+        return self._cache.stats()
+
+    # Lookups that were answered by joining an identical one already in flight
+    def coalesced_calls(self):
+        return self._single_flight.coalesced
+
+    # Handshake/reuse counters for each source's keep-alive pool
+    def connection_stats(self):
+        return {source.source_type: source.session.stats()
+                for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu)}
+
+    # CLOSED is healthy; OPEN sources fail straight away with CircuitOpenError until their recovery timeout passes
+    def circuit_breaker_states(self):
+        return {source.source_type: source.session.circuit_breaker.state
+                for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu)}
+
+    # Forces a refresh and returns the refresher's status, the last diff and how long the refresh took. With
+    # wait=False the refresh runs in the background and the returned status will usually say 'running'.
+    def refresh_anidb_database(self, wait=True):
+        if wait:
+            self._anidb_refresher.run(force=True)
+        else:
+            self._anidb_refresher.trigger()
+
+        return self.anidb_refresh_status()
+
+    def anidb_refresh_status(self):
+        status = self._anidb_refresher.status()
+        status['diff'] = self._anidb.last_refresh_diff
+        return status
 
-    def refresh_anidb_database(self):
-        self._anidb.refresh_database()
@@ -0,0 +1,92 @@
+from .data_sources import AsyncMal, AsyncAnilist, AsyncKitsu, AsyncAnimePlanet, AsyncAniDB, AsyncMangaUpdates
+from .searcher import AsyncSearcher, AsyncTypeSearcher, AsyncAnimeSearcher, AsyncMangaSearcher, AsyncLightNovelSearcher
+from ..data_sources import AniDB
+from ..refresher import BackgroundRefresher
+from ..cache import create_cache
+from ..id_mapping import create_id_mapping
+from ..singleflight import AsyncSingleFlight
+
+import asyncio
+import logging
+
+# Connections kept open per upstream host; hundreds of lookups can be in flight on one loop with this many sockets
+CONNECTION_LIMIT = 20
+
+
+class AsyncAcerola:
+    def __init__(self, config, log_level=logging.INFO, connection_limit=CONNECTION_LIMIT):
+        self._config = config
+
+        self._mal = AsyncMal(self._config['MyAnimeList'], connection_limit)
+        self._anilist = AsyncAnilist(self._config['Anilist'], connection_limit)
+        self._kitsu = AsyncKitsu(self._config['Kitsu'], connection_limit)
+        self._animeplanet = AsyncAnimePlanet(self._config['AnimePlanet'], connection_limit)
+        self._anidb = AniDB(self._config['AniDB'])
+        self._mu = AsyncMangaUpdates(self._config['MangaUpdates'], connection_limit)
+
+        self.logger = logging.getLogger('AcerolaLogger')
+        self.logger.setLevel(log_level)
+
+        async_anidb = AsyncAniDB(self._anidb)
+        self._cache = create_cache(self._config)
+        self._single_flight = AsyncSingleFlight()
+        self._id_mapping = create_id_mapping(self._config)
+
+        self.anime = AsyncSearcher(AsyncAnimeSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, async_anidb,
+                                                      cache=self._cache, single_flight=self._single_flight,
+                                                      id_mapping=self._id_mapping))
+        self.manga = AsyncSearcher(AsyncMangaSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu,
+                                                      cache=self._cache, single_flight=self._single_flight,
+                                                      id_mapping=self._id_mapping))
+        self.light_novel = AsyncSearcher(AsyncLightNovelSearcher(self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu,
+                                                                 cache=self._cache, single_flight=self._single_flight,
+                                                                 id_mapping=self._id_mapping))
+
+        self._anidb_refresher = BackgroundRefresher(self._anidb.refresh_database, name='AniDBRefresher')
+        if self._anidb.auto_refresh_database:
+            self._anidb_refresher.start()
+
+    def cache_stats(self):
+        return self._cache.stats()
+
+    def coalesced_calls(self):
+        return self._single_flight.coalesced
+
+    def connection_stats(self):
+        return {source.source_type: source.stats()
+                for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu)}
+
+    # CLOSED is healthy; OPEN sources fail straight away with CircuitOpenError until their recovery timeout passes
+    def circuit_breaker_states(self):
+        return {source.source_type: source.circuit_breaker.state
+                for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu)}
+
+    # Same as Acerola.refresh_anidb_database, but waiting for the refresh doesn't block the loop
+    async def refresh_anidb_database(self, wait=True):
+        if wait:
+            await asyncio.get_running_loop().run_in_executor(None, self._anidb_refresher.run, True)
+        else:
+            self._anidb_refresher.trigger()
+
+        return self.anidb_refresh_status()
+
+    def anidb_refresh_status(self):
+        status = self._anidb_refresher.status()
+        status['diff'] = self._anidb.last_refresh_diff
+        return status
+
+    async def close(self):
+        self._anidb_refresher.stop()
+
+        for source in (self._mal, self._anilist, self._kitsu, self._animeplanet, self._mu):
+            await source.close()
+
+        self._anidb.close()
+        self._cache.close()
+        self._id_mapping.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
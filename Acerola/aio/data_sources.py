@@ -0,0 +1,416 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from ..data_sources import Mal, Anilist, Kitsu, AnimePlanet, MangaUpdates
+from ..data_sources import mal, anilist, kitsu, animeplanet, mangaupdates
+from ..errors import NoResultsFound, DataSourceTimeoutError, DataSourceUnavailableError, AccessTokenExpiredError, AcerolaError, RateLimitExceededError, CircuitOpenError
+from ..enums import DataSource
+from ..session import POOL_SIZE, IDLE_TIMEOUT
+from ..ratelimit import TokenBucket, parse_retry_after
+from ..circuitbreaker import CircuitBreaker
+from ..title_matcher import LIMIT
+
+# The async sources only replace the HTTP round trip; every response still goes through the sync classes' parsers.
+
+
+class AsyncSource:
+    source_type = None
+
+    def __init__(self, config, connection_limit=POOL_SIZE, headers=None):
+        self.config = config
+        self.timeout = aiohttp.ClientTimeout(total=int(config['Timeout']))
+        self.connection_limit = int(config.get('PoolSize', connection_limit))
+        self.idle_timeout = float(config.get('IdleTimeout', IDLE_TIMEOUT))
+        self.headers = headers
+        self.rate_limiter = TokenBucket.from_config(config, self.source_type)
+        self.circuit_breaker = CircuitBreaker.from_config(config, self.source_type)
+
+        self.logger = logging.getLogger('AcerolaLogger')
+
+        self._session = None
+        self._handshakes = 0
+        self._reused = 0
+
+    # ClientSession has to be created inside the running loop, so it's made on first use
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+
+            connector = aiohttp.TCPConnector(limit_per_host=self.connection_limit, keepalive_timeout=self.idle_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout,
+                                                  trace_configs=[trace_config])
+
+        return self._session
+
+    # Every request goes through the source's circuit breaker and rate limiter, like PooledSession does for the sync
+    # sources. The limiter is shared with nothing async, so waiting for a slot is just a sleep on the loop.
+    @asynccontextmanager
+    async def request(self, method, url, **kwargs):
+        self.circuit_breaker.before_call()
+
+        try:
+            response = await self._limited_request(method, url, **kwargs)
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+            self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+
+        if response.status >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+        async with response:
+            yield response
+
+    async def _limited_request(self, method, url, **kwargs):
+        if self.rate_limiter is None:
+            return await self.session.request(method, url, **kwargs)
+
+        await asyncio.sleep(self.rate_limiter.reserve())
+        response = await self.session.request(method, url, **kwargs)
+
+        # as in PooledSession: back off for as long as the server asks, then have one more go - reserve raises if
+        # that's too long to wait
+        if response.status == 429:
+            self.rate_limiter.penalise(parse_retry_after(response.headers.get('Retry-After')))
+            response.release()
+
+            await asyncio.sleep(self.rate_limiter.reserve())
+            response = await self.session.request(method, url, **kwargs)
+
+        return response
+
+    def stats(self):
+        return {'handshakes': self._handshakes,
+                'requests': self._handshakes + self._reused,
+                'reused': self._reused}
+
+    async def _on_connection_created(self, session, context, params):
+        self._handshakes += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self._reused += 1
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class AsyncMal(AsyncSource):
+    source_type = DataSource.MAL
+    empty_search_raises = Mal.empty_search_raises
+
+    def __init__(self, config, connection_limit=POOL_SIZE):
+        super().__init__(config, connection_limit,
+                         headers={'Authorization': config['Auth'], 'User-Agent': config['UserAgent']})
+
+    async def get_items(self, search_term, endpoint, parser):
+        try:
+            async with self.request('GET', mal.BASE_API + endpoint + search_term) as result:
+                if result.status != 200:
+                    return []
+
+                text = await result.text()
+
+            return parser(Mal.sanitise_shitty_xml(text))
+        except (RateLimitExceededError, CircuitOpenError):
+            raise
+        except Exception:
+            self.logger.exception('MAL error for: ' + search_term)
+            return []
+
+    async def search_anime(self, search_term):
+        return await self.get_items(search_term, mal.ANIME_ENDPOINT, Mal.parse_anime)
+
+    async def search_manga(self, search_term):
+        return await self.get_items(search_term, mal.MANGA_ENDPOINT, Mal.parse_manga)
+
+    async def search_light_novel(self, search_term):
+        return await self.get_items(search_term, mal.MANGA_ENDPOINT, Mal.parse_light_novel)
+
+    async def search_print(self, search_term):
+        return (await self.get_items(search_term, mal.MANGA_ENDPOINT, Mal.parse_print)) or ([], [])
+
+
+class AsyncAnilist(AsyncSource):
+    source_type = DataSource.ANILIST
+    empty_search_raises = Anilist.empty_search_raises
+
+    def __init__(self, config, connection_limit=POOL_SIZE):
+        super().__init__(config, connection_limit)
+        self.client_id = config['ClientId']
+        self.client_secret = config['ClientSecret']
+
+        self.access_token = None
+        self._token_lock = None
+
+    async def refresh_access_token(self):
+        try:
+            async with self.request('POST', anilist.AUTH_URL, params={'grant_type': 'client_credentials', 'client_id': self.client_id, 'client_secret': self.client_secret}) as response:
+                response.raise_for_status()
+                self.access_token = (await response.json(content_type=None))['access_token']
+        except asyncio.TimeoutError:
+            raise DataSourceTimeoutError(Anilist.source_type)
+        except aiohttp.ClientError:
+            raise DataSourceUnavailableError(Anilist.source_type)
+        except AcerolaError:
+            raise
+        except Exception as e:
+            raise AcerolaError(e)
+
+    async def anilist_search(self, endpoint, search_term, parser):
+        try:
+            return await self.anilist_request(endpoint, search_term, parser)
+        except AccessTokenExpiredError:
+            token = self.access_token
+
+            if self._token_lock is None:
+                self._token_lock = asyncio.Lock()
+
+            # only the first of many concurrent 401s actually fetches a new token
+            async with self._token_lock:
+                if self.access_token == token:
+                    await self.refresh_access_token()
+
+            return await self.anilist_request(endpoint, search_term, parser)
+
+    async def anilist_request(self, endpoint, search_term, parser):
+        try:
+            search_term = Anilist.sanitise_search_term(search_term)
+
+            params = {'access_token': self.access_token} if self.access_token else None
+
+            async with self.request('GET', anilist.BASE_URL + endpoint + search_term, params=params) as response:
+                if response.status == 401:
+                    raise AccessTokenExpiredError(Anilist.source_type)
+                if response.status == 404:
+                    raise NoResultsFound(Anilist.source_type, search_term)
+
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+
+            try:
+                error_message = payload['error']['messages']
+            except (TypeError, KeyError):
+                error_message = None
+
+            if error_message and 'No Results.' in error_message:
+                raise NoResultsFound(Anilist.source_type, search_term)
+
+            results = parser(payload)
+
+            if not results:
+                raise NoResultsFound(Anilist.source_type, search_term)
+
+            return results
+        except (NoResultsFound, AccessTokenExpiredError):
+            raise
+        except asyncio.TimeoutError:
+            raise DataSourceTimeoutError(Anilist.source_type)
+        except aiohttp.ClientError:
+            raise DataSourceUnavailableError(Anilist.source_type)
+        except AcerolaError:
+            raise
+        except Exception as e:
+            raise AcerolaError(e)
+
+    async def search_anime(self, search_term):
+        return await self.anilist_search(anilist.ANIME_ENDPOINT, search_term, Anilist.parse_anime)
+
+    async def search_manga(self, search_term):
+        return await self.anilist_search(anilist.MANGA_ENDPOINT, search_term, Anilist.parse_manga)
+
+    async def search_light_novel(self, search_term):
+        return await self.anilist_search(anilist.MANGA_ENDPOINT, search_term, Anilist.parse_light_novel)
+
+    async def search_print(self, search_term):
+        manga, light_novels = await self.anilist_search(anilist.MANGA_ENDPOINT, search_term, Anilist.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(Anilist.source_type, search_term)
+
+        return manga, light_novels
+
+    async def get_anime(self, id):
+        return await self.anilist_search(anilist.ANIME_BY_ID, str(id), Anilist.single(Anilist.parse_anime))
+
+    async def get_manga(self, id):
+        return await self.anilist_search(anilist.MANGA_BY_ID, str(id), Anilist.single(Anilist.parse_manga))
+
+    async def get_light_novel(self, id):
+        return await self.anilist_search(anilist.MANGA_BY_ID, str(id), Anilist.single(Anilist.parse_light_novel))
+
+
+class AsyncKitsu(AsyncSource):
+    source_type = DataSource.KITSU
+    empty_search_raises = Kitsu.empty_search_raises
+
+    def __init__(self, config, connection_limit=POOL_SIZE):
+        super().__init__(config, connection_limit,
+                         headers={'Accept': 'application/vnd.api+json', 'Content-Type': 'application/vnd.api+json'})
+
+    async def kitsu_search(self, endpoint, search_term, parser):
+        try:
+            async with self.request('GET', kitsu.BASE_URL + endpoint + search_term) as response:
+                if response.status == 404:
+                    raise NoResultsFound(Kitsu.source_type, search_term)
+
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+
+            results = parser(payload['data'])
+
+            if not results:
+                raise NoResultsFound(Kitsu.source_type, search_term)
+
+            return results
+        except NoResultsFound:
+            raise
+        except asyncio.TimeoutError:
+            raise DataSourceTimeoutError(Kitsu.source_type)
+        except aiohttp.ClientError:
+            raise DataSourceUnavailableError(Kitsu.source_type)
+        except AcerolaError:
+            raise
+        except Exception as e:
+            raise AcerolaError(e)
+
+    async def search_anime(self, search_term):
+        return await self.kitsu_search(kitsu.ANIME_FILTER, search_term, Kitsu.parse_anime)
+
+    async def search_manga(self, search_term):
+        return await self.kitsu_search(kitsu.MANGA_FILTER, search_term, Kitsu.parse_manga)
+
+    async def search_light_novel(self, search_term):
+        return await self.kitsu_search(kitsu.MANGA_FILTER, search_term, Kitsu.parse_light_novel)
+
+    async def search_print(self, search_term):
+        manga, light_novels = await self.kitsu_search(kitsu.MANGA_FILTER, search_term, Kitsu.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(Kitsu.source_type, search_term)
+
+        return manga, light_novels
+
+    async def get_anime(self, id):
+        return await self.kitsu_search(kitsu.ANIME_BY_ID, str(id), Kitsu.single(Kitsu.parse_anime))
+
+    async def get_manga(self, id):
+        return await self.kitsu_search(kitsu.MANGA_BY_ID, str(id), Kitsu.single(Kitsu.parse_manga))
+
+    async def get_light_novel(self, id):
+        return await self.kitsu_search(kitsu.MANGA_BY_ID, str(id), Kitsu.single(Kitsu.parse_light_novel))
+
+
+class AsyncAnimePlanet(AsyncSource):
+    source_type = DataSource.ANIMEPLANET
+    empty_search_raises = AnimePlanet.empty_search_raises
+
+    async def ap_search(self, endpoint, search_term, parser):
+        try:
+            async with self.request('GET', animeplanet.BASE_URL + endpoint + search_term) as response:
+                response.raise_for_status()
+                text = await response.text()
+
+            page = AnimePlanet.parse_page(text)
+
+            if AnimePlanet.no_results(page):
+                raise NoResultsFound(AnimePlanet.source_type, search_term)
+
+            results = parser(page)
+
+            if not results:
+                raise NoResultsFound(AnimePlanet.source_type, search_term)
+
+            return results
+        except NoResultsFound:
+            raise
+        except asyncio.TimeoutError:
+            raise DataSourceTimeoutError(AnimePlanet.source_type)
+        except aiohttp.ClientError:
+            raise DataSourceUnavailableError(AnimePlanet.source_type)
+        except AcerolaError:
+            raise
+        except Exception as e:
+            raise AcerolaError(e)
+
+    async def search_anime(self, search_term):
+        return await self.ap_search(animeplanet.ANIME_ENDPOINT, search_term, AnimePlanet.parse_anime)
+
+    async def search_manga(self, search_term):
+        return await self.ap_search(animeplanet.MANGA_ENDPOINT, search_term, AnimePlanet.parse_manga)
+
+    async def search_light_novel(self, search_term):
+        return await self.ap_search(animeplanet.MANGA_ENDPOINT, search_term, AnimePlanet.parse_light_novel)
+
+    async def search_print(self, search_term):
+        manga, light_novels = await self.ap_search(animeplanet.MANGA_ENDPOINT, search_term, AnimePlanet.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(AnimePlanet.source_type, search_term)
+
+        return manga, light_novels
+
+
+class AsyncMangaUpdates(AsyncSource):
+    source_type = DataSource.MANGAUPDATES
+    empty_search_raises = MangaUpdates.empty_search_raises
+
+    async def get_thing(self, search_term, parser):
+        try:
+            async with self.request('GET', mangaupdates.BASE_URL, params={'search': search_term}) as result:
+                if result.status != 200:
+                    return []
+
+                content = await result.read()
+
+            return parser(MangaUpdates.parse_page(content))
+        except (RateLimitExceededError, CircuitOpenError):
+            raise
+        except Exception as e:
+            self.logger.error('MU error: ' + str(e))
+            return []
+
+    async def search_manga(self, search_term):
+        return await self.get_thing(search_term, MangaUpdates.parse_manga)
+
+    async def search_light_novel(self, search_term):
+        return await self.get_thing(search_term, MangaUpdates.parse_light_novel)
+
+    async def search_print(self, search_term):
+        return (await self.get_thing(search_term, MangaUpdates.parse_print)) or ([], [])
+
+
+class AsyncAniDB:
+    source_type = DataSource.ANIDB
+
+    # AniDB is a local database, so lookups just move off the loop onto the default executor
+    def __init__(self, anidb):
+        self.anidb = anidb
+
+    async def search_anime(self, search_term):
+        return await asyncio.get_running_loop().run_in_executor(None, self.anidb.search_anime, search_term)
+
+    async def search_anime_many(self, search_terms):
+        return await asyncio.get_running_loop().run_in_executor(None, self.anidb.search_anime_many, search_terms)
+
+    async def search_anime_ranked(self, search_term, limit=LIMIT):
+        return await asyncio.get_running_loop().run_in_executor(None, self.anidb.search_anime_ranked, search_term, limit)
+
+    async def get_anime(self, id):
+        return await asyncio.get_running_loop().run_in_executor(None, self.anidb.get_anime, id)
+
+    async def get_anime_many(self, ids):
+        return await asyncio.get_running_loop().run_in_executor(None, self.anidb.get_anime_many, ids)
+
+    async def close(self):
+        pass
@@ -0,0 +1,321 @@
+import asyncio
+from functools import partial
+
+from ..searcher import TypeSearcher, SearchResult, MAX_WORKERS, SEARCH_ALL_TIMEOUT, SEARCH_FIRST_DEADLINE, HEDGE_DELAY
+from ..errors import DataSourceTimeoutError, NoResultsFound, FeatureNotImplementedError
+from ..cache import ResultCache, NO_RESULTS
+from ..title_matcher import LIMIT
+
+
+class AsyncSearcher:
+    def __init__(self, type_searcher):
+        self._type_searcher = type_searcher
+
+    async def search(self, source_type, term, use_cache=True):
+        return await self._type_searcher.search(source_type, term, use_cache)
+
+    async def get(self, source_type, id, use_cache=True):
+        return await self._type_searcher.get(source_type, id, use_cache)
+
+    async def search_ranked(self, source_type, term, limit=LIMIT, use_cache=True):
+        return await self._type_searcher.search_ranked(source_type, term, limit, use_cache)
+
+    def invalidate(self, source_type, term=None, id=None):
+        self._type_searcher.invalidate(source_type, term, id)
+
+    async def search_all(self, term, sources=None, timeout=SEARCH_ALL_TIMEOUT):
+        return await self._type_searcher.search_all(term, sources, timeout)
+
+    async def search_first(self, term, preferred=None, deadline=SEARCH_FIRST_DEADLINE, hedge_delay=HEDGE_DELAY):
+        return await self._type_searcher.search_first(term, preferred, deadline, hedge_delay)
+
+    async def search_many(self, source_type, terms, use_cache=True):
+        return await self._type_searcher.search_many(source_type, terms, use_cache)
+
+    async def get_many(self, source_type, ids, use_cache=True):
+        return await self._type_searcher.get_many(source_type, ids, use_cache)
+
+    async def search_print(self, source_type, term, use_cache=True):
+        return await self._type_searcher.search_print(source_type, term, use_cache)
+
+    async def cross_reference(self, source_type, id, sources=None, use_cache=True):
+        return await self._type_searcher.cross_reference(source_type, id, sources, use_cache)
+
+    def related_ids(self, source_type, id):
+        return self._type_searcher.related_ids(source_type, id)
+
+    def link(self, ids):
+        self._type_searcher.link(ids)
+
+
+class AsyncTypeSearcher(TypeSearcher):
+    async def search(self, source_type, term, use_cache=True):
+        function = self.source_function(source_type, self.search_function)
+        return await self.cached(source_type, 'search', term, function, use_cache)
+
+    async def get(self, source_type, id, use_cache=True):
+        function = self.source_function(source_type, self.get_function)
+        return await self.cached(source_type, 'get', id, function, use_cache)
+
+    async def search_ranked(self, source_type, term, limit=LIMIT, use_cache=True):
+        if self.ranked_function is None:
+            raise FeatureNotImplementedError(source_type, 'search_ranked')
+
+        function = partial(self.source_function(source_type, self.ranked_function), limit=limit)
+        return await self.cached(source_type, 'ranked:{}'.format(limit), term, function, use_cache)
+
+    async def search_print(self, source_type, term, use_cache=True):
+        if self.print_function is None:
+            raise FeatureNotImplementedError(source_type, 'search_print')
+
+        function = self.source_function(source_type, self.print_function)
+        keys = self.print_keys(source_type, term)
+        empty_search_raises = self._sources[source_type].empty_search_raises
+
+        if self._cache is not None and use_cache:
+            results = await self.in_cache(self.cached_print, keys)
+            if all(result is not None for result in results):
+                if all(result is NO_RESULTS for result in results):
+                    raise NoResultsFound(source_type, term)
+                return tuple([] if result is NO_RESULTS else result for result in results)
+
+        key = ResultCache.make_key(source_type, 'print', 'search', term)
+
+        if self._single_flight is None:
+            return await self.load_print(keys, function, term, empty_search_raises)
+
+        return await self._single_flight.do(key, self.load_print, keys, function, term, empty_search_raises)
+
+    async def load_print(self, keys, function, term, empty_search_raises):
+        try:
+            results = await function(term)
+        except NoResultsFound:
+            if self._cache is not None:
+                await self.in_cache(self.store_print_negative, keys)
+            raise
+
+        if self._cache is not None:
+            await self.in_cache(self.store_print, keys, results, empty_search_raises)
+
+        return results
+
+    async def search_many(self, source_type, terms, use_cache=True):
+        function = self.source_function(source_type, self.search_function)
+        return await self.many(source_type, 'search', terms, function, self.search_function + '_many', use_cache)
+
+    async def get_many(self, source_type, ids, use_cache=True):
+        function = self.source_function(source_type, self.get_function)
+        return await self.many(source_type, 'get', ids, function, self.get_function + '_many', use_cache)
+
+    async def many(self, source_type, operation, terms, function, many_function, use_cache=True):
+        keys = [ResultCache.make_key(source_type, self.series_type, operation, term) for term in terms]
+
+        unique = {}
+        for key, term in zip(keys, terms):
+            unique.setdefault(key, term)
+
+        source = self._sources[source_type]
+
+        if hasattr(source, many_function):
+            bulk_function = getattr(source, many_function)
+            results = await self.cached_many(source_type, unique, bulk_function, use_cache)
+        else:
+            # at most a connection pool's worth at once, as the sync executor does, so a long list doesn't queue up
+            # behind the rate limiter past its MaxWait
+            slots = asyncio.Semaphore(getattr(source, 'connection_limit', MAX_WORKERS))
+
+            async def lookup(term):
+                async with slots:
+                    return await self.cached(source_type, operation, term, function, use_cache)
+
+            outcomes = await asyncio.gather(*(lookup(term) for term in unique.values()), return_exceptions=True)
+
+            results = {}
+            for key, outcome in zip(unique, outcomes):
+                if isinstance(outcome, BaseException):
+                    results[key] = SearchResult(None, outcome)
+                else:
+                    results[key] = SearchResult(outcome, None)
+
+        return [results[key] for key in keys]
+
+    async def cached_many(self, source_type, terms_by_key, function, use_cache=True):
+        results, missing = await self.in_cache(self.split_cached, source_type, terms_by_key, use_cache)
+
+        if not missing:
+            return results
+
+        try:
+            found = await function(list(missing.values()))
+        except Exception as e:
+            results.update((key, SearchResult(None, e)) for key in missing)
+            return results
+
+        await self.in_cache(self.load_many, source_type, missing, found, results)
+
+        return results
+
+    # use_cache=False skips the lookup but still stores the fresh result
+    async def cached(self, source_type, operation, term, function, use_cache=True):
+        key = ResultCache.make_key(source_type, self.series_type, operation, term)
+
+        if self._cache is not None and use_cache:
+            results = await self.in_cache(self._cache.get, key)
+            if results is NO_RESULTS:
+                raise NoResultsFound(source_type, term)
+            if results is not None:
+                return results
+
+        if self._single_flight is None:
+            return await self.load(key, function, term)
+
+        return await self._single_flight.do(key, self.load, key, function, term)
+
+    async def load(self, key, function, term):
+        try:
+            results = await function(term)
+        except NoResultsFound:
+            if self._cache is not None:
+                await self.in_cache(self._cache.put_negative, key)
+            raise
+
+        if self._cache is not None:
+            await self.in_cache(self._cache.put, key, results)
+
+        return results
+
+    # A SQLite cache waits on the disk, so it's called from the default executor; the in-memory one is called directly
+    async def in_cache(self, function, *args):
+        if not self._cache.blocking:
+            return function(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def search_all(self, term, sources=None, timeout=SEARCH_ALL_TIMEOUT):
+        if sources is None:
+            sources = [source_type for source_type, source in self._sources.items()
+                       if hasattr(source, self.search_function)]
+
+        tasks = {asyncio.ensure_future(self.search(source_type, term)): source_type for source_type in sources}
+        done, _ = await asyncio.wait(tasks, timeout=timeout)
+
+        results = {}
+        for task, source_type in tasks.items():
+            if task in done:
+                error = task.exception()
+                results[source_type] = SearchResult(None if error else task.result(), error)
+            else:
+                task.cancel()
+                results[source_type] = SearchResult(None, DataSourceTimeoutError(source_type))
+
+        return results
+
+    async def search_first(self, term, preferred=None, deadline=SEARCH_FIRST_DEADLINE, hedge_delay=HEDGE_DELAY):
+        if preferred is None:
+            preferred = [source_type for source_type, source in self._sources.items()
+                         if hasattr(source, self.search_function)]
+
+        loop = asyncio.get_running_loop()
+
+        waiting = list(preferred)
+        pending = {}
+        errors = {}
+
+        now = loop.time()
+        give_up_at = now + deadline
+        next_hedge_at = now
+
+        try:
+            while now < give_up_at:
+                if waiting and (not pending or now >= next_hedge_at):
+                    source_type = waiting.pop(0)
+                    pending[asyncio.ensure_future(self.search(source_type, term))] = source_type
+                    next_hedge_at = now + hedge_delay
+                    continue
+
+                if not pending:
+                    break
+
+                timeout = give_up_at - now
+                if waiting:
+                    timeout = min(timeout, next_hedge_at - now)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    source_type = pending.pop(task)
+                    error = task.exception()
+
+                    if error is None and task.result():
+                        return source_type, task.result()
+
+                    errors[source_type] = error or NoResultsFound(source_type, term)
+
+                now = loop.time()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if pending or waiting:
+            raise DataSourceTimeoutError(list(pending.values())[0] if pending else waiting[0])
+
+        for source_type in preferred:
+            if not isinstance(errors[source_type], NoResultsFound):
+                raise errors[source_type]
+
+        raise NoResultsFound(preferred[0] if preferred else None, term)
+
+    async def cross_reference(self, source_type, id, sources=None, use_cache=True):
+        sources, related = self.cross_reference_targets(source_type, id, sources)
+
+        origin = origin_error = None
+        if any(not self.fetches_directly(target, related) for target in sources):
+            try:
+                origin = (await self.get(source_type, id, use_cache))[0]
+            except Exception as e:
+                origin_error = e
+
+        outcomes = await asyncio.gather(*(self.find_related(target, related.get(target), source_type, id,
+                                                            origin, origin_error, use_cache)
+                                          for target in sources), return_exceptions=True)
+
+        results = {}
+        for target, outcome in zip(sources, outcomes):
+            if isinstance(outcome, BaseException):
+                results[target] = SearchResult(None, outcome)
+            else:
+                results[target] = SearchResult(outcome, None)
+
+        return results
+
+    async def find_related(self, source_type, known_id, origin_source, origin_id, origin, origin_error, use_cache=True):
+        if known_id is not None and hasattr(self._sources[source_type], self.get_function):
+            return await self.get(source_type, known_id, use_cache)
+
+        if origin is None:
+            raise origin_error
+
+        title = origin.title_romaji or origin.title_english
+        return self.match_related(source_type, known_id, origin_source, origin_id, origin,
+                                  await self.search(source_type, title, use_cache))
+
+
+class AsyncAnimeSearcher(AsyncTypeSearcher):
+    series_type = 'anime'
+    search_function = 'search_anime'
+    get_function = 'get_anime'
+    ranked_function = 'search_anime_ranked'
+
+
+class AsyncMangaSearcher(AsyncTypeSearcher):
+    series_type = 'manga'
+    search_function = 'search_manga'
+    get_function = 'get_manga'
+    print_function = 'search_print'
+
+
+class AsyncLightNovelSearcher(AsyncTypeSearcher):
+    series_type = 'light_novel'
+    search_function = 'search_light_novel'
+    get_function = 'get_light_novel'
+    print_function = 'search_print'
@@ -0,0 +1,333 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .enums import DataSource
+from .errors import AcerolaError
+from .response_types import Anime, Manga, LightNovel
+
+MAX_SIZE = 1024
+MAX_BYTES = 64 * 1024 * 1024
+TTL = 3600
+NEGATIVE_TTL = 300
+SQLITE_TIMEOUT = 30
+ACCESS_GRANULARITY = 60
+PRUNE_INTERVAL = 100
+
+RESPONSE_TYPES = {cls.__name__: cls for cls in (Anime, Manga, LightNovel)}
+
+# Returned by get for a term that's known to have no results
+NO_RESULTS = object()
+
+SOURCE_SECTIONS = ((DataSource.MAL, 'MyAnimeList'),
+                   (DataSource.ANILIST, 'Anilist'),
+                   (DataSource.KITSU, 'Kitsu'),
+                   (DataSource.ANIMEPLANET, 'AnimePlanet'),
+                   (DataSource.ANIDB, 'AniDB'),
+                   (DataSource.MANGAUPDATES, 'MangaUpdates'))
+
+
+# The optional [Cache] section picks the Backend ('memory' or 'sqlite') and sets its size, default TTL and the (shorter)
+# NegativeTTL for lookups that found nothing; a CacheTTL in a source's own section overrides the TTL for that source
+def create_cache(config):
+    cache_config = config['Cache'] if 'Cache' in config else {}
+
+    source_ttls = {source_type.name: float(config[section]['CacheTTL'])
+                   for source_type, section in SOURCE_SECTIONS
+                   if section in config and 'CacheTTL' in config[section]}
+
+    backend = str(cache_config.get('Backend', 'memory')).lower()
+
+    if backend == 'memory':
+        return ResultCache.from_config(cache_config, source_ttls)
+    elif backend == 'sqlite':
+        return SQLiteResultCache.from_config(cache_config, source_ttls)
+    else:
+        raise AcerolaError('Unknown cache backend: ' + backend)
+
+
+def serialise_results(results):
+    payload = [[kind_of(result), result.to_dict()] for result in results]
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+# Subclasses (e.g. MangaUpdates' lazily hydrated results) are stored as the response type they extend
+def kind_of(result):
+    for kind, cls in RESPONSE_TYPES.items():
+        if isinstance(result, cls):
+            return kind
+
+    raise AcerolaError('Can\'t cache a ' + type(result).__name__)
+
+
+def deserialise_results(blob):
+    payload = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [RESPONSE_TYPES[kind].from_dict(data) for kind, data in payload]
+
+
+class ResultCache:
+    # Size-bounded LRU of search/get results with a TTL per data source. Keys come from make_key.
+    # Never waits on anything but its own lock, so async searchers call it straight from the loop.
+    blocking = False
+
+    def __init__(self, max_size=MAX_SIZE, ttl=TTL, source_ttls=None, negative_ttl=NEGATIVE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.source_ttls = source_ttls or {}
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, cache_config, source_ttls=None):
+        return cls(max_size=int(cache_config.get('MaxSize', MAX_SIZE)),
+                   ttl=float(cache_config.get('TTL', TTL)),
+                   source_ttls=source_ttls,
+                   negative_ttl=float(cache_config.get('NegativeTTL', NEGATIVE_TTL)))
+
+    @staticmethod
+    def make_key(source_type, series_type, operation, term):
+        # ids are kept as they are; every other operation is keyed on a search term
+        if operation != 'get':
+            term = ' '.join(str(term).casefold().split())
+        else:
+            term = str(term)
+
+        return source_type.name, series_type, operation, term
+
+    # Returns None on a miss and NO_RESULTS for a cached NoResultsFound
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+
+            if entry[1] is NO_RESULTS:
+                self.negative_hits += 1
+                return NO_RESULTS
+
+            self.hits += 1
+
+            return list(entry[1])
+
+    def put(self, key, results):
+        if not results:
+            return
+
+        self._store(key, self.clock() + self.ttl_for(key[0]), list(results))
+
+    def put_negative(self, key):
+        self._store(key, self.clock() + min(self.negative_ttl, self.ttl_for(key[0])), NO_RESULTS)
+
+    def _store(self, key, expires_at, value):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def ttl_for(self, source_name):
+        return self.source_ttls.get(source_name, self.ttl)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries),
+                    'hits': self.hits,
+                    'negative_hits': self.negative_hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+    def close(self):
+        pass
+
+
+class SQLiteResultCache:
+    # Same interface as ResultCache, but kept in a single SQLite file that every worker process shares. Rows expire by
+    # TTL and the least recently read ones are dropped once their values add up to more than max_bytes. That's an
+    # approximation of the file's size: keys, the index and free pages come on top, and SQLite never gives free pages
+    # back to the filesystem without a VACUUM, so the file can stay bigger than max_bytes after pruning.
+    # Calls can wait on the disk and on other processes' write locks, so async searchers make them off the loop.
+    blocking = True
+
+    def __init__(self, path, max_bytes=MAX_BYTES, ttl=TTL, source_ttls=None, negative_ttl=NEGATIVE_TTL, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.source_ttls = source_ttls or {}
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._puts = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self.connection as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                               'key TEXT PRIMARY KEY, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, '
+                               'size INTEGER NOT NULL, negative INTEGER NOT NULL DEFAULT 0, value BLOB NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)')
+
+    @classmethod
+    def from_config(cls, cache_config, source_ttls=None):
+        return cls(str(cache_config['Path']),
+                   max_bytes=int(cache_config.get('MaxBytes', MAX_BYTES)),
+                   ttl=float(cache_config.get('TTL', TTL)),
+                   source_ttls=source_ttls,
+                   negative_ttl=float(cache_config.get('NegativeTTL', NEGATIVE_TTL)))
+
+    @staticmethod
+    def make_key(source_type, series_type, operation, term):
+        return ResultCache.make_key(source_type, series_type, operation, term)
+
+    def ttl_for(self, source_name):
+        return self.source_ttls.get(source_name, self.ttl)
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            # only ever used by this thread, but close() shuts every thread's connection down
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+
+            with self._lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def get(self, key):
+        now = self.clock()
+        row = self.connection.execute('SELECT expires_at, accessed_at, negative, value FROM results WHERE key = ?',
+                                      (self.encode_key(key),)).fetchone()
+
+        if row is None or row[0] <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # only touch the row occasionally, so reads don't turn into a write each
+        if now - row[1] > ACCESS_GRANULARITY:
+            with self.connection as connection:
+                connection.execute('UPDATE results SET accessed_at = ? WHERE key = ?', (now, self.encode_key(key)))
+
+        if row[2]:
+            with self._lock:
+                self.negative_hits += 1
+            return NO_RESULTS
+
+        with self._lock:
+            self.hits += 1
+
+        return deserialise_results(row[3])
+
+    def put(self, key, results):
+        if not results:
+            return
+
+        self._store(key, self.ttl_for(key[0]), False, serialise_results(results))
+
+    def put_negative(self, key):
+        self._store(key, min(self.negative_ttl, self.ttl_for(key[0])), True, b'')
+
+    def _store(self, key, ttl, negative, value):
+        now = self.clock()
+
+        with self.connection as connection:
+            connection.execute('INSERT OR REPLACE INTO results (key, expires_at, accessed_at, size, negative, value) '
+                               'VALUES (?, ?, ?, ?, ?, ?)',
+                               (self.encode_key(key), now + ttl, now, len(value), negative, value))
+
+        with self._lock:
+            self._puts += 1
+            prune = self._puts % PRUNE_INTERVAL == 0
+
+        if prune:
+            self.prune()
+
+    def prune(self):
+        with self.connection as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM results WHERE expires_at <= ?', (self.clock(),))
+
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            evicted = 0
+            for key, size in connection.execute('SELECT key, size FROM results ORDER BY accessed_at').fetchall():
+                if total <= self.max_bytes:
+                    break
+
+                connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                total -= size
+                evicted += 1
+
+        with self._lock:
+            self.evictions += evicted
+
+    def invalidate(self, key):
+        with self.connection as connection:
+            connection.execute('DELETE FROM results WHERE key = ?', (self.encode_key(key),))
+
+    def clear(self):
+        with self.connection as connection:
+            connection.execute('DELETE FROM results')
+
+    def stats(self):
+        size = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+        with self._lock:
+            return {'size': size,
+                    'hits': self.hits,
+                    'negative_hits': self.negative_hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+
+        for connection in connections:
+            connection.close()
+
+    @staticmethod
+    def encode_key(key):
+        return json.dumps(key, ensure_ascii=False)
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from .enums import BreakerState
+from .errors import CircuitOpenError
+
+FAILURE_THRESHOLD = 5
+RECOVERY_TIMEOUT = 30
+
+
+class CircuitBreaker:
+    # After failure_threshold consecutive failures (timeouts, connection errors, 5xx) the breaker opens and every call
+    # fails straight away with CircuitOpenError. Once recovery_timeout has passed a single probe is let through: if it
+    # succeeds the breaker closes again, if it fails it stays open for another recovery_timeout.
+    def __init__(self, source_type, failure_threshold=FAILURE_THRESHOLD, recovery_timeout=RECOVERY_TIMEOUT,
+                 clock=time.monotonic):
+        self.source_type = source_type
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @classmethod
+    def from_config(cls, config, source_type):
+        return cls(source_type,
+                   failure_threshold=int(config.get('FailureThreshold', FAILURE_THRESHOLD)),
+                   recovery_timeout=float(config.get('RecoveryTimeout', RECOVERY_TIMEOUT)))
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        with self._lock:
+            if self._state == BreakerState.OPEN:
+                if self.clock() - self._opened_at < self.recovery_timeout:
+                    raise CircuitOpenError(self.source_type)
+
+                self._state = BreakerState.HALF_OPEN
+
+            if self._state == BreakerState.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(self.source_type)
+
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = BreakerState.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    # For calls that ended without telling us anything about the source (cancelled, rate limited locally...)
+    def release(self):
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+
+            if self._state == BreakerState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = BreakerState.OPEN
+                self._opened_at = self.clock()
@@ -1,20 +1,22 @@
+import gzip
 import logging
 import os
+import threading
 import time
+import xml.etree.ElementTree as et
 from functools import wraps
 
-from tinydb import TinyDB, Query
-from tinydb.storages import JSONStorage
-from tinydb.middlewares import CachingMiddleware
-from bs4 import BeautifulSoup
-
 from ..errors import NoResultsFound, DataSourceTimeoutError, DataSourceUnavailableError, AcerolaError
 
 from ..response_types import Anime
 from ..enums import DataSource
+from .anidb_storage import create_title_store
+from ..title_matcher import TitleMatcher, LIMIT
 
 # todo add constants
 HOUR = 3600
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+SYNONYM_LANGUAGES = ('en', 'x-jat')
 
 
 class AniDB:
@@ -26,82 +28,161 @@ class AniDB:
         self.path_to_xml = str(config['path_to_xml'])
         self.path_to_database = str(config['path_to_database'])
         self.auto_refresh_database = config['auto_refresh_database']
+        self.storage = str(config.get('storage', 'tinydb'))
 
         try:
             self.next_time_to_update = os.path.getmtime(self.path_to_database) + (HOUR * 36)
         except FileNotFoundError:
             self.next_time_to_update = int(time.time()) - 1
 
-        self.titles_db = TinyDB(self.path_to_database, storage=CachingMiddleware(JSONStorage))
+        self.titles_store = create_title_store(self.storage, self.path_to_database)
+        self.last_refresh_diff = None
+
+        self._matcher = None
+        self._matcher_lock = threading.Lock()
+
+    # Returns True if the database was refreshed, False if it wasn't due yet. Errors are left to the caller, which is
+    # normally the background refresher owned by Acerola.
+    def refresh_database(self, force=False):
+        if not force and int(time.time()) <= self.next_time_to_update:
+            return False
+
+        current = {title['id']: title for title in self.titles_store.records()}
+
+        added = []
+        changed = []
+        for title in self.parse_titles(self.path_to_xml):
+            existing = current.pop(title['id'], None)
+            if existing is None:
+                added.append(title)
+            elif existing != title:
+                changed.append(title)
+
+        # whatever is left over wasn't in the new dump
+        removed = list(current)
+
+        self.titles_store.apply_diff(added, removed, changed)
 
-    def refresh_database(self):
-        if int(time.time()) > self.next_time_to_update:
-            try:
-                with open(self.path_to_xml, 'r', encoding='utf-8') as titles_file:
-                    soup = BeautifulSoup(titles_file, 'lxml')
+        if added or removed or changed:
+            self._rebuild_matcher()
 
-                    titles = []
+        self.last_refresh_diff = {'added': len(added), 'removed': len(removed), 'changed': len(changed)}
+        self.logger.info('AniDB refresh: {added} added, {removed} removed, {changed} changed'.format(**self.last_refresh_diff))
 
-                    for anime in soup.find_all('anime'):
-                        anime_info = {}
-                        anime_info['id'] = anime['aid']
-                        anime_info['url'] = 'http://anidb.net/perl-bin/animedb.pl?show=anime&aid=' + anime['aid']
-                        anime_info['main'] = anime.find('title', {'type': 'main'}).text if anime.find('title', {'type': 'main'}) else None
-                        anime_info['english'] = anime.find('title', {'type': 'official', 'xml:lang': 'en'}).text if anime.find('title', {'type': 'official', 'xml:lang': 'en'}) else None
-                        anime_info['synonyms'] = set(title.text for title in anime.find_all('title', {'xml:lang': ['en', 'x-jat']}))
+        self.next_time_to_update = int(time.time()) + HOUR * 36
 
-                        titles.append(anime_info)
+        return True
 
-                with self.titles_db as titles_db:
-                    titles_db.purge()
-                    titles_db.insert_multiple(titles)
+    # Once ranked search is in use, its matcher is rebuilt here on the refresher's thread and swapped in when ready, so
+    # ranked searches carry on with the old one meanwhile. Waiting on the lock first means a matcher that was being
+    # built from the store as the diff went in is replaced too.
+    def _rebuild_matcher(self):
+        with self._matcher_lock:
+            if self._matcher is None:
+                return
 
-                self.next_time_to_update += HOUR * 36
+        matcher = TitleMatcher(self.titles_store.records())
 
-            except FileNotFoundError:
-                print('XML file doesn\'t exist')
-            except Exception as e:
-                print(e)
+        with self._matcher_lock:
+            self._matcher = matcher
+
+    def close(self):
+        self.titles_store.close()
 
     # todo logging decorator?
     def search_anime(self, search_term):
-        if self.auto_refresh_database:
-            self.refresh_database()
-
-        with self.titles_db as database:
-            results = database.search(Query().synonyms.test(self.contains_search_term, search_term))
-            if results:
-                anime_list = []
-                for result in results:
-                    anime_list.append(Anime(id=result['id'],
-                                            url=result['url'],
-                                            title_english=result['english'],
-                                            title_romaji=result['main'],
-                                            synonyms=set(result['synonyms'])))
-
-                return anime_list
-            else:
-                raise NoResultsFound(self.source_type, search_term)
-
+        results = self.titles_store.search(search_term)
+        if results:
+            return [self.to_anime(result) for result in results]
+        else:
+            raise NoResultsFound(self.source_type, search_term)
+
+    # Fuzzy search, best match first: tolerates typos, punctuation and full-width text, and only returns the closest
+    # limit results rather than every title containing the term. The matcher is built from the store on first use;
+    # after that, refresh_database keeps it up to date in the background.
+    def search_anime_ranked(self, search_term, limit=LIMIT):
+        results = self.matcher.search(search_term, limit)
+        if results:
+            return [self.to_anime(record) for similarity, record in results]
+        else:
+            raise NoResultsFound(self.source_type, search_term)
+
+    @property
+    def matcher(self):
+        matcher = self._matcher
+
+        if matcher is None:
+            with self._matcher_lock:
+                if self._matcher is None:
+                    self._matcher = TitleMatcher(self.titles_store.records())
+                matcher = self._matcher
+
+        return matcher
+
+    # Searches for every term in one pass over the store, returning {term: [Anime]} for the terms that matched
+    def search_anime_many(self, search_terms):
+        results = self.titles_store.search_many(search_terms)
+        return {term: [self.to_anime(result) for result in records] for term, records in results.items() if records}
+
+    # aids are stored as strings, so ints are accepted too
     def get_anime(self, id):
-        if self.auto_refresh_database:
-            self.refresh_database()
-
-        with self.titles_db as database:
-            results = database.search(Query().id == id)
-            if results:
-                anime_list = []
-                for result in results:
-                    anime_list.append(Anime(id=result['id'],
-                                            url=result['url'],
-                                            title_english=result['english'],
-                                            title_romaji=result['main'],
-                                            synonyms=set(result['synonyms'])))
-
-                return anime_list
-            else:
-                raise NoResultsFound(self.source_type, id)
+        result = self.titles_store.get(str(id))
+        if result:
+            return [self.to_anime(result)]
+        else:
+            raise NoResultsFound(self.source_type, id)
+
+    # Resolves every aid in one pass over the store, returning {id: Anime} for the ids that exist
+    def get_anime_many(self, ids):
+        results = self.titles_store.get_many(str(id) for id in ids)
+        return {id: self.to_anime(results[str(id)]) for id in ids if str(id) in results}
 
+    @staticmethod
+    def to_anime(record):
+        return Anime(id=record['id'],
+                     url=record['url'],
+                     title_english=record['english'],
+                     title_romaji=record['main'],
+                     synonyms=set(record['synonyms']))
+
+    @staticmethod
+    def parse_titles(path_to_xml):
+        # Streams the titles dump one <anime> element at a time, so the whole tree is never held in memory
+        opener = gzip.open if path_to_xml.endswith('.gz') else open
+
+        with opener(path_to_xml, 'rb') as titles_file:
+            root = None
+
+            for event, element in et.iterparse(titles_file, events=('start', 'end')):
+                if root is None:
+                    root = element
+
+                if event != 'end' or element.tag != 'anime':
+                    continue
+
+                aid = element.get('aid')
+                main = None
+                english = None
+                synonyms = {}
+
+                for title in element.iter('title'):
+                    title_type = title.get('type')
+                    language = title.get(XML_LANG)
+
+                    if main is None and title_type == 'main':
+                        main = title.text
+                    if english is None and title_type == 'official' and language == 'en':
+                        english = title.text
+                    if language in SYNONYM_LANGUAGES and title.text:
+                        synonyms[title.text] = None
+
+                yield {'id': aid,
+                       'url': 'http://anidb.net/perl-bin/animedb.pl?show=anime&aid=' + aid,
+                       'main': main,
+                       'english': english,
+                       'synonyms': list(synonyms)}
+
+                root.clear()
 
     @staticmethod
     def contains_search_term(synonyms, search_term):
@@ -0,0 +1,215 @@
+import json
+import sqlite3
+import threading
+
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage
+from tinydb.middlewares import CachingMiddleware
+
+from ..errors import AcerolaError
+from ..title_index import TitleIndex
+
+SQLITE_TIMEOUT = 30
+SQLITE_MAX_VARIABLES = 900
+NGRAM_SIZE = 3
+SCHEMA_VERSION = 1
+
+
+class TinyDBTitleStore:
+    def __init__(self, path_to_database):
+        self.titles_db = TinyDB(path_to_database, storage=CachingMiddleware(JSONStorage))
+        self.lock = threading.Lock()
+
+        documents = self.titles_db.all()
+        self.doc_ids = {document['id']: document.doc_id for document in documents}
+        self.index = TitleIndex(documents)
+
+    def search(self, search_term):
+        return self.index.search(search_term)
+
+    def search_many(self, search_terms):
+        return self.index.search_many(search_terms)
+
+    def get(self, id):
+        return self.index.get(id)
+
+    def get_many(self, ids):
+        index = self.index
+        return {id: index.get(id) for id in ids if id in index}
+
+    def records(self):
+        return self.index.records()
+
+    def apply_diff(self, added, removed, changed):
+        # readers keep using the old index until the patched copy is swapped in
+        index = self.index.copy()
+        for aid in removed:
+            index.remove(aid)
+        for title in changed + added:
+            index.add(title)
+
+        with self.lock:
+            if removed:
+                self.titles_db.remove(doc_ids=[self.doc_ids.pop(aid) for aid in removed])
+
+            for title in changed:
+                self.titles_db.update(title, doc_ids=[self.doc_ids[title['id']]])
+
+            if added:
+                doc_ids = self.titles_db.insert_multiple(added)
+                self.doc_ids.update(zip((title['id'] for title in added), doc_ids))
+
+            self.titles_db.storage.flush()
+
+        self.index = index
+
+    def close(self):
+        with self.lock:
+            self.titles_db.close()
+
+
+class SQLiteTitleStore:
+    # One connection per thread; WAL lets several bot processes read the file while another one refreshes it.
+    #
+    # The FTS table holds the synonyms lower-cased by Python and matches them case-sensitively, so searches hit exactly
+    # what the TinyDB index (and the old per-record .lower() test) does, outside ASCII too.
+    def __init__(self, path_to_database):
+        self.path_to_database = path_to_database
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        with self.connection as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('CREATE TABLE IF NOT EXISTS titles ('
+                               'aid TEXT NOT NULL UNIQUE, url TEXT, main TEXT, english TEXT, synonyms TEXT NOT NULL)')
+
+            if connection.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                self.rebuild_fts(connection)
+                connection.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+
+    # Files from before the lower-cased FTS table get it rebuilt from the titles table
+    @staticmethod
+    def rebuild_fts(connection):
+        connection.execute('DROP TABLE IF EXISTS titles_fts')
+        connection.execute('CREATE VIRTUAL TABLE titles_fts USING fts5(synonyms, tokenize="trigram case_sensitive 1")')
+
+        rows = connection.execute('SELECT rowid, synonyms FROM titles').fetchall()
+        connection.executemany('INSERT INTO titles_fts (rowid, synonyms) VALUES (?, ?)',
+                               ((rowid, SQLiteTitleStore.fts_text(json.loads(synonyms))) for rowid, synonyms in rows))
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            # only ever used by this thread, but close() shuts every thread's connection down
+            connection = sqlite3.connect(self.path_to_database, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+
+            with self._connections_lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def search(self, search_term):
+        term = search_term.lower()
+
+        if len(term) >= NGRAM_SIZE:
+            # a quoted phrase against the trigram tokenizer is a substring match
+            rows = self.connection.execute('SELECT t.aid, t.url, t.main, t.english, t.synonyms '
+                                           'FROM titles_fts JOIN titles t ON t.rowid = titles_fts.rowid '
+                                           'WHERE titles_fts MATCH ? ORDER BY t.rowid',
+                                           ('"' + term.replace('"', '""') + '"',))
+            return [self.to_record(row) for row in rows]
+
+        rows = self.connection.execute('SELECT t.aid, t.url, t.main, t.english, t.synonyms '
+                                       'FROM titles_fts JOIN titles t ON t.rowid = titles_fts.rowid '
+                                       'WHERE instr(titles_fts.synonyms, ?) > 0 ORDER BY t.rowid', (term,))
+
+        # instr finds '' in a record without synonyms, which the title test doesn't
+        records = (self.to_record(row) for row in rows)
+        return [record for record in records if any(term in synonym.lower() for synonym in record['synonyms'])]
+
+    # All the lookups share one read transaction, so they see the same snapshot even mid-refresh
+    def search_many(self, search_terms):
+        with self.connection:
+            self.connection.execute('BEGIN')
+            return {search_term: self.search(search_term) for search_term in search_terms}
+
+    def get(self, id):
+        row = self.connection.execute('SELECT aid, url, main, english, synonyms FROM titles WHERE aid = ?',
+                                      (id,)).fetchone()
+        return self.to_record(row) if row else None
+
+    def get_many(self, ids):
+        ids = list(set(ids))
+        records = {}
+
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            rows = self.connection.execute('SELECT aid, url, main, english, synonyms FROM titles '
+                                           'WHERE aid IN (' + ', '.join('?' * len(chunk)) + ')', chunk)
+            records.update((row[0], self.to_record(row)) for row in rows)
+
+        return records
+
+    def records(self):
+        rows = self.connection.execute('SELECT aid, url, main, english, synonyms FROM titles ORDER BY rowid')
+        return [self.to_record(row) for row in rows]
+
+    # The diff was worked out from records() outside this transaction, so another process sharing the file may have
+    # applied the same refresh in between. Every step is written to hold whatever state it finds the row in: deletes of
+    # missing rows do nothing and added/changed titles are upserted.
+    def apply_diff(self, added, removed, changed):
+        with self.connection as connection:
+            connection.execute('BEGIN IMMEDIATE')
+
+            for aid in removed:
+                connection.execute('DELETE FROM titles_fts WHERE rowid = (SELECT rowid FROM titles WHERE aid = ?)', (aid,))
+                connection.execute('DELETE FROM titles WHERE aid = ?', (aid,))
+
+            for title in changed + added:
+                self.upsert(connection, title)
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+
+        for connection in connections:
+            connection.close()
+
+    @staticmethod
+    def upsert(connection, title):
+        connection.execute('INSERT INTO titles (aid, url, main, english, synonyms) VALUES (?, ?, ?, ?, ?) '
+                           'ON CONFLICT(aid) DO UPDATE SET url = excluded.url, main = excluded.main, '
+                           'english = excluded.english, synonyms = excluded.synonyms',
+                           (title['id'], title['url'], title['main'], title['english'],
+                            json.dumps(title['synonyms'], ensure_ascii=False)))
+
+        rowid = connection.execute('SELECT rowid FROM titles WHERE aid = ?', (title['id'],)).fetchone()[0]
+        connection.execute('DELETE FROM titles_fts WHERE rowid = ?', (rowid,))
+        connection.execute('INSERT INTO titles_fts (rowid, synonyms) VALUES (?, ?)',
+                           (rowid, SQLiteTitleStore.fts_text(title['synonyms'])))
+
+    @staticmethod
+    def to_record(row):
+        return {'id': row[0], 'url': row[1], 'main': row[2], 'english': row[3], 'synonyms': json.loads(row[4])}
+
+    @staticmethod
+    def fts_text(synonyms):
+        return '\n'.join(synonym.lower() for synonym in synonyms)
+
+
+STORAGE_BACKENDS = {'tinydb': TinyDBTitleStore,
+                    'sqlite': SQLiteTitleStore}
+
+
+def create_title_store(backend, path_to_database):
+    if backend.lower() not in STORAGE_BACKENDS:
+        raise AcerolaError('Unknown AniDB storage backend: ' + backend)
+
+    return STORAGE_BACKENDS[backend.lower()](path_to_database)
@@ -7,11 +7,14 @@ from ..enums import Type, Status, DataSource, SeriesSource
 from ..util import get_status, get_type, get_series_source
 
 from ..response_types import Anime, Manga, LightNovel
+from ..session import PooledSession
 
 AUTH_URL = 'https://anilist.co/api/auth/access_token'
 BASE_URL = 'https://anilist.co/api/'
 ANIME_ENDPOINT = 'anime/search/'
 MANGA_ENDPOINT = 'manga/search/'
+ANIME_BY_ID = 'anime/'
+MANGA_BY_ID = 'manga/'
 
 TYPE_MAPPING = (['TV', Type.TV],
                 ['TV Short', Type.TV],
@@ -45,6 +48,7 @@ SERIES_SOURCE_MAPPING = (['Original', SeriesSource.ORIGINAL],
 
 class Anilist:
     source_type = DataSource.ANILIST
+    empty_search_raises = True
 
     def __init__(self, config):
         self.client_id = config['ClientId']
@@ -53,7 +57,7 @@ class Anilist:
 
         self.logger = logging.getLogger('AcerolaLogger')
 
-        self.session = requests.Session()
+        self.session = PooledSession.from_config(config, Anilist.source_type)
         self.access_token = None
 
     def refresh_access_token(self):
@@ -67,10 +71,10 @@ class Anilist:
             raise DataSourceTimeoutError(Anilist.source_type)
         except requests.exceptions.RequestException:
             raise DataSourceUnavailableError(Anilist.source_type)
+        except AcerolaError:
+            raise
         except Exception as e:
             raise AcerolaError(e)
-        finally:
-            self.session.close()
 
     # todo logging decorator?
     @retry(retry=retry_if_exception_type(AccessTokenExpiredError), stop=stop_after_attempt(2))
@@ -82,11 +86,14 @@ class Anilist:
             if response.status_code == 401:
                 raise AccessTokenExpiredError(Anilist.source_type)
 
+            if response.status_code == 404:
+                raise NoResultsFound(Anilist.source_type, search_term)
+
             response.raise_for_status()
 
             try:
                 error_message = response.json()['error']['messages']
-            except TypeError:
+            except (TypeError, KeyError):
                 error_message = None
 
             if error_message and 'No Results.' in error_message:
@@ -107,10 +114,13 @@ class Anilist:
             raise DataSourceTimeoutError(Anilist.source_type)
         except requests.exceptions.RequestException:
             raise DataSourceUnavailableError(Anilist.source_type)
+        except AcerolaError:
+            raise
         except Exception as e:
             raise AcerolaError(e)
-        finally:
-            self.session.close()
+
+    def close(self):
+        self.session.close()
 
     def search_anime(self, search_term):
         return self.anilist_search(ANIME_ENDPOINT, search_term, self.parse_anime)
@@ -121,6 +131,30 @@ class Anilist:
     def search_light_novel(self, search_term):
         return self.anilist_search(MANGA_ENDPOINT, search_term, self.parse_light_novel)
 
+    # One request for both: returns (manga, light_novels), either of which may be empty
+    def search_print(self, search_term):
+        manga, light_novels = self.anilist_search(MANGA_ENDPOINT, search_term, self.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(Anilist.source_type, search_term)
+
+        return manga, light_novels
+
+    # Ids go to the single-entity endpoints, which answer with just that entry. Light novels and manga share ids, so
+    # asking for one as the other is NoResultsFound.
+    def get_anime(self, id):
+        return self.anilist_search(ANIME_BY_ID, str(id), self.single(self.parse_anime))
+
+    def get_manga(self, id):
+        return self.anilist_search(MANGA_BY_ID, str(id), self.single(self.parse_manga))
+
+    def get_light_novel(self, id):
+        return self.anilist_search(MANGA_BY_ID, str(id), self.single(self.parse_light_novel))
+
+    @staticmethod
+    def single(parser):
+        return lambda entry: parser([entry])
+
     @staticmethod
     def parse_anime(results):
         anime_list = []
@@ -145,59 +179,46 @@ class Anilist:
 
         return anime_list
 
+    # Manga and light novels come from the same endpoint, so both are built from one pass over the results
     @staticmethod
-    def parse_manga(results):
+    def parse_print(results):
         manga_list = []
+        ln_list = []
 
         for entry in results:
             try:
-                manga = Manga(id=entry['id'],
-                              url='https://anilist.co/anime/' + str(entry['id']),
-                              title_romaji=entry['title_romaji'],
-                              title_english=entry['title_english'],
-                              title_japanese=entry['title_japanese'],
-                              synonyms=set(entry['synonyms']) if entry['synonyms'] else set(),
-                              genres=set(entry['genres']) if entry['genres'] else set(),
-                              chapter_count=(int(entry['total_chapters']) if int(entry['total_chapters']) > 0 else None),
-                              volume_count=(int(entry['total_volumes']) if int(entry['total_volumes']) > 0 else None),
-                              status=get_status(STATUS_MAPPING, entry['publishing_status']),
-                              type=get_type(TYPE_MAPPING, entry['type']),
-                              description=entry['description'],
-                              nsfw=entry['adult'])
-
-                if manga.type != Type.LIGHT_NOVEL:
-                    manga_list.append(manga)
+                if get_type(TYPE_MAPPING, entry['type']) == Type.LIGHT_NOVEL:
+                    ln_list.append(Anilist.to_print(LightNovel, entry))
+                else:
+                    manga_list.append(Anilist.to_print(Manga, entry))
             except AttributeError:
                 pass
 
-        return manga_list
+        return manga_list, ln_list
 
     @staticmethod
-    def parse_light_novel(results):
-        ln_list = []
+    def parse_manga(results):
+        return Anilist.parse_print(results)[0]
 
-        for entry in results:
-            try:
-                ln = LightNovel(id=entry['id'],
-                                url='https://anilist.co/anime/' + str(entry['id']),
-                                title_romaji=entry['title_romaji'],
-                                title_english=entry['title_english'],
-                                title_japanese=entry['title_japanese'],
-                                synonyms=set(entry['synonyms']) if entry['synonyms'] else set(),
-                                genres=set(entry['genres']) if entry['genres'] else set(),
-                                chapter_count=(int(entry['total_chapters']) if int(entry['total_chapters']) > 0 else None),
-                                volume_count=(int(entry['total_volumes']) if int(entry['total_volumes']) > 0 else None),
-                                status=get_status(STATUS_MAPPING, entry['publishing_status']),
-                                type=get_type(TYPE_MAPPING, entry['type']),
-                                description=entry['description'],
-                                nsfw=entry['adult'])
-
-                if ln.type == Type.LIGHT_NOVEL:
-                    ln_list.append(ln)
-            except AttributeError:
-                pass
+    @staticmethod
+    def parse_light_novel(results):
+        return Anilist.parse_print(results)[1]
 
-        return ln_list
+    @staticmethod
+    def to_print(cls, entry):
+        return cls(id=entry['id'],
+                   url='https://anilist.co/anime/' + str(entry['id']),
+                   title_romaji=entry['title_romaji'],
+                   title_english=entry['title_english'],
+                   title_japanese=entry['title_japanese'],
+                   synonyms=set(entry['synonyms']) if entry['synonyms'] else set(),
+                   genres=set(entry['genres']) if entry['genres'] else set(),
+                   chapter_count=(int(entry['total_chapters']) if int(entry['total_chapters']) > 0 else None),
+                   volume_count=(int(entry['total_volumes']) if int(entry['total_volumes']) > 0 else None),
+                   status=get_status(STATUS_MAPPING, entry['publishing_status']),
+                   type=get_type(TYPE_MAPPING, entry['type']),
+                   description=entry['description'],
+                   nsfw=entry['adult'])
 
     @staticmethod
     def sanitise_search_term(text):
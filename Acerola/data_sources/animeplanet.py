@@ -1,25 +1,39 @@
 import requests
 import logging
 
+from lxml import html
 from pyquery import PyQuery
 
 from ..errors import NoResultsFound, DataSourceTimeoutError, DataSourceUnavailableError, AcerolaError
 from ..enums import DataSource, Type
 
 from ..response_types import Anime, Manga, LightNovel
+from ..util import compile_selector, text_of, attribute_of
+from ..session import PooledSession
 
 BASE_URL = 'http://www.anime-planet.com'
 ANIME_ENDPOINT = '/anime/all?name='
 MANGA_ENDPOINT = '/manga/all?name='
 
+ANIME_DECK = compile_selector('.cardDeck.pure-g.cd-narrow[data-type="anime"]')
+MANGA_DECK = compile_selector('.cardDeck.pure-g.cd-narrow[data-type="manga"]')
+CARDS = compile_selector('.card.pure-1-6')
+CARD_TITLE = compile_selector('h4')
+CARD_LINK = compile_selector('a')
+SERIES_NAME = compile_selector('h1[itemprop="name"]')
+SERIES_URL = compile_selector("meta[property='og:url']")
+LIGHT_NOVEL_TAG = compile_selector('a[href="/manga/tags/light-novel"]')
+ERROR = compile_selector('.error')
+
 
 class AnimePlanet:
     source_type = DataSource.ANIMEPLANET
+    empty_search_raises = True
 
     def __init__(self, config):
         self.timeout = int(config['Timeout'])
         self.logger = logging.getLogger('AcerolaLogger')
-        self.session = requests.Session()
+        self.session = PooledSession.from_config(config, AnimePlanet.source_type)
 
     # todo logging decorator?
     def ap_search(self, endpoint, search_term, parser):
@@ -27,13 +41,12 @@ class AnimePlanet:
             response = self.session.get(BASE_URL + endpoint + search_term, timeout=self.timeout)
             response.raise_for_status()
 
-            xml_response = PyQuery(response.text)
-            error_message = xml_response.find('.error').text().lower()
+            page = self.parse_page(response.text)
 
-            if 'no results' in error_message:
+            if self.no_results(page):
                 raise NoResultsFound(AnimePlanet.source_type, search_term)
 
-            results = parser(xml_response)
+            results = parser(page)
 
             if not results:
                 raise NoResultsFound(AnimePlanet.source_type, search_term)
@@ -45,10 +58,13 @@ class AnimePlanet:
             raise DataSourceTimeoutError(AnimePlanet.source_type)
         except requests.exceptions.RequestException:
             raise DataSourceUnavailableError(AnimePlanet.source_type)
+        except AcerolaError:
+            raise
         except Exception as e:
             raise AcerolaError(e)
-        finally:
-            self.session.close()
+
+    def close(self):
+        self.session.close()
 
     def search_anime(self, search_term):
         return self.ap_search(ANIME_ENDPOINT, search_term, self.parse_anime)
@@ -59,23 +75,50 @@ class AnimePlanet:
     def search_light_novel(self, search_term):
         return self.ap_search(MANGA_ENDPOINT, search_term, self.parse_light_novel)
 
+    # One request for both: returns (manga, light_novels), either of which may be empty
+    def search_print(self, search_term):
+        manga, light_novels = self.ap_search(MANGA_ENDPOINT, search_term, self.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(AnimePlanet.source_type, search_term)
+
+        return manga, light_novels
+
+    @staticmethod
+    def parse_page(text):
+        return html.fromstring(text) if text.strip() else html.Element('html')
+
+    # The parsers take the lxml root from parse_page and visit each card once. They used to take a PyQuery document,
+    # so one of those is still accepted and unwrapped to the root it holds.
+    @staticmethod
+    def to_page(page):
+        if isinstance(page, PyQuery):
+            return page[0] if len(page) else html.Element('html')
+
+        return page
+
+    @staticmethod
+    def no_results(page):
+        return 'no results' in text_of(ERROR(AnimePlanet.to_page(page))).lower()
+
     # TODO Grab genres as well as build a "recommend me a thing" functionality, add synonyms
     @staticmethod
-    def parse_anime(results):
+    def parse_anime(page):
+        page = AnimePlanet.to_page(page)
         anime_list = []
 
         # Have we been taken to the search page or directly to a series?
-        if results.find('.cardDeck.pure-g.cd-narrow[data-type="anime"]'):
-            for entry in results.find('.card.pure-1-6'):
+        if ANIME_DECK(page):
+            for entry in CARDS(page):
                 try:
-                    anime_list.append(Anime(title_english=PyQuery(entry).find('h4').text(),
-                                            url=BASE_URL + PyQuery(entry).find('a').attr('href')))
+                    anime_list.append(Anime(title_english=text_of(CARD_TITLE(entry)),
+                                            url=BASE_URL + attribute_of(CARD_LINK(entry), 'href')))
                 except AttributeError:
                     pass  # todo - logging here
         else:
             try:
-                anime = Anime(title_english=results.find('h1[itemprop="name"]').text(),
-                              url=results.find("meta[property='og:url']").attr('content'))
+                anime = Anime(title_english=text_of(SERIES_NAME(page)),
+                              url=attribute_of(SERIES_URL(page), 'content'))
 
                 if 'anime' in anime.url:
                     anime_list.append(anime)
@@ -84,59 +127,48 @@ class AnimePlanet:
 
         return anime_list
 
+    # Manga and light novels come from the same search page, so both are built from one pass over it
     @staticmethod
-    def parse_manga(results):
+    def parse_print(page):
+        page = AnimePlanet.to_page(page)
         manga_list = []
+        ln_list = []
 
         # Have we been taken to the search page or directly to a series?
-        if results.find('.cardDeck.pure-g.cd-narrow[data-type="manga"]'):
-            for entry in results.find('.card.pure-1-6'):
+        if MANGA_DECK(page):
+            for entry in CARDS(page):
                 try:
-                    manga = Manga(title_english=PyQuery(entry).find('h4').text(),
-                                  url=BASE_URL + PyQuery(entry).find('a').attr('href'))
-
-                    if '<li>Light Novel</li>' not in PyQuery(entry).find('a').attr('title'):
-                        manga_list.append(manga)
+                    links = CARD_LINK(entry)
+                    title = text_of(CARD_TITLE(entry))
+                    url = BASE_URL + attribute_of(links, 'href')
+
+                    if '<li>Light Novel</li>' in attribute_of(links, 'title'):
+                        ln_list.append(LightNovel(title_english=title, url=url,
+                                                  synonyms={text_of(links).replace('(Light Novel)', '').rstrip()}))
+                    else:
+                        manga_list.append(Manga(title_english=title, url=url))
                 except AttributeError:
                     pass  # todo - logging here
         else:
             try:
-                manga = Manga(title_english=results.find('h1[itemprop="name"]').text(),
-                              url=results.find("meta[property='og:url']").attr('content'))
-
-                if not results.find('a[href="/manga/tags/light-novel"]') and '/anime/' not in manga.url:
-                    manga_list.append(manga)
+                title = text_of(SERIES_NAME(page))
+                url = attribute_of(SERIES_URL(page), 'content')
+
+                if '/anime/' not in url:
+                    if LIGHT_NOVEL_TAG(page):
+                        ln_list.append(LightNovel(title_english=title, url=url,
+                                                  synonyms={title.replace('(Light Novel)', '').rstrip()}))
+                    else:
+                        manga_list.append(Manga(title_english=title, url=url))
             except AttributeError:
                 pass  # todo - logging here
 
-        return manga_list
+        return manga_list, ln_list
 
     @staticmethod
-    def parse_light_novel(results):
-        ln_list = []
-
-        # Have we been taken to the search page or directly to a series?
-        if results.find('.cardDeck.pure-g.cd-narrow[data-type="manga"]'):
-            for entry in results.find('.card.pure-1-6'):
-                try:
-                    ln = LightNovel(title_english=PyQuery(entry).find('h4').text(),
-                                    url=BASE_URL + PyQuery(entry).find('a').attr('href'),
-                                    synonyms={PyQuery(entry).find('a').text().replace('(Light Novel)', '').rstrip()})
+    def parse_manga(page):
+        return AnimePlanet.parse_print(page)[0]
 
-                    if '<li>Light Novel</li>' in PyQuery(entry).find('a').attr('title'):
-                        ln_list.append(ln)
-                except AttributeError:
-                    pass  # todo - logging here
-        else:
-            try:
-
-                ln = LightNovel(title_english=results.find('h1[itemprop="name"]').text(),
-                                url=results.find("meta[property='og:url']").attr('content'),
-                                synonyms={results.find('h1[itemprop="name"]').text().replace('(Light Novel)', '').rstrip()})
-
-                if results.find('a[href="/manga/tags/light-novel"]') and '/anime/' not in ln.url:
-                    ln_list.append(ln)
-            except AttributeError:
-                pass  # todo - logging here
-
-        return ln_list
+    @staticmethod
+    def parse_light_novel(page):
+        return AnimePlanet.parse_print(page)[1]
@@ -2,6 +2,7 @@ from ..enums import Type, DataSource
 from ..util import get_type
 from ..response_types import Anime, Manga, LightNovel
 from ..errors import NoResultsFound, DataSourceTimeoutError, DataSourceUnavailableError, AcerolaError
+from ..session import PooledSession
 
 import requests
 import logging
@@ -10,6 +11,8 @@ AUTH_URL = 'https://kitsu.io/api/oauth/'
 BASE_URL = 'https://kitsu.io/api/edge/'
 ANIME_FILTER = 'anime?filter[text]='
 MANGA_FILTER = 'manga?filter[text]='
+ANIME_BY_ID = 'anime/'
+MANGA_BY_ID = 'manga/'
 
 TYPE_MAPPING = (['TV', Type.TV],
                 ['movie', Type.MOVIE],
@@ -28,9 +31,10 @@ TYPE_MAPPING = (['TV', Type.TV],
 # todo add status, genres, etc
 class Kitsu:
     source_type = DataSource.KITSU
+    empty_search_raises = True
 
     def __init__(self, config):
-        self.session = requests.Session()
+        self.session = PooledSession.from_config(config, Kitsu.source_type)
         self.session.headers = {'Accept': 'application/vnd.api+json', 'Content-Type': 'application/vnd.api+json'}
 
         self.logger = logging.getLogger('AcerolaLogger')
@@ -41,6 +45,10 @@ class Kitsu:
     def kitsu_search(self, endpoint, search_term, parser):
         try:
             response = self.session.get(BASE_URL + endpoint + search_term, timeout=int(self.config['Timeout']))
+
+            if response.status_code == 404:
+                raise NoResultsFound(Kitsu.source_type, search_term)
+
             response.raise_for_status()
 
             results = parser(response.json()['data'])
@@ -55,10 +63,13 @@ class Kitsu:
             raise DataSourceTimeoutError(Kitsu.source_type)
         except requests.exceptions.RequestException:
             raise DataSourceUnavailableError(Kitsu.source_type)
+        except AcerolaError:
+            raise
         except Exception as e:
             raise AcerolaError(e)
-        finally:
-            self.session.close()
+
+    def close(self):
+        self.session.close()
 
     def search_anime(self, search_term):
         return self.kitsu_search(ANIME_FILTER, search_term, self.parse_anime)
@@ -69,6 +80,30 @@ class Kitsu:
     def search_light_novel(self, search_term):
         return self.kitsu_search(MANGA_FILTER, search_term, self.parse_light_novel)
 
+    # One request for both: returns (manga, light_novels), either of which may be empty
+    def search_print(self, search_term):
+        manga, light_novels = self.kitsu_search(MANGA_FILTER, search_term, self.parse_print)
+
+        if not manga and not light_novels:
+            raise NoResultsFound(Kitsu.source_type, search_term)
+
+        return manga, light_novels
+
+    # Ids go to the single-entity endpoints, whose data is just that entry. Light novels and manga share ids, so
+    # asking for one as the other is NoResultsFound.
+    def get_anime(self, id):
+        return self.kitsu_search(ANIME_BY_ID, str(id), self.single(self.parse_anime))
+
+    def get_manga(self, id):
+        return self.kitsu_search(MANGA_BY_ID, str(id), self.single(self.parse_manga))
+
+    def get_light_novel(self, id):
+        return self.kitsu_search(MANGA_BY_ID, str(id), self.single(self.parse_light_novel))
+
+    @staticmethod
+    def single(parser):
+        return lambda entry: parser([entry])
+
     @staticmethod
     def parse_anime(results):
         anime_list = []
@@ -90,50 +125,39 @@ class Kitsu:
 
         return anime_list
 
+    # Manga and light novels come from the same endpoint, so both are built from one pass over the results
     @staticmethod
-    def parse_manga(results):
+    def parse_print(results):
         manga_list = []
+        ln_list = []
 
         for entry in results:
             try:
-
-                manga = Manga(id=entry['id'],
-                              url='https://kitsu.io/manga/' + entry['id'],
-                              title_romaji=entry['attributes']['titles']['en_jp'] if 'en_jp' in entry['attributes']['titles'] else None,
-                              title_english=entry['attributes']['titles']['en'] if 'en' in entry['attributes']['titles'] else None,
-                              synonyms=set(entry['attributes']['abbreviatedTitles']) if entry['attributes']['abbreviatedTitles'] else set(),
-                              volume_count=(int(entry['attributes']['volumeCount']) if entry['attributes']['volumeCount'] else None),
-                              chapter_count=(int(entry['attributes']['chapterCount']) if entry['attributes']['chapterCount'] else None),
-                              type=get_type(TYPE_MAPPING, entry['attributes']['mangaType']),
-                              description=entry['attributes']['synopsis'])
-
-                if manga.type != Type.LIGHT_NOVEL:
-                    manga_list.append(manga)
+                if get_type(TYPE_MAPPING, entry['attributes']['mangaType']) == Type.LIGHT_NOVEL:
+                    ln_list.append(Kitsu.to_print(LightNovel, entry))
+                else:
+                    manga_list.append(Kitsu.to_print(Manga, entry))
             except AttributeError:
                 pass
 
-        return manga_list
+        return manga_list, ln_list
 
     @staticmethod
-    def parse_light_novel(results):
-        ln_list = []
-
-        for entry in results:
-            try:
+    def parse_manga(results):
+        return Kitsu.parse_print(results)[0]
 
-                ln = LightNovel(id=entry['id'],
-                                url='https://kitsu.io/manga/' + entry['id'],
-                                title_romaji=entry['attributes']['titles']['en_jp'] if 'en_jp' in entry['attributes']['titles'] else None,
-                                title_english=entry['attributes']['titles']['en'] if 'en' in entry['attributes']['titles'] else None,
-                                synonyms=set(entry['attributes']['abbreviatedTitles']) if entry['attributes']['abbreviatedTitles'] else set(),
-                                volume_count=(int(entry['attributes']['volumeCount']) if entry['attributes']['volumeCount'] else None),
-                                chapter_count=(int(entry['attributes']['chapterCount']) if entry['attributes']['chapterCount'] else None),
-                                type=get_type(TYPE_MAPPING, entry['attributes']['mangaType']),
-                                description=entry['attributes']['synopsis'])
-
-                if ln.type == Type.LIGHT_NOVEL:
-                    ln_list.append(ln)
-            except AttributeError:
-                pass
+    @staticmethod
+    def parse_light_novel(results):
+        return Kitsu.parse_print(results)[1]
 
-        return ln_list
+    @staticmethod
+    def to_print(cls, entry):
+        return cls(id=entry['id'],
+                   url='https://kitsu.io/manga/' + entry['id'],
+                   title_romaji=entry['attributes']['titles']['en_jp'] if 'en_jp' in entry['attributes']['titles'] else None,
+                   title_english=entry['attributes']['titles']['en'] if 'en' in entry['attributes']['titles'] else None,
+                   synonyms=set(entry['attributes']['abbreviatedTitles']) if entry['attributes']['abbreviatedTitles'] else set(),
+                   volume_count=(int(entry['attributes']['volumeCount']) if entry['attributes']['volumeCount'] else None),
+                   chapter_count=(int(entry['attributes']['chapterCount']) if entry['attributes']['chapterCount'] else None),
+                   type=get_type(TYPE_MAPPING, entry['attributes']['mangaType']),
+                   description=entry['attributes']['synopsis'])
@@ -1,13 +1,14 @@
-import xml.etree.cElementTree as et
+import xml.etree.ElementTree as et
 import logging
+import re
 
-from ..errors import ParserError, NoResultsFound
+from ..errors import ParserError, NoResultsFound, RateLimitExceededError, CircuitOpenError
 from ..enums import Type, DataSource, Status
 from ..util import get_status, get_type
 
 from ..response_types import Anime, Manga, LightNovel
+from ..session import PooledSession
 
-import requests
 from traceback import print_exc
 
 BASE_API = 'https://myanimelist.net/api/'
@@ -32,19 +33,50 @@ STATUS_MAPPING = (['Not yet aired', Status.UPCOMING],
                   ['Publishing', Status.ONGOING],
                   ['Finished', Status.FINISHED])
 
-# todo - get by id
+# MAL double-escapes some of its entities and sends HTML ones that aren't valid XML. Both spellings are decoded in one
+# pass, then any '&' that isn't already '&amp;' gets escaped for the XML parser.
+ENTITIES = {'Eacute': 'É',
+            'times': 'x',
+            'rsquo': "'",
+            'lsquo': "'",
+            'hellip': '...',
+            'le': '<',
+            'hearts': '♥',
+            'mdash': '-',
+            'eacute': 'é',
+            'ndash': '-',
+            'Aacute': 'Á',
+            'acute': 'à',
+            'ldquo': '"',
+            'rdquo': '"',
+            'Oslash': 'Ø',
+            'frac12': '½',
+            'infin': '∞',
+            'agrave': 'à',
+            'egrave': 'è',
+            'dagger': '†',
+            'sup2': '²',
+            '#039': "'"}
+
+ENTITY_PATTERN = re.compile(r'&(?:amp;)?(' + '|'.join(map(re.escape, ENTITIES)) + r');')
+BARE_AMPERSAND_PATTERN = re.compile(r'&(?!amp;)')
+
+# todo - get by id, once there is an API with a single-entity endpoint (the XML one only searches)
 
 
 class Mal:
     source_type = DataSource.MAL
 
+    # searches that find nothing return [] rather than raising NoResultsFound
+    empty_search_raises = False
+
     # todo better handling of errors inside "get items" call (include requests.timeout)
     def __init__(self, config):
         self.config = config
 
         self.logger = logging.getLogger('AcerolaLogger')
 
-        self.session = requests.session()
+        self.session = PooledSession.from_config(config, Mal.source_type)
         self.session.headers.update({'Authorization': self.config['Auth'], 'User-Agent': self.config['UserAgent']})
 
     def get_items(self, search_term, endpoint, parser):
@@ -60,12 +92,15 @@ class Mal:
             parsed_results = parser(sanitised_result)
 
             return parsed_results
+        except (RateLimitExceededError, CircuitOpenError):
+            raise
         except Exception as e:
             print(search_term)
             print_exc()
             return []
-        finally:
-            self.session.close()
+
+    def close(self):
+        self.session.close()
 
     # Get normally
     def search_anime(self, search_term):
@@ -77,133 +112,99 @@ class Mal:
     def search_light_novel(self, search_term):
         return self.get_items(search_term, MANGA_ENDPOINT, self.parse_light_novel)
 
+    # One request for both: returns (manga, light_novels)
+    def search_print(self, search_term):
+        return self.get_items(search_term, MANGA_ENDPOINT, self.parse_print) or ([], [])
+
     @staticmethod
     def parse_anime(xml):
-        try:
-            entries = et.fromstring(xml)
-        except et.ParseError:
-            raise ParserError('The XML is busted.')
-
         anime_list = []
 
-        for entry in entries:
+        for fields in Mal.parse_entries(xml):
             try:
-                anime_list.append(Anime(id=int(entry.find('id').text),
-                                        url='http://myanimelist.net/anime/' + str(entry.find('id').text),
-                                        title_english=entry.find('english').text,
-                                        title_romaji=entry.find('title').text,
-                                        synonyms=set(entry.find('synonyms').text.split(";")) if entry.find('synonyms').text else set(),
-                                        episode_count=(int(entry.find('episodes').text)
-                                                       if int(entry.find('episodes').text) > 0 else None)
-                                                       if isinstance(entry.find('episodes').text, int) else None,
-                                        type=get_type(TYPE_MAPPING, entry.find('type').text),
-                                        status=get_status(STATUS_MAPPING, entry.find('status').text),
-                                        description=entry.find('synopsis').text,
-                                        score=float(entry.find('score').text)))
-            except AttributeError as e:
+                anime_list.append(Anime(id=int(fields['id']),
+                                        url='http://myanimelist.net/anime/' + str(fields['id']),
+                                        title_english=fields['english'],
+                                        title_romaji=fields['title'],
+                                        synonyms=set(fields['synonyms'].split(";")) if fields['synonyms'] else set(),
+                                        episode_count=Mal.to_count(fields['episodes']),
+                                        type=get_type(TYPE_MAPPING, fields['type']),
+                                        status=get_status(STATUS_MAPPING, fields['status']),
+                                        description=fields['synopsis'],
+                                        score=float(fields['score'])))
+            except KeyError as e:
                 print(e)
                 # todo - better logging
                 continue
 
         return anime_list
 
+    # Manga and light novels come from the same endpoint, so both are built from one pass over the entries
     @staticmethod
-    def parse_manga(xml):
-        source = Mal.source_type
-
-        try:
-            entries = et.fromstring(xml)
-        except et.ParseError:
-            raise ParserError('The XML is busted.')
-
+    def parse_print(xml):
         manga_list = []
+        ln_list = []
 
-        for entry in entries:
+        for fields in Mal.parse_entries(xml):
             try:
-                manga = Manga(id=entry.find('id').text,
-                              url='http://myanimelist.net/manga/' + str(entry.find('id').text),
-                              title_english=entry.find('english').text,
-                              title_romaji=entry.find('title').text,
-                              synonyms=set(entry.find('synonyms').text.split(";")) if entry.find('synonyms').text else set(),
-                              chapter_count=int(entry.find('chapters').text) if int(entry.find('chapters').text) > 0 else None,
-                              volume_count=int(entry.find('volumes').text) if int(entry.find('volumes').text) > 0 else None,
-                              type=get_type(TYPE_MAPPING, entry.find('type').text),
-                              status=get_status(STATUS_MAPPING, entry.find('status').text),
-                              description=entry.find('synopsis').text,
-                              score=float(entry.find('score').text))
-
-                if manga.type != Type.LIGHT_NOVEL:
-                    manga_list.append(manga)
-
-            except AttributeError as e:
+                if get_type(TYPE_MAPPING, fields['type']) == Type.LIGHT_NOVEL:
+                    ln_list.append(Mal.to_manga(LightNovel, fields))
+                else:
+                    manga_list.append(Mal.to_manga(Manga, fields))
+
+            except KeyError as e:
                 print(e)
                 # todo - better logging
                 continue
 
-        return manga_list
+        return manga_list, ln_list
+
+    @staticmethod
+    def parse_manga(xml):
+        return Mal.parse_print(xml)[0]
 
     @staticmethod
     def parse_light_novel(xml):
+        return Mal.parse_print(xml)[1]
+
+    # Manga and light novels come back from the same endpoint with the same fields
+    @staticmethod
+    def to_manga(cls, fields):
+        return cls(id=fields['id'],
+                   url='http://myanimelist.net/manga/' + str(fields['id']),
+                   title_english=fields['english'],
+                   title_romaji=fields['title'],
+                   synonyms=set(fields['synonyms'].split(";")) if fields['synonyms'] else set(),
+                   chapter_count=Mal.to_count(fields['chapters']),
+                   volume_count=Mal.to_count(fields['volumes']),
+                   type=get_type(TYPE_MAPPING, fields['type']),
+                   status=get_status(STATUS_MAPPING, fields['status']),
+                   description=fields['synopsis'],
+                   score=float(fields['score']))
+
+    # Yields {tag: text} for each entry, reading every child element once
+    @staticmethod
+    def parse_entries(xml):
         try:
             entries = et.fromstring(xml)
         except et.ParseError:
             raise ParserError('The XML is busted.')
 
-        ln_list = []
-
         for entry in entries:
-            try:
-                ln = LightNovel(id=entry.find('id').text,
-                                url='http://myanimelist.net/manga/' + str(entry.find('id').text),
-                                title_english=entry.find('english').text,
-                                title_romaji=entry.find('title').text,
-                                synonyms=set(entry.find('synonyms').text.split(";")) if entry.find('synonyms').text else set(),
-                                chapter_count=int(entry.find('chapters').text) if int(entry.find('chapters').text) > 0 else None,
-                                volume_count=int(entry.find('volumes').text) if int(entry.find('volumes').text) > 0 else None,
-                                type=get_type(TYPE_MAPPING, entry.find('type').text),
-                                status=get_status(STATUS_MAPPING, entry.find('status').text),
-                                description=entry.find('synopsis').text,
-                                score=float(entry.find('score').text))
-
-                if ln.type == Type.LIGHT_NOVEL:
-                    ln_list.append(ln)
-
-            except AttributeError as e:
-                # todo - better logging
-                print(e)
-                continue
+            yield {child.tag: child.text for child in entry}
 
-        return ln_list
+    # MAL uses 0 for unknown counts
+    @staticmethod
+    def to_count(text):
+        count = int(text) if text else 0
+        return count if count > 0 else None
 
+    # '&le;;' (sometimes '&amp;le;;') is how MAL separates synonyms, hence the '<;' at the end
     @staticmethod
     def sanitise_shitty_xml(text):
-        replacements = (['&amp;', '&'],
-                        ['&Eacute;', 'É'],
-                        ['&times;', 'x'],
-                        ['&rsquo;', "'"],
-                        ['&lsquo;', "'"],
-                        ['&hellip;', '...'],
-                        ['&le;', '<'],
-                        ['<;', '; '],
-                        ['&hearts;', '♥'],
-                        ['&mdash;', '-'],
-                        ['&eacute;', 'é'],
-                        ['&ndash;', '-'],
-                        ['&Aacute;', 'Á'],
-                        ['&acute;', 'à'],
-                        ['&ldquo;', '"'],
-                        ['&rdquo;', '"'],
-                        ['&Oslash;', 'Ø'],
-                        ['&frac12;', '½'],
-                        ['&infin;', '∞'],
-                        ['&agrave;', 'à'],
-                        ['&egrave;', 'è'],
-                        ['&dagger;', '†'],
-                        ['&sup2;', '²'],
-                        ['&#039;', "'"],
-                        ['&', '&amp;'])
-
-        for character, replacement in replacements:
-            text = text.replace(character, replacement)
-
-        return text
+        text = ENTITY_PATTERN.sub(Mal.replace_entity, text)
+        return BARE_AMPERSAND_PATTERN.sub('&amp;', text).replace('<;', '; ')
+
+    @staticmethod
+    def replace_entity(match):
+        return ENTITIES[match.group(1)]
@@ -1,22 +1,84 @@
-import requests
 import logging
+import re
+from functools import lru_cache
 
-from pyquery import PyQuery
-from typing import List
+from lxml import html
+from typing import List, Tuple
 
-from ..errors import NoResultsFound
+from ..errors import NoResultsFound, RateLimitExceededError, CircuitOpenError
 from ..response_types import Manga, LightNovel
-from ..enums import DataSource
+from ..enums import DataSource, Type, Status
+from ..util import get_type, compile_selector, text_of, attribute_of
+from ..session import PooledSession
 
 BASE_URL = 'https://mangaupdates.com/series.html'
+DETAIL_CACHE_SIZE = 1024
+
+ROWS = compile_selector('.series_rows_table tr')
+TITLE = compile_selector('.col1')
+LINK = compile_selector('.col1 a')
+DETAIL_CATEGORIES = compile_selector('.sCat')
+
+TYPE_MAPPING = (['Manga', Type.MANGA],
+                ['Manhwa', Type.MANHWA],
+                ['Manhua', Type.MANHUA],
+                ['Novel', Type.LIGHT_NOVEL],
+                ['Doujinshi', Type.DOUJINSHI],
+                ['OEL', Type.OTHER],
+                ['Artbook', Type.OTHER])
+
+STATUS_PATTERNS = ((re.compile(r'\(Complete\)', re.IGNORECASE), Status.FINISHED),
+                   (re.compile(r'\(Ongoing\)', re.IGNORECASE), Status.ONGOING),
+                   (re.compile(r'\(Cancelled\)|\(Discontinued\)', re.IGNORECASE), Status.CANCELLED))
+VOLUME_PATTERN = re.compile(r'(\d+) Volumes?', re.IGNORECASE)
+CHAPTER_PATTERN = re.compile(r'\bc\.(\d+)')
+
+# The fields that only the series page has
+DETAIL_FIELDS = ('status', 'type', 'chapter_count', 'volume_count')
+
+
+class LazyDetails:
+    # Leaves the detail page fields unset and fetches all of them the first time any one is read
+    def __init__(self, load_details, **kwargs):
+        super().__init__(**kwargs)
+        self._load_details = load_details
+
+        for field in DETAIL_FIELDS:
+            delattr(self, field)
+
+    def __getattr__(self, name):
+        if name not in DETAIL_FIELDS:
+            raise AttributeError(name)
+
+        details = self._load_details(self.url)
+        for field in DETAIL_FIELDS:
+            setattr(self, field, details.get(field))
+
+        return details.get(name)
+
+
+class LazyManga(LazyDetails, Manga):
+    pass
+
+
+class LazyLightNovel(LazyDetails, LightNovel):
+    pass
 
 
 class MangaUpdates:
+    # searches that find nothing return [] rather than raising NoResultsFound
+    empty_search_raises = False
+
+    # With LazyHydration on, search results fetch their status, type and counts from the series page when they're
+    # first read. Series pages are cached per URL.
     def __init__(self, config):
         self.source_type = DataSource.MANGAUPDATES
         self.timeout = config['Timeout']
+        self.lazy_hydration = str(config.get('LazyHydration', False)).lower() in ('true', 'yes', '1')
         self.logger = logging.getLogger('AcerolaLogger')
-        self.session = requests.Session()
+        self.session = PooledSession.from_config(config, DataSource.MANGAUPDATES)
+
+        self.fetch_details = lru_cache(maxsize=DETAIL_CACHE_SIZE)(self._fetch_details)
 
     def get_thing(self, search_term, parser) -> List:
         try:
@@ -27,16 +89,33 @@ class MangaUpdates:
             if result.status_code != 200:
                 raise NoResultsFound('Failed to find results for: ' + search_term) # this error message is shit
 
-            parsed_results = parser(PyQuery(result.content))
+            parsed_results = parser(self.parse_page(result.content), self.load_details if self.lazy_hydration else None)
 
             return parsed_results
 
+        except (RateLimitExceededError, CircuitOpenError):
+            raise
         except Exception as e:
             # todo log that shit
             self.logger.error('MU error: ' + str(e))
             return []
-        finally:
-            self.session.close()
+
+    # Failures aren't cached, and leave the fields empty for that result
+    def load_details(self, url):
+        try:
+            return self.fetch_details(url)
+        except Exception as e:
+            self.logger.error('MU error: ' + str(e))
+            return {}
+
+    def _fetch_details(self, url):
+        result = self.session.get(url, timeout=int(self.timeout))
+        result.raise_for_status()
+
+        return self.parse_details(self.parse_page(result.content))
+
+    def close(self):
+        self.session.close()
 
     # The irony is that get_manga and get_light_novel effectively do the same thing - there's no way to tell the difference from the search page :(
     def search_manga(self, search_term) -> List[Manga]:
@@ -45,22 +124,71 @@ class MangaUpdates:
     def search_light_novel(self, search_term) -> List[LightNovel]:
         return self.get_thing(search_term, self.parse_light_novel)
 
+    # One request for both: returns (manga, light_novels)
+    def search_print(self, search_term) -> Tuple[List[Manga], List[LightNovel]]:
+        return self.get_thing(search_term, self.parse_print) or ([], [])
+
+    @staticmethod
+    def parse_page(content):
+        return html.fromstring(content) if content.strip() else html.Element('html')
+
+    # The search page can't tell manga from light novels, so every row goes in both buckets. Header and separator
+    # rows have no series link and are skipped.
     @staticmethod
-    def parse_manga(results) -> List[Manga]:
+    def parse_print(page, load_details=None) -> Tuple[List[Manga], List[LightNovel]]:
         manga_list = []
+        ln_list = []
+
+        for row in ROWS(page):
+            url = attribute_of(LINK(row), 'href')
+            if not url:
+                continue
 
-        for thing in results.find('.series_rows_table tr'):
-            manga_list.append(Manga(title_english=PyQuery(thing).find('.col1').text(),
-                                    url=PyQuery(thing).find('.col1 a').attr('href')))
+            title = text_of(TITLE(row))
 
-        return manga_list
+            if load_details is None:
+                manga_list.append(Manga(title_english=title, url=url))
+                ln_list.append(LightNovel(title_english=title, url=url))
+            else:
+                manga_list.append(LazyManga(load_details, title_english=title, url=url))
+                ln_list.append(LazyLightNovel(load_details, title_english=title, url=url))
+
+        return manga_list, ln_list
 
     @staticmethod
-    def parse_light_novel(results) -> List[LightNovel]:
-        ln_list = []
+    def parse_manga(page, load_details=None) -> List[Manga]:
+        return MangaUpdates.parse_print(page, load_details)[0]
+
+    @staticmethod
+    def parse_light_novel(page, load_details=None) -> List[LightNovel]:
+        return MangaUpdates.parse_print(page, load_details)[1]
+
+    # The series page is a list of .sCat headings, each followed by its .sContent
+    @staticmethod
+    def parse_details(page):
+        sections = {}
+        for category in DETAIL_CATEGORIES(page):
+            content = category.getnext()
+            if content is not None:
+                sections[text_of([category])] = text_of([content])
+
+        details = {}
+
+        if 'Type' in sections:
+            details['type'] = get_type(TYPE_MAPPING, sections['Type'])
+
+        origin = sections.get('Status in Country of Origin', '')
+
+        details['status'] = Status.UNKNOWN
+        for pattern, status in STATUS_PATTERNS:
+            if pattern.search(origin):
+                details['status'] = status
+                break
+
+        volumes = VOLUME_PATTERN.search(origin)
+        details['volume_count'] = int(volumes.group(1)) if volumes else None
 
-        for thing in results.find('.series_rows_table tr'):
-            ln_list.append(LightNovel(title_english=PyQuery(thing).find('.col1').text(),
-                                      url=PyQuery(thing).find('.col1 a').attr('href')))
+        chapters = CHAPTER_PATTERN.search(sections.get('Latest Release(s)', ''))
+        details['chapter_count'] = int(chapters.group(1)) if chapters else None
 
-        return ln_list
+        return details
@@ -44,3 +44,9 @@ class Type(Enum):
     MANHWA = 10,
     MANHUA = 11,
     OTHER = 12
+
+
+class BreakerState(Enum):
+    CLOSED = 1,
+    OPEN = 2,
+    HALF_OPEN = 3
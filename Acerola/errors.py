@@ -49,3 +49,15 @@ class AccessTokenExpiredError(AcerolaError):
         self.error_message = 'The access token for {data_source} has expired.'.format(data_source=data_source)
         super(AcerolaError, self).__init__(self.error_message)
     pass
+
+
+class RateLimitExceededError(AcerolaError):
+    def __init__(self, data_source):
+        self.error_message = '{data_source} is rate limited.'.format(data_source=data_source)
+        super(AcerolaError, self).__init__(self.error_message)
+
+
+class CircuitOpenError(AcerolaError):
+    def __init__(self, data_source):
+        self.error_message = '{data_source} is failing, not sending any more requests to it for now.'.format(data_source=data_source)
+        super(AcerolaError, self).__init__(self.error_message)
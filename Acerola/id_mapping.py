@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import threading
+
+from .enums import DataSource
+
+SQLITE_TIMEOUT = 30
+
+
+# The optional [IdMapping] section sets the Path of the SQLite file (in memory if there isn't one) and a File of known
+# mappings to load at startup
+def create_id_mapping(config):
+    mapping_config = config['IdMapping'] if 'IdMapping' in config else {}
+
+    id_mapping = IdMapping(str(mapping_config.get('Path', ':memory:')))
+
+    if 'File' in mapping_config:
+        id_mapping.load(str(mapping_config['File']))
+
+    return id_mapping
+
+
+# AnimePlanet and MangaUpdates results don't have ids, so they're known by their urls instead
+def series_id(series):
+    return series.id if series.id is not None else series.url
+
+
+class IdMapping:
+    # Which ids on different sources are the same series, kept per series type as groups of (source, id) rows. An id
+    # is only ever in one group and a group only ever has one id per source. Linking ids from two groups merges them,
+    # and a new id for a source replaces the group's old one; if the merged groups each had their own id for some other
+    # source, the most recently linked one is kept and the rest are dropped. Ids are stored and returned as strings.
+    def __init__(self, path=':memory:'):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+
+        with self._lock, self._connection as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS ids ('
+                               'series_type TEXT NOT NULL, source TEXT NOT NULL, id TEXT NOT NULL, '
+                               'series INTEGER NOT NULL, PRIMARY KEY (series_type, source, id))')
+            connection.execute('CREATE INDEX IF NOT EXISTS ids_series ON ids (series)')
+
+    # ids is {DataSource: id}; ids that are None are ignored
+    def link(self, series_type, ids):
+        ids = {source_type: str(id) for source_type, id in ids.items() if id is not None}
+
+        if len(ids) < 2:
+            return
+
+        with self._lock, self._connection as connection:
+            self._link(connection, series_type, ids)
+
+    def related_ids(self, series_type, source_type, id):
+        with self._lock:
+            rows = self._connection.execute('SELECT source, id FROM ids WHERE series = '
+                                            '(SELECT series FROM ids WHERE series_type = ? AND source = ? AND id = ?) '
+                                            'ORDER BY rowid',
+                                            (series_type, source_type.name, str(id))).fetchall()
+
+        return {DataSource[source]: related for source, related in rows if source != source_type.name}
+
+    # Loads a JSON file of {series_type: [{source name: id}]}, e.g. {"anime": [{"MAL": 1, "ANIDB": 23}]}, in a single
+    # transaction. Returns how many entries were linked.
+    def load(self, path):
+        with open(path, encoding='utf-8') as f:
+            mappings = json.load(f)
+
+        loaded = 0
+
+        with self._lock, self._connection as connection:
+            for series_type, entries in mappings.items():
+                for entry in entries:
+                    ids = {DataSource[source]: str(id) for source, id in entry.items() if id is not None}
+
+                    if len(ids) >= 2:
+                        self._link(connection, series_type, ids)
+                        loaded += 1
+
+        return loaded
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(DISTINCT series) FROM ids').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _link(connection, series_type, ids):
+        groups = set()
+        for source_type, id in ids.items():
+            row = connection.execute('SELECT series FROM ids WHERE series_type = ? AND source = ? AND id = ?',
+                                     (series_type, source_type.name, id)).fetchone()
+            if row is not None:
+                groups.add(row[0])
+
+        if groups:
+            series = min(groups)
+
+            for other in groups - {series}:
+                connection.execute('UPDATE ids SET series = ? WHERE series = ?', (series, other))
+        else:
+            series = connection.execute('SELECT COALESCE(MAX(series), 0) + 1 FROM ids').fetchone()[0]
+
+        for source_type, id in ids.items():
+            connection.execute('DELETE FROM ids WHERE series = ? AND source = ?', (series, source_type.name))
+            connection.execute('INSERT OR REPLACE INTO ids (series_type, source, id, series) VALUES (?, ?, ?, ?)',
+                               (series_type, source_type.name, id, series))
+
+        if len(groups) > 1:
+            connection.execute('DELETE FROM ids WHERE series = ? AND rowid NOT IN '
+                               '(SELECT MAX(rowid) FROM ids WHERE series = ? GROUP BY source)', (series, series))
@@ -0,0 +1,91 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .errors import RateLimitExceededError
+
+MAX_WAIT = 10
+RETRY_AFTER = 1
+
+
+def parse_retry_after(value, now=time.time):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return RETRY_AFTER
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now(), 0)
+    except (TypeError, ValueError):
+        return RETRY_AFTER
+
+
+class TokenBucket:
+    # Allows `rate` requests a second with bursts of up to `burst`. Callers over the limit queue for their turn, up to
+    # max_wait seconds, after which they get a RateLimitExceededError. Tokens are allowed to go negative - the deficit
+    # is the queue of callers already promised a slot. While a Retry-After penalty lasts, the last refill time is in the
+    # future and nothing accrues, so callers queued behind it go out one every 1/rate from the end of the penalty.
+    def __init__(self, source_type, rate, burst=1, max_wait=MAX_WAIT, clock=time.monotonic, sleep=time.sleep):
+        self.source_type = source_type
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+
+    # RateLimit (requests a second), Burst and MaxWait in a source's config section; no RateLimit, no limiter
+    @classmethod
+    def from_config(cls, config, source_type):
+        if 'RateLimit' not in config:
+            return None
+
+        return cls(source_type,
+                   rate=float(config['RateLimit']),
+                   burst=int(config.get('Burst', 1)),
+                   max_wait=float(config.get('MaxWait', MAX_WAIT)))
+
+    def acquire(self):
+        wait = self.reserve()
+
+        if wait > 0:
+            self.sleep(wait)
+
+    # Takes a token and returns how long the caller has to wait before using it; async callers sleep on this themselves
+    def reserve(self):
+        with self._lock:
+            now = self._refill()
+
+            self._tokens -= 1
+            wait = max(self._updated - now, 0) + (-self._tokens / self.rate if self._tokens < 0 else 0)
+
+            if wait > self.max_wait:
+                self._tokens += 1
+                raise RateLimitExceededError(self.source_type)
+
+            return wait
+
+    # Called with the server's Retry-After when it answers 429; nobody gets through until that has passed. The bucket is
+    # emptied (keeping any deficit) and stops refilling until one token before the end, so the first slot lands on it.
+    def penalise(self, retry_after):
+        with self._lock:
+            now = self._refill()
+
+            self._tokens = min(self._tokens, 0)
+            self._updated = max(self._updated, now + retry_after - 1 / self.rate)
+
+    def _refill(self):
+        now = self.clock()
+
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+        return now
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+REFRESH_CHECK_INTERVAL = 600
+
+
+class BackgroundRefresher:
+    # Runs refresh(force) on a daemon thread so no request ever pays for it. refresh should return True if it did
+    # any work and is expected to swap its new data in atomically.
+    def __init__(self, refresh, interval=REFRESH_CHECK_INTERVAL, name='AcerolaRefresher'):
+        self.logger = logging.getLogger('AcerolaLogger')
+
+        self._refresh = refresh
+        self.interval = interval
+        self.name = name
+
+        self._run_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._force = False
+        self._thread = None
+
+        self.state = 'idle'
+        self.last_refreshed = None
+        self.last_duration = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def trigger(self):
+        if self._thread is None:
+            threading.Thread(target=self.run, args=(True,), name=self.name, daemon=True).start()
+        else:
+            self._force = True
+            self._wake.set()
+
+    def run(self, force=False):
+        with self._run_lock:
+            with self._status_lock:
+                self.state = 'running'
+            started = time.monotonic()
+
+            try:
+                refreshed = self._refresh(force)
+            except Exception as e:
+                self.logger.exception('{name} failed to refresh'.format(name=self.name))
+
+                with self._status_lock:
+                    self.state = 'failed'
+                    self.last_error = e
+                    self.last_duration = time.monotonic() - started
+                return
+
+            with self._status_lock:
+                self.state = 'idle'
+                if refreshed:
+                    self.last_refreshed = time.time()
+                    self.last_duration = time.monotonic() - started
+                    self.last_error = None
+
+    def status(self):
+        with self._status_lock:
+            return {'state': self.state,
+                    'running_in_background': self._thread is not None,
+                    'last_refreshed': self.last_refreshed,
+                    'last_duration': self.last_duration,
+                    'last_error': self.last_error}
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            force, self._force = self._force, False
+            self.run(force)
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -1,30 +1,59 @@
-class Anime:
-    # todo abstract out titles?
-    def __init__(self, **kwargs):
-        self.id = kwargs.get('id')
-        self.url = kwargs.get('url')
+import zlib
+from enum import Enum
 
-        self.title_romaji = kwargs.get('title_romaji')
-        self.title_english = kwargs.get('title_english')
-        self.title_japanese = kwargs.get('title_japanese')
+from .enums import Status, Type, SeriesSource
+from .util import clean_description
 
-        self.synonyms = kwargs.get('synonyms') or set()
-        self.genres = kwargs.get('genres') or set()
+ENUM_FIELDS = {'status': Status, 'type': Type, 'source': SeriesSource}
 
-        self.episode_count = kwargs.get('episode_count')
+# Descriptions longer than this are kept zlib-compressed and only decoded when read
+COMPRESS_DESCRIPTIONS_OVER = 512
 
-        self.status = kwargs.get('status')
-        self.type = kwargs.get('type')
-        self.description = kwargs.get('description')
-        self.source = kwargs.get('source')
-        self.nsfw = kwargs.get('nsfw')
-        self.score = kwargs.get('score')
+EMPTY = frozenset()
 
-    def __str__(self):
-        return str(self.__dict__)
 
+# Only fields that are set are written out, enums by name and sets as lists, so the result is small and JSON-safe.
+# Fields that haven't been loaded yet (like a lazily hydrated one) are left out rather than loaded.
+def to_dict(series):
+    data = {}
+
+    for field in series.FIELDS:
+        try:
+            value = object.__getattribute__(series, field)
+        except AttributeError:
+            continue
+
+        if value is None or value == EMPTY:
+            continue
+        if isinstance(value, Enum):
+            value = value.name
+        elif isinstance(value, (set, frozenset)):
+            value = list(value)
+
+        data[field] = value
+
+    return data
+
+
+def from_dict(cls, data):
+    kwargs = dict(data)
+
+    for field, enum in ENUM_FIELDS.items():
+        if field in kwargs:
+            kwargs[field] = enum[kwargs[field]]
+
+    return cls(**kwargs)
+
+
+class Series:
+    # The fields every response type has. Instances use __slots__ rather than a __dict__, since caches and AniDB
+    # result lists hold a lot of them; synonyms and genres are frozensets, and all the empty ones are the same object.
+    __slots__ = ('id', 'url', 'title_romaji', 'title_english', 'title_japanese', 'synonyms', 'genres', 'status', 'type',
+                 '_description', 'nsfw', 'score')
+
+    FIELDS = ('id', 'url', 'title_romaji', 'title_english', 'title_japanese', 'synonyms', 'genres', 'status', 'type',
+              'description', 'nsfw', 'score')
 
-class Manga:
     def __init__(self, **kwargs):
         self.id = kwargs.get('id')
         self.url = kwargs.get('url')
@@ -33,11 +62,8 @@ class Manga:
         self.title_english = kwargs.get('title_english')
         self.title_japanese = kwargs.get('title_japanese')
 
-        self.synonyms = kwargs.get('synonyms') or set()
-        self.genres = kwargs.get('genres') or set()
-
-        self.chapter_count = kwargs.get('chapter_count')
-        self.volume_count = kwargs.get('volume_count')
+        self.synonyms = frozenset(kwargs['synonyms']) if kwargs.get('synonyms') else EMPTY
+        self.genres = frozenset(kwargs['genres']) if kwargs.get('genres') else EMPTY
 
         self.status = kwargs.get('status')
         self.type = kwargs.get('type')
@@ -45,30 +71,64 @@ class Manga:
         self.nsfw = kwargs.get('nsfw')
         self.score = kwargs.get('score')
 
+    @property
+    def description(self):
+        description = self._description
+
+        if isinstance(description, bytes):
+            description = zlib.decompress(description).decode('utf-8')
+
+        return clean_description(description)
+
+    @description.setter
+    def description(self, description):
+        if description is not None and len(description) > COMPRESS_DESCRIPTIONS_OVER:
+            description = zlib.compress(description.encode('utf-8'), 1)
+
+        self._description = description
+
+    def to_dict(self):
+        return to_dict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return from_dict(cls, data)
+
     def __str__(self):
-        return str(self.__dict__)
+        return str({field: getattr(self, field) for field in self.FIELDS})
+
 
+class Anime(Series):
+    __slots__ = ('episode_count', 'source')
+
+    FIELDS = Series.FIELDS + __slots__
 
-class LightNovel:
     def __init__(self, **kwargs):
-        self.id = kwargs.get('id')
-        self.url = kwargs.get('url')
+        super().__init__(**kwargs)
+
+        self.episode_count = kwargs.get('episode_count')
+        self.source = kwargs.get('source')
 
-        self.title_romaji = kwargs.get('title_romaji')
-        self.title_english = kwargs.get('title_english')
-        self.title_japanese = kwargs.get('title_japanese')
 
-        self.synonyms = kwargs.get('synonyms') or set()
-        self.genres = kwargs.get('genres') or set()
+class Manga(Series):
+    __slots__ = ('chapter_count', 'volume_count')
+
+    FIELDS = Series.FIELDS + __slots__
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
         self.chapter_count = kwargs.get('chapter_count')
         self.volume_count = kwargs.get('volume_count')
 
-        self.status = kwargs.get('status')
-        self.type = kwargs.get('type')
-        self.description = kwargs.get('description')
-        self.nsfw = kwargs.get('nsfw')
-        self.score = kwargs.get('score')
 
-    def __str__(self):
-        return str(self.__dict__)
+class LightNovel(Series):
+    __slots__ = ('chapter_count', 'volume_count')
+
+    FIELDS = Series.FIELDS + __slots__
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.chapter_count = kwargs.get('chapter_count')
+        self.volume_count = kwargs.get('volume_count')
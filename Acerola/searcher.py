@@ -1,82 +1,469 @@
-from.errors import InvalidDataSourceForSeriesTypeError, FeatureNotImplementedError
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+
+from .errors import InvalidDataSourceForSeriesTypeError, FeatureNotImplementedError, DataSourceTimeoutError, NoResultsFound
+from .cache import ResultCache, NO_RESULTS
+from .id_mapping import series_id
+from .title_matcher import LIMIT
+
+MAX_WORKERS = 8
+SEARCH_ALL_TIMEOUT = 10
+SEARCH_FIRST_DEADLINE = 10
+HEDGE_DELAY = 1
+
+# One of these per source from search_all - exactly one of results and error is set
+SearchResult = namedtuple('SearchResult', ['results', 'error'])
 
 
 class Searcher:
     def __init__(self, type_searcher):
         self._type_searcher = type_searcher
 
-    def search(self, source_type, term):
-        return self._type_searcher.search(source_type, term)
+    def search(self, source_type, term, use_cache=True):
+        return self._type_searcher.search(source_type, term, use_cache)
+
+    def get(self, source_type, id, use_cache=True):
+        return self._type_searcher.get(source_type, id, use_cache)
+
+    def search_ranked(self, source_type, term, limit=LIMIT, use_cache=True):
+        return self._type_searcher.search_ranked(source_type, term, limit, use_cache)
+
+    def invalidate(self, source_type, term=None, id=None):
+        self._type_searcher.invalidate(source_type, term, id)
+
+    def search_all(self, term, sources=None, timeout=SEARCH_ALL_TIMEOUT):
+        return self._type_searcher.search_all(term, sources, timeout)
+
+    def search_first(self, term, preferred=None, deadline=SEARCH_FIRST_DEADLINE, hedge_delay=HEDGE_DELAY):
+        return self._type_searcher.search_first(term, preferred, deadline, hedge_delay)
+
+    def search_many(self, source_type, terms, use_cache=True):
+        return self._type_searcher.search_many(source_type, terms, use_cache)
+
+    def get_many(self, source_type, ids, use_cache=True):
+        return self._type_searcher.get_many(source_type, ids, use_cache)
+
+    def search_print(self, source_type, term, use_cache=True):
+        return self._type_searcher.search_print(source_type, term, use_cache)
+
+    def cross_reference(self, source_type, id, sources=None, use_cache=True):
+        return self._type_searcher.cross_reference(source_type, id, sources, use_cache)
+
+    def related_ids(self, source_type, id):
+        return self._type_searcher.related_ids(source_type, id)
 
-    def get(self, source_type, id):
-        return self._type_searcher.get(source_type, id)
+    def link(self, ids):
+        self._type_searcher.link(ids)
 
 
-class AnimeSearcher:
-    def __init__(self, *sources):
+class TypeSearcher:
+    series_type = None
+    search_function = None
+    get_function = None
+    print_function = None
+    ranked_function = None
+
+    def __init__(self, *sources, executor=None, cache=None, single_flight=None, id_mapping=None):
         self._sources = {source.source_type: source for source in sources}
+        self._executor = executor
+        self._cache = cache
+        self._single_flight = single_flight
+        self._id_mapping = id_mapping
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+        return self._executor
 
     # todo - the exception handling for these classes is too general
-    def search(self, source_type, term):
-        if source_type not in self._sources:
-            raise InvalidDataSourceForSeriesTypeError(source_type)
+    def search(self, source_type, term, use_cache=True):
+        function = self.source_function(source_type, self.search_function)
+        return self.cached(source_type, 'search', term, function, use_cache)
 
-        if 'search_anime' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'search_anime')
+    def get(self, source_type, id, use_cache=True):
+        function = self.source_function(source_type, self.get_function)
+        return self.cached(source_type, 'get', id, function, use_cache)
 
-        return self._sources[source_type].search_anime(term)
+    # Fuzzy title search, best match first, for sources that rank their results (AniDB). Cached apart from the plain
+    # search and per limit, as both return different results for the same term.
+    def search_ranked(self, source_type, term, limit=LIMIT, use_cache=True):
+        if self.ranked_function is None:
+            raise FeatureNotImplementedError(source_type, 'search_ranked')
 
-    def get(self, source_type, id):
-        if source_type not in self._sources:
-            raise InvalidDataSourceForSeriesTypeError(source_type)
+        function = partial(self.source_function(source_type, self.ranked_function), limit=limit)
+        return self.cached(source_type, 'ranked:{}'.format(limit), term, function, use_cache)
 
-        if 'get_anime' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'get_anime')
+    # Manga and light novels share an endpoint on every source, so this fetches and parses once and returns
+    # (manga, light_novels). Both halves are cached under the normal search keys, so a later manga or light novel
+    # search for the same term doesn't go upstream again.
+    def search_print(self, source_type, term, use_cache=True):
+        if self.print_function is None:
+            raise FeatureNotImplementedError(source_type, 'search_print')
 
-        return self._sources[source_type].get_anime(id)
+        function = self.source_function(source_type, self.print_function)
+        keys = self.print_keys(source_type, term)
+        empty_search_raises = self._sources[source_type].empty_search_raises
 
+        if self._cache is not None and use_cache:
+            results = self.cached_print(keys)
+            if all(result is not None for result in results):
+                if all(result is NO_RESULTS for result in results):
+                    raise NoResultsFound(source_type, term)
+                return tuple([] if result is NO_RESULTS else result for result in results)
 
-class MangaSearcher:
-    def __init__(self, *sources):
-        self._sources = {source.source_type: source for source in sources}
+        key = ResultCache.make_key(source_type, 'print', 'search', term)
 
-    def search(self, source_type, term):
-        if source_type not in self._sources:
-            raise InvalidDataSourceForSeriesTypeError(source_type)
+        if self._single_flight is None:
+            return self.load_print(keys, function, term, empty_search_raises)
 
-        if 'search_manga' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'search_manga')
+        return self._single_flight.do(key, self.load_print, keys, function, term, empty_search_raises)
 
-        return self._sources[source_type].search_manga(term)
+    def load_print(self, keys, function, term, empty_search_raises):
+        try:
+            results = function(term)
+        except NoResultsFound:
+            if self._cache is not None:
+                self.store_print_negative(keys)
+            raise
 
-    def get(self, source_type, id):
-        if source_type not in self._sources:
-            raise InvalidDataSourceForSeriesTypeError(source_type)
+        if self._cache is not None:
+            self.store_print(keys, results, empty_search_raises)
 
-        if 'get_manga' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'get_manga')
+        return results
 
-        return self._sources[source_type].get_manga(id)
+    def cached_print(self, keys):
+        return [self._cache.get(key) for key in keys]
 
+    # An empty half is only cached as NoResultsFound for sources whose own search for that type would have raised it;
+    # on the others it stays uncached, so the plain search still returns [] there.
+    def store_print(self, keys, results, empty_search_raises):
+        for key, bucket in zip(keys, results):
+            if bucket:
+                self._cache.put(key, bucket)
+            elif empty_search_raises and any(results):
+                # the other half came back, so this one really is empty rather than a failed request
+                self._cache.put_negative(key)
 
-class LightNovelSearcher:
-    def __init__(self, *sources):
-        self._sources = {source.source_type: source for source in sources}
+    def store_print_negative(self, keys):
+        for key in keys:
+            self._cache.put_negative(key)
 
-    def search(self, source_type, term):
-        if source_type not in self._sources:
-            raise InvalidDataSourceForSeriesTypeError(source_type)
+    @staticmethod
+    def print_keys(source_type, term):
+        return (ResultCache.make_key(source_type, 'manga', 'search', term),
+                ResultCache.make_key(source_type, 'light_novel', 'search', term))
+
+    # One SearchResult per term, in the order given. Terms that share a cache key are only looked up once; sources with
+    # a bulk function (e.g. AniDB's search_anime_many) get all the uncached terms in a single call, the rest are looked
+    # up concurrently on the executor, still going through each source's rate limiter.
+    def search_many(self, source_type, terms, use_cache=True):
+        function = self.source_function(source_type, self.search_function)
+        return self.many(source_type, 'search', terms, function, self.search_function + '_many', use_cache)
+
+    def get_many(self, source_type, ids, use_cache=True):
+        function = self.source_function(source_type, self.get_function)
+        return self.many(source_type, 'get', ids, function, self.get_function + '_many', use_cache)
+
+    def many(self, source_type, operation, terms, function, many_function, use_cache=True):
+        keys = [ResultCache.make_key(source_type, self.series_type, operation, term) for term in terms]
+
+        unique = {}
+        for key, term in zip(keys, terms):
+            unique.setdefault(key, term)
+
+        source = self._sources[source_type]
+
+        if hasattr(source, many_function):
+            results = self.cached_many(source_type, unique, getattr(source, many_function), use_cache)
+        else:
+            futures = {key: self.executor.submit(self.cached, source_type, operation, term, function, use_cache)
+                       for key, term in unique.items()}
+
+            results = {}
+            for key, future in futures.items():
+                error = future.exception()
+                results[key] = SearchResult(None if error else future.result(), error)
+
+        return [results[key] for key in keys]
+
+    def cached_many(self, source_type, terms_by_key, function, use_cache=True):
+        results, missing = self.split_cached(source_type, terms_by_key, use_cache)
+
+        if not missing:
+            return results
+
+        try:
+            found = function(list(missing.values()))
+        except Exception as e:
+            results.update((key, SearchResult(None, e)) for key in missing)
+            return results
+
+        self.load_many(source_type, missing, found, results)
+
+        return results
+
+    # Fills in results from the cache, returning them along with the {key: term} that still need looking up
+    def split_cached(self, source_type, terms_by_key, use_cache=True):
+        results = {}
+        missing = {}
+
+        for key, term in terms_by_key.items():
+            cached = self._cache.get(key) if self._cache is not None and use_cache else None
+
+            if cached is NO_RESULTS:
+                results[key] = SearchResult(None, NoResultsFound(source_type, term))
+            elif cached is not None:
+                results[key] = SearchResult(cached, None)
+            else:
+                missing[key] = term
+
+        return results, missing
+
+    def load_many(self, source_type, missing, found, results):
+        for key, term in missing.items():
+            term_results = found.get(term)
+
+            # get_*_many maps each id to a single series rather than a list
+            if term_results is not None and not isinstance(term_results, list):
+                term_results = [term_results]
+
+            if term_results:
+                if self._cache is not None:
+                    self._cache.put(key, term_results)
+                results[key] = SearchResult(term_results, None)
+            else:
+                if self._cache is not None:
+                    self._cache.put_negative(key)
+                results[key] = SearchResult(None, NoResultsFound(source_type, term))
+
+    def invalidate(self, source_type, term=None, id=None):
+        if self._cache is None:
+            return
+
+        if term is not None:
+            self._cache.invalidate(self._cache.make_key(source_type, self.series_type, 'search', term))
+        if id is not None:
+            self._cache.invalidate(self._cache.make_key(source_type, self.series_type, 'get', id))
 
-        if 'search_light_novel' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'search_light_novel')
+    # use_cache=False skips the lookup but still stores the fresh result
+    def cached(self, source_type, operation, term, function, use_cache=True):
+        key = ResultCache.make_key(source_type, self.series_type, operation, term)
 
-        return self._sources[source_type].search_light_novel(term)
+        if self._cache is not None and use_cache:
+            results = self._cache.get(key)
+            if results is NO_RESULTS:
+                raise NoResultsFound(source_type, term)
+            if results is not None:
+                return results
 
-    def get(self, source_type, id):
+        if self._single_flight is None:
+            return self.load(key, function, term)
+
+        return self._single_flight.do(key, self.load, key, function, term)
+
+    def load(self, key, function, term):
+        try:
+            results = function(term)
+        except NoResultsFound:
+            if self._cache is not None:
+                self._cache.put_negative(key)
+            raise
+
+        if self._cache is not None:
+            self._cache.put(key, results)
+
+        return results
+
+    # Searches every source at once and waits for all of them up to one overall deadline, so latency tracks the
+    # slowest source rather than the sum of them. Sources still running at the deadline get a DataSourceTimeoutError.
+    def search_all(self, term, sources=None, timeout=SEARCH_ALL_TIMEOUT):
+        if sources is None:
+            sources = [source_type for source_type, source in self._sources.items()
+                       if hasattr(source, self.search_function)]
+
+        futures = {self.executor.submit(self.search, source_type, term): source_type for source_type in sources}
+        done, _ = wait(futures, timeout)
+
+        results = {}
+        for future, source_type in futures.items():
+            if future in done:
+                error = future.exception()
+                results[source_type] = SearchResult(None if error else future.result(), error)
+            else:
+                future.cancel()
+                results[source_type] = SearchResult(None, DataSourceTimeoutError(source_type))
+
+        return results
+
+    # Asks the preferred sources one at a time, starting the next one whenever the current ones have been quiet for
+    # hedge_delay (or have all failed), and returns (source_type, results) for the first non-empty answer. Slower
+    # calls are cancelled if they haven't started yet and ignored otherwise.
+    def search_first(self, term, preferred=None, deadline=SEARCH_FIRST_DEADLINE, hedge_delay=HEDGE_DELAY):
+        if preferred is None:
+            preferred = [source_type for source_type, source in self._sources.items()
+                         if hasattr(source, self.search_function)]
+
+        waiting = list(preferred)
+        pending = {}
+        errors = {}
+
+        now = time.monotonic()
+        give_up_at = now + deadline
+        next_hedge_at = now
+
+        try:
+            while now < give_up_at:
+                if waiting and (not pending or now >= next_hedge_at):
+                    source_type = waiting.pop(0)
+                    pending[self.executor.submit(self.search, source_type, term)] = source_type
+                    next_hedge_at = now + hedge_delay
+                    continue
+
+                if not pending:
+                    break
+
+                timeout = give_up_at - now
+                if waiting:
+                    timeout = min(timeout, next_hedge_at - now)
+
+                done, _ = wait(pending, timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    source_type = pending.pop(future)
+                    error = future.exception()
+
+                    if error is None and future.result():
+                        return source_type, future.result()
+
+                    errors[source_type] = error or NoResultsFound(source_type, term)
+
+                now = time.monotonic()
+        finally:
+            for future in pending:
+                future.cancel()
+
+        if pending or waiting:
+            raise DataSourceTimeoutError(list(pending.values())[0] if pending else waiting[0])
+
+        # nobody had anything - report the most preferred source's real failure, if there was one
+        for source_type in preferred:
+            if not isinstance(errors[source_type], NoResultsFound):
+                raise errors[source_type]
+
+        raise NoResultsFound(preferred[0] if preferred else None, term)
+
+    # The ids this series is known by on other sources, from the id mapping alone - no requests are made
+    def related_ids(self, source_type, id):
+        if self._id_mapping is None:
+            return {}
+
+        return self._id_mapping.related_ids(self.series_type, source_type, id)
+
+    # Records that {source_type: id} are all the same series
+    def link(self, ids):
+        if self._id_mapping is not None:
+            self._id_mapping.link(self.series_type, ids)
+
+    # Finds the series with this id on the other sources, returning {source_type: SearchResult}. Ids the mapping
+    # already knows are fetched directly where the source has a get, and picked out of a title search where it
+    # doesn't. Everything else is a title search for the original's titles, and the match is linked in the mapping so
+    # next time it's known.
+    def cross_reference(self, source_type, id, sources=None, use_cache=True):
+        sources, related = self.cross_reference_targets(source_type, id, sources)
+
+        origin = origin_error = None
+        if any(not self.fetches_directly(target, related) for target in sources):
+            try:
+                origin = self.get(source_type, id, use_cache)[0]
+            except Exception as e:
+                origin_error = e
+
+        futures = {target: self.executor.submit(self.find_related, target, related.get(target), source_type, id,
+                                                origin, origin_error, use_cache)
+                   for target in sources}
+
+        results = {}
+        for target, future in futures.items():
+            error = future.exception()
+            results[target] = SearchResult(None if error else future.result(), error)
+
+        return results
+
+    def find_related(self, source_type, known_id, origin_source, origin_id, origin, origin_error, use_cache=True):
+        if known_id is not None and hasattr(self._sources[source_type], self.get_function):
+            return self.get(source_type, known_id, use_cache)
+
+        if origin is None:
+            raise origin_error
+
+        title = origin.title_romaji or origin.title_english
+        return self.match_related(source_type, known_id, origin_source, origin_id, origin,
+                                  self.search(source_type, title, use_cache))
+
+    def cross_reference_targets(self, source_type, id, sources=None):
+        if sources is None:
+            sources = [other for other, source in self._sources.items()
+                       if other != source_type and hasattr(source, self.search_function)]
+
+        return sources, self.related_ids(source_type, id)
+
+    def fetches_directly(self, source_type, related):
+        return source_type in related and hasattr(self._sources[source_type], self.get_function)
+
+    # A known id has to match exactly; otherwise the first result sharing one of the original's main titles is taken
+    # and linked
+    def match_related(self, source_type, known_id, origin_source, origin_id, origin, results):
+        if known_id is not None:
+            matches = [result for result in results if str(series_id(result)) == known_id]
+        else:
+            titles = {title.casefold() for title in (origin.title_romaji, origin.title_english, origin.title_japanese)
+                      if title}
+            matches = [result for result in results if titles & titles_of(result)][:1]
+
+            if matches and self._id_mapping is not None:
+                self._id_mapping.link(self.series_type, {origin_source: origin_id,
+                                                         source_type: series_id(matches[0])})
+
+        if not matches:
+            raise NoResultsFound(source_type, origin.title_romaji or origin.title_english)
+
+        return matches
+
+    def source_function(self, source_type, function):
         if source_type not in self._sources:
             raise InvalidDataSourceForSeriesTypeError(source_type)
 
-        if 'get_light_novel' not in dir(self._sources[source_type]):
-            raise FeatureNotImplementedError(source_type, 'get_light_novel')
+        if not hasattr(self._sources[source_type], function):
+            raise FeatureNotImplementedError(source_type, function)
+
+        return getattr(self._sources[source_type], function)
+
+
+def titles_of(series):
+    titles = (series.title_romaji, series.title_english, series.title_japanese) + tuple(series.synonyms)
+    return {title.casefold() for title in titles if title}
+
+
+class AnimeSearcher(TypeSearcher):
+    series_type = 'anime'
+    search_function = 'search_anime'
+    get_function = 'get_anime'
+    ranked_function = 'search_anime_ranked'
+
+
+class MangaSearcher(TypeSearcher):
+    series_type = 'manga'
+    search_function = 'search_manga'
+    get_function = 'get_manga'
+    print_function = 'search_print'
+
 
-        return self._sources[source_type].get_light_novel(id)
+class LightNovelSearcher(TypeSearcher):
+    series_type = 'light_novel'
+    search_function = 'search_light_novel'
+    get_function = 'get_light_novel'
+    print_function = 'search_print'
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import TokenBucket, parse_retry_after
+from .circuitbreaker import CircuitBreaker
+
+POOL_SIZE = 10
+IDLE_TIMEOUT = 60
+
+
+class PooledSession(requests.Session):
+    # A requests session that keeps its keep-alive pool between calls. Pools that have sat idle for longer than
+    # idle_timeout are dropped before the next request, as servers will have closed those sockets by then anyway.
+    # Every request also goes through the source's circuit breaker and rate limiter, if it has them.
+    def __init__(self, pool_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT, rate_limiter=None, circuit_breaker=None,
+                 clock=time.monotonic):
+        super().__init__()
+
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._last_used = None
+        self._retired_connections = 0
+        self._retired_requests = 0
+
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    @classmethod
+    def from_config(cls, config, source_type):
+        return cls(pool_size=int(config.get('PoolSize', POOL_SIZE)),
+                   idle_timeout=float(config.get('IdleTimeout', IDLE_TIMEOUT)),
+                   rate_limiter=TokenBucket.from_config(config, source_type),
+                   circuit_breaker=CircuitBreaker.from_config(config, source_type))
+
+    def request(self, method, url, *args, **kwargs):
+        with self._lock:
+            now = self.clock()
+
+            if self._last_used is not None and now - self._last_used > self.idle_timeout:
+                self._release_pools()
+
+            self._last_used = now
+
+        if self.circuit_breaker is None:
+            return self._limited_request(method, url, *args, **kwargs)
+
+        self.circuit_breaker.before_call()
+
+        try:
+            response = self._limited_request(method, url, *args, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            self.circuit_breaker.record_failure()
+            raise
+        except Exception:
+            self.circuit_breaker.release()
+            raise
+
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+        return response
+
+    def _limited_request(self, method, url, *args, **kwargs):
+        if self.rate_limiter is None:
+            return super().request(method, url, *args, **kwargs)
+
+        self.rate_limiter.acquire()
+        response = super().request(method, url, *args, **kwargs)
+
+        # back off for as long as the server asks, then have one more go - acquire raises if that's too long to wait
+        if response.status_code == 429:
+            self.rate_limiter.penalise(parse_retry_after(response.headers.get('Retry-After')))
+            self.rate_limiter.acquire()
+            response = super().request(method, url, *args, **kwargs)
+
+        return response
+
+    # Every new connection is a fresh TCP (and TLS) handshake; every other request went over a reused one
+    def stats(self):
+        with self._lock:
+            connections, requests_sent = self._retired_connections, self._retired_requests
+
+            for pool in self._pools():
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+
+        return {'handshakes': connections,
+                'requests': requests_sent,
+                'reused': requests_sent - connections}
+
+    def close(self):
+        with self._lock:
+            self._release_pools()
+
+        super().close()
+
+    def _pools(self):
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    yield pool
+
+    def _release_pools(self):
+        for pool in self._pools():
+            self._retired_connections += pool.num_connections
+            self._retired_requests += pool.num_requests
+
+        for adapter in set(self.adapters.values()):
+            adapter.poolmanager.clear()
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution of the function, and all of them get its result or its
+    # exception. Only calls that overlap are merged - nothing is remembered once the leader returns.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+        self.coalesced = 0
+
+    def do(self, key, function, *args):
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = function(*args)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    # The asyncio counterpart of SingleFlight; only safe to use from a single event loop
+    def __init__(self):
+        self._calls = {}
+
+        self.coalesced = 0
+
+    async def do(self, key, function, *args):
+        future = self._calls.get(key)
+
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        # shielded, so one caller being cancelled doesn't cancel the lookup for everyone else
+        future = asyncio.ensure_future(function(*args))
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        self._calls[key] = future
+
+        return await asyncio.shield(future)
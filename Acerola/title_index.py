@@ -0,0 +1,144 @@
+import re
+from collections import defaultdict
+
+TOKEN_PATTERN = re.compile(r'\w+')
+NGRAM_SIZE = 3
+
+
+# Lower-cased rather than casefolded, so matches are exactly those of AniDB.contains_search_term
+def lower_titles(record):
+    return tuple(title.lower() for title in record['synonyms'])
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class TitleIndex:
+    # In-memory postings over AniDB title records, keyed by aid. Results come back in insertion (table) order.
+
+    def __init__(self, records=()):
+        self._records = {}
+        self._titles = {}
+        self._positions = {}
+        self._tokens = defaultdict(set)
+        self._ngrams = defaultdict(set)
+        self._next_position = 0
+
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, aid):
+        return aid in self._records
+
+    def copy(self):
+        index = TitleIndex()
+        index._records = dict(self._records)
+        index._titles = dict(self._titles)
+        index._positions = dict(self._positions)
+        index._tokens = defaultdict(set, ((token, set(posting)) for token, posting in self._tokens.items()))
+        index._ngrams = defaultdict(set, ((gram, set(posting)) for gram, posting in self._ngrams.items()))
+        index._next_position = self._next_position
+
+        return index
+
+    def add(self, record):
+        aid = record['id']
+
+        if aid in self._records:
+            self.remove(aid)
+
+        titles = lower_titles(record)
+
+        self._records[aid] = record
+        self._titles[aid] = titles
+        self._positions[aid] = self._next_position
+        self._next_position += 1
+
+        for title in titles:
+            for token in TOKEN_PATTERN.findall(title):
+                self._tokens[token].add(aid)
+            for gram in ngrams(title):
+                self._ngrams[gram].add(aid)
+
+    def remove(self, aid):
+        if aid not in self._records:
+            return
+
+        for title in self._titles[aid]:
+            for token in TOKEN_PATTERN.findall(title):
+                self._discard(self._tokens, token, aid)
+            for gram in ngrams(title):
+                self._discard(self._ngrams, gram, aid)
+
+        del self._records[aid]
+        del self._titles[aid]
+        del self._positions[aid]
+
+    def get(self, aid):
+        return self._records.get(aid)
+
+    def records(self):
+        return list(self._records.values())
+
+    def search(self, search_term):
+        term = search_term.lower()
+
+        candidates = self._candidates(term)
+        matches = [aid for aid in candidates if any(term in title for title in self._titles[aid])]
+        matches.sort(key=self._positions.__getitem__)
+
+        return [self._records[aid] for aid in matches]
+
+    # Same as calling search for each term, but every candidate record is checked once against all the terms that
+    # could match it. Returns {term: records}.
+    def search_many(self, search_terms):
+        folded = {search_term: search_term.lower() for search_term in search_terms}
+
+        terms_by_aid = defaultdict(set)
+        for term in set(folded.values()):
+            for aid in self._candidates(term):
+                terms_by_aid[aid].add(term)
+
+        matches = defaultdict(list)
+        for aid in sorted(terms_by_aid, key=self._positions.__getitem__):
+            titles = self._titles[aid]
+            for term in terms_by_aid[aid]:
+                if any(term in title for title in titles):
+                    matches[term].append(self._records[aid])
+
+        return {search_term: matches.get(term, []) for search_term, term in folded.items()}
+
+    def _candidates(self, term):
+        if len(term) >= NGRAM_SIZE:
+            postings = sorted((self._ngrams.get(gram, ()) for gram in ngrams(term)), key=len)
+
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+
+            return candidates
+
+        if term and TOKEN_PATTERN.fullmatch(term):
+            # a run of word characters can only ever occur inside a single token
+            candidates = set()
+            for token, posting in self._tokens.items():
+                if term in token:
+                    candidates |= posting
+
+            return candidates
+
+        return self._records.keys()
+
+    @staticmethod
+    def _discard(postings, key, aid):
+        posting = postings.get(key)
+        if posting is not None:
+            posting.discard(aid)
+            if not posting:
+                del postings[key]
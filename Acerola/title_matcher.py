@@ -0,0 +1,113 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from itertools import chain
+from operator import itemgetter
+
+PUNCTUATION_PATTERN = re.compile(r'[\W_]+')
+LIMIT = 10
+MIN_SIMILARITY = 0.3
+
+
+# NFKC folds full-width and compatibility forms, and every run of punctuation becomes one space, so "K-ON!!",
+# "k-on" and "ｋ－ｏｎ" all come out as "k on"
+def normalise_title(title):
+    return PUNCTUATION_PATTERN.sub(' ', unicodedata.normalize('NFKC', title).casefold()).strip()
+
+
+# Padded so that short titles still have trigrams and the start and end of a title count for more
+def trigrams(text):
+    padded = '  ' + text + ' '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleMatcher:
+    # Ranks AniDB title records by trigram similarity between the normalised query and each of a record's titles -
+    # shared trigrams over all the trigrams in either (Jaccard, as pg_trgm does) - so typos still match and the closest
+    # titles come first. Candidates come from an inverted trigram index rather than a scan.
+    #
+    # Titles are numbered shortest (fewest trigrams) first, so every posting list is also sorted by title size and the
+    # titles too long or too short to reach min_similarity are cut off each list with a bisect.
+    def __init__(self, records=()):
+        self._records = list(records)
+
+        titles = []
+        for position, record in enumerate(self._records):
+            names = [record['main'], record['english']] + list(record['synonyms'])
+            titles.extend((len(trigrams(title)), position, title)
+                          for title in {normalise_title(name) for name in names if name})
+
+        # the trigrams are made again below rather than kept, so they're never all in memory at once
+        titles.sort(key=itemgetter(0))
+
+        self._title_records = [position for size, position, title in titles]
+        self._title_sizes = [size for size, position, title in titles]
+        self._postings = defaultdict(list)
+
+        for index, (size, position, title) in enumerate(titles):
+            for gram in trigrams(title):
+                self._postings[gram].append(index)
+
+    def __len__(self):
+        return len(self._records)
+
+    # Returns up to limit (similarity, record) pairs, best first, scoring each record by its closest title
+    def search(self, search_term, limit=LIMIT, min_similarity=MIN_SIMILARITY):
+        term = normalise_title(search_term)
+        if not term:
+            return []
+
+        grams = trigrams(term)
+        size = len(grams)
+
+        # A title T with c trigrams in common scores c / (|Q| + |T| - c), which is at most c / |Q|. Reaching
+        # min_similarity s therefore takes c >= s|Q| and s|Q| <= |T| <= |Q| / s.
+        required = max(1, math.ceil(min_similarity * size))
+        first = bisect_left(self._title_sizes, required)
+        last = bisect_right(self._title_sizes, size / min_similarity)
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram, ())
+            postings.append(posting[bisect_left(posting, first):bisect_left(posting, last)])
+        postings.sort(key=len)
+
+        # Any match has one of the rarest |Q| - required + 1 trigrams, so only those add candidates. The more common
+        # ones are only counted for titles that are already candidates.
+        seeds = size - required + 1
+
+        shared = Counter(chain.from_iterable(postings[:seeds]))
+        candidates = set(shared)
+        for posting in postings[seeds:]:
+            shared.update(candidates.intersection(posting))
+
+        # Walks the candidates with the most trigrams in common first, and stops once c / |Q| is below min_similarity
+        # or below the limit-th best record so far, since nothing after that can make the cut
+        strong = sorted(((index, count) for index, count in shared.items() if count >= required),
+                        key=itemgetter(1), reverse=True)
+
+        best = {}
+        floor = min_similarity
+        previous = None
+
+        for index, count in strong:
+            if count != previous:
+                if len(best) >= limit:
+                    floor = max(floor, heapq.nlargest(limit, best.values())[-1])
+                if count / size < floor:
+                    break
+                previous = count
+
+            similarity = count / (size + self._title_sizes[index] - count)
+            position = self._title_records[index]
+
+            if similarity >= min_similarity and similarity > best.get(position, 0):
+                best[position] = similarity
+
+        # ties go to the record that came first in the dump
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: (-item[1], item[0]))
+
+        return [(similarity, self._records[position]) for position, similarity in ranked]
@@ -1,3 +1,7 @@
+from cssselect import HTMLTranslator
+from lxml import etree
+from pyquery.text import extract_text
+
 from Acerola.enums import Type, Status, SeriesSource
 
 
@@ -25,6 +29,20 @@ def get_series_source(mapping, series_source):
     return SeriesSource.UNKNOWN
 
 
+# Scraped pages are only ever queried with a handful of selectors, so they're translated to XPath and compiled once
+def compile_selector(selector):
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix='descendant::'))
+
+
+# Same results as PyQuery's text() and attr(), without wrapping every element first
+def text_of(elements):
+    return ' '.join(extract_text(element) for element in elements)
+
+
+def attribute_of(elements, name):
+    return elements[0].get(name) if elements else None
+
+
 def clean_description(description):
     # todo - this should remove branding from descriptions
     return description
@@ -0,0 +1,60 @@
+# Writes a synthetic anime-titles.xml shaped like AniDB's dump (x-jat main titles, English official titles and a few
+# synonyms per aid), for the AniDB benchmarks to use when no real dump is given.
+import gzip
+import random
+from xml.sax.saxutils import escape
+
+ANIME_COUNT = 14000
+
+SYLLABLES = ('ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho ma mi mu me mo ya yu yo '
+             'ra ri ru re ro wa n ga go da de ba bo').split()
+COMMON_WORDS = ('the of a girl boy world war love magic school dragon sword online knight star night dream story '
+                'legend academy hero demon king princess light dark sky sea fire ice').split()
+SUFFIXES = ('', '', '', '!', ' 2', ': Season 2', ' Movie', '!!', '?', ': The Movie')
+
+# Known titles, so the benchmarks have something real-looking to look up
+KNOWN = (('K-On!', 'K-ON!'), ('K-On!!', None), ('Cowboy Bebop', 'Cowboy Bebop'),
+         ('Cowboy Bebop: Tengoku no Tobira', 'Cowboy Bebop: The Movie'), ('Shingeki no Kyojin', 'Attack on Titan'))
+
+
+def generate(path, anime_count=ANIME_COUNT, seed=1):
+    rng = random.Random(seed)
+
+    consonants, vowels = 'bcdfghjklmnprstvwz', 'aeiou'
+    vocabulary = COMMON_WORDS + [''.join(rng.choice(consonants) + rng.choice(vowels) + rng.choice(consonants)
+                                         for _ in range(rng.randint(1, 3))) for _ in range(4000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def romaji():
+        words = (''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).capitalize()
+                 for _ in range(rng.randint(1, 4)))
+        return ' '.join(words) + rng.choice(SUFFIXES)
+
+    def english():
+        words = (word.capitalize() for word in rng.choices(vocabulary, weights, k=rng.randint(2, 5)))
+        return ' '.join(words) + rng.choice(SUFFIXES)
+
+    def title(language, title_type, text):
+        return '<title xml:lang="{}" type="{}">{}</title>'.format(language, title_type, escape(text))
+
+    opener = gzip.open if path.endswith('.gz') else open
+
+    with opener(path, 'wt', encoding='utf-8') as dump:
+        dump.write('<?xml version="1.0" encoding="UTF-8"?>\n<animetitles>\n')
+
+        for aid in range(1, anime_count + 1):
+            titles = [title('x-jat', 'main', romaji()), title('en', 'official', english()),
+                      title('ja', 'official', romaji())]
+            for _ in range(rng.randint(0, 4)):
+                language = rng.choice(('en', 'x-jat'))
+                titles.append(title(language, 'synonym', english() if language == 'en' else romaji()))
+
+            dump.write('<anime aid="{}">{}</anime>\n'.format(aid, ''.join(titles)))
+
+        for offset, (main, official) in enumerate(KNOWN, start=anime_count + 1):
+            titles = [title('x-jat', 'main', main)] + ([title('en', 'official', official)] if official else [])
+            dump.write('<anime aid="{}">{}</anime>\n'.format(offset, ''.join(titles)))
+
+        dump.write('</animetitles>\n')
+
+    return path
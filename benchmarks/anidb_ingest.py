@@ -0,0 +1,76 @@
+# Compares the streaming AniDB.parse_titles ingest with the BeautifulSoup one it replaced: time, peak traced memory,
+# and that both build the same records. Needs beautifulsoup4, which the library itself doesn't.
+#
+#   python benchmarks/anidb_ingest.py [anime-titles.xml]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+from Acerola.data_sources.anidb import AniDB
+from anidb_dump import generate
+
+
+# The pre-streaming refresh_database parser, minus the TinyDB write. It really did read the XML with the HTML parser.
+def parse_titles_soup(path_to_xml):
+    warnings.simplefilter('ignore', XMLParsedAsHTMLWarning)
+
+    with open(path_to_xml, 'r', encoding='utf-8') as titles_file:
+        soup = BeautifulSoup(titles_file, 'lxml')
+
+        titles = []
+
+        for anime in soup.find_all('anime'):
+            anime_info = {}
+            anime_info['id'] = anime['aid']
+            anime_info['url'] = 'http://anidb.net/perl-bin/animedb.pl?show=anime&aid=' + anime['aid']
+            anime_info['main'] = anime.find('title', {'type': 'main'}).text if anime.find('title', {'type': 'main'}) else None
+            anime_info['english'] = anime.find('title', {'type': 'official', 'xml:lang': 'en'}).text if anime.find('title', {'type': 'official', 'xml:lang': 'en'}) else None
+            anime_info['synonyms'] = set(title.text for title in anime.find_all('title', {'xml:lang': ['en', 'x-jat']}))
+
+            titles.append(anime_info)
+
+    return titles
+
+
+def measure(label, parse):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = parse()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print('{:<28} {:>7.2f} s  peak {:>7.1f} MB  {} records'.format(label, elapsed, peak / 1e6, count))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            path = sys.argv[1]
+        else:
+            path = generate(os.path.join(directory, 'anime-titles.xml'))
+            generate(path + '.gz')
+
+        print('dump: {} ({:.1f} MB)'.format(path, os.path.getsize(path) / 1e6))
+
+        soup = {title['id']: title for title in parse_titles_soup(path)}
+        streamed = {title['id']: dict(title, synonyms=set(title['synonyms'])) for title in AniDB.parse_titles(path)}
+        print('same records:', soup == streamed)
+
+        # the streaming parser is measured without keeping its records, which is how refresh_database diffs them
+        measure('BeautifulSoup', lambda: len(parse_titles_soup(path)))
+        measure('iterparse', lambda: sum(1 for _ in AniDB.parse_titles(path)))
+
+        if os.path.exists(path + '.gz'):
+            measure('iterparse (.gz)', lambda: sum(1 for _ in AniDB.parse_titles(path + '.gz')))
+
+
+if __name__ == '__main__':
+    main()
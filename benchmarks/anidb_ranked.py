@@ -0,0 +1,119 @@
+# Measures AniDB's ranked fuzzy title search: how long the TitleMatcher takes to build and how much it holds, that it
+# ranks exactly as scoring every title would, and per-query latency next to that brute-force scan and the substring
+# search_anime. The matcher build is what refresh_database now does in the background.
+#
+#   python benchmarks/anidb_ranked.py [anime-titles.xml]
+import heapq
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Acerola.data_sources.anidb import AniDB
+from Acerola.title_matcher import TitleMatcher, normalise_title, trigrams, LIMIT, MIN_SIMILARITY
+from anidb_dump import generate
+
+QUERIES = ['k-on', 'ｋ－ｏｎ！', 'cowboy bepop', 'Cowboy Bebop', 'attack on titan', 'dragon sword online',
+           'the legend of hero', 'sword', 'a', 'Magic Academy 2']
+
+
+class BruteForce:
+    # Scores every title of every record the way TitleMatcher does, as the reference for its results
+    def __init__(self, records):
+        self.records = records
+        self.titles = [(position, trigrams(title))
+                       for position, record in enumerate(records)
+                       for title in {normalise_title(name)
+                                     for name in [record['main'], record['english']] + list(record['synonyms'])
+                                     if name}]
+
+    def search(self, search_term, limit=LIMIT, min_similarity=MIN_SIMILARITY):
+        term = normalise_title(search_term)
+        if not term:
+            return []
+
+        grams = trigrams(term)
+        best = {}
+
+        for position, title in self.titles:
+            shared = len(grams & title)
+            similarity = shared / (len(grams) + len(title) - shared)
+
+            if similarity >= min_similarity and similarity > best.get(position, 0):
+                best[position] = similarity
+
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: (-item[1], item[0]))
+        return [(similarity, self.records[position]) for position, similarity in ranked]
+
+
+def queries(records, rng):
+    def typo(title):
+        index = rng.randrange(len(title))
+        return title[:index] + rng.choice('abcdefghijklmnopqrstuvwxyz') + title[index + 1:]
+
+    return (QUERIES + [rng.choice(records)['main'] for _ in range(40)] +
+            [typo(rng.choice(records)['main']) for _ in range(40)])
+
+
+def latency(label, search, terms, repeats):
+    times = []
+    for term in terms:
+        best = min(timed(search, term) for _ in range(repeats))
+        times.append(best * 1e3)
+
+    times.sort()
+    print('{:<22} median {:>7.2f} ms  p95 {:>7.2f} ms  max {:>7.2f} ms'.format(
+        label, statistics.median(times), times[int(len(times) * 0.95)], times[-1]))
+
+
+def timed(search, term):
+    started = time.perf_counter()
+    search(term)
+    return time.perf_counter() - started
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = sys.argv[1] if len(sys.argv) > 1 else generate(os.path.join(directory, 'anime-titles.xml'))
+
+        anidb = AniDB({'path_to_xml': path, 'path_to_database': os.path.join(directory, 'titles.db'),
+                       'auto_refresh_database': False, 'storage': 'sqlite'})
+        anidb.refresh_database(force=True)
+        records = anidb.titles_store.records()
+
+        started = time.perf_counter()
+        TitleMatcher(records)
+        build = time.perf_counter() - started
+
+        # built again to measure it, as tracing slows the build down a lot
+        tracemalloc.start()
+        matcher = TitleMatcher(records)
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print('{} records: matcher built in {:.2f} s, holds {:.1f} MB (peak {:.1f} MB)'.format(
+            len(matcher), build, held / 1e6, peak / 1e6))
+
+        terms = queries(records, random.Random(1))
+        brute_force = BruteForce(records)
+
+        def ranking(results):
+            return [(round(similarity, 9), record['id']) for similarity, record in results]
+
+        same = all(ranking(matcher.search(term)) == ranking(brute_force.search(term)) for term in terms)
+        print('same ranking as brute force on {} queries: {}'.format(len(terms), same))
+
+        latency('brute force', brute_force.search, terms, 1)
+        latency('ranked (TitleMatcher)', matcher.search, terms, 5)
+        latency('substring (store)', anidb.titles_store.search, terms, 3)
+
+        anidb.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Compares AnimePlanet's compiled-XPath lxml parsers with the PyQuery ones they replaced, on the search pages in
+# tests/fixtures/animeplanet: pages a second for parsing the page, checking for "no results" and building the results
+# the way ap_search does, and that both build the same results.
+#
+#   python benchmarks/animeplanet_parse.py [repeats]
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from Acerola.data_sources.animeplanet import AnimePlanet
+from animeplanet_pyquery import PyQueryParser
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures', 'animeplanet')
+REPEATS = 300
+
+SEARCHES = (('anime_search.html', 'parse_anime'), ('manga_search.html', 'parse_print'))
+
+
+def search(parser, text, parse):
+    page = parser.parse_page(text)
+    parser.no_results(page)
+    return getattr(parser, parse)(page)
+
+
+def dicts(results):
+    if isinstance(results, tuple):
+        return tuple(dicts(half) for half in results)
+
+    return [result.to_dict() for result in results]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else REPEATS
+
+    for name, parse in SEARCHES:
+        with open(os.path.join(FIXTURES, name), encoding='utf-8') as fixture:
+            text = fixture.read()
+
+        same = dicts(search(PyQueryParser, text, parse)) == dicts(search(AnimePlanet, text, parse))
+        print('{} ({:.1f} kB, {}): same results: {}'.format(name, len(text) / 1e3, parse, same))
+
+        for label, parser in (('PyQuery', PyQueryParser), ('lxml + XPath', AnimePlanet)):
+            started = time.perf_counter()
+            for _ in range(repeats):
+                search(parser, text, parse)
+            elapsed = time.perf_counter() - started
+
+            print('  {:<14} {:>7.0f} pages/s  {:>6.2f} ms/page'.format(label, repeats / elapsed,
+                                                                     elapsed / repeats * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Compares Mal.sanitise_shitty_xml's single-pass entity decoding with the chain of str.replace calls it replaced, on the
+# MAL search responses in tests/fixtures/mal: documents a second for the sanitiser alone and for sanitise + parse, and
+# that both build the same results.
+#
+#   python benchmarks/mal_entities.py [repeats]
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Acerola.data_sources.mal import Mal
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures', 'mal')
+REPEATS = 2000
+
+REPLACEMENTS = (['&amp;', '&'],
+                ['&Eacute;', 'É'],
+                ['&times;', 'x'],
+                ['&rsquo;', "'"],
+                ['&lsquo;', "'"],
+                ['&hellip;', '...'],
+                ['&le;', '<'],
+                ['<;', '; '],
+                ['&hearts;', '♥'],
+                ['&mdash;', '-'],
+                ['&eacute;', 'é'],
+                ['&ndash;', '-'],
+                ['&Aacute;', 'Á'],
+                ['&acute;', 'à'],
+                ['&ldquo;', '"'],
+                ['&rdquo;', '"'],
+                ['&Oslash;', 'Ø'],
+                ['&frac12;', '½'],
+                ['&infin;', '∞'],
+                ['&agrave;', 'à'],
+                ['&egrave;', 'è'],
+                ['&dagger;', '†'],
+                ['&sup2;', '²'],
+                ['&#039;', "'"],
+                ['&', '&amp;'])
+
+
+# The sanitiser as it was before the entities were decoded in one pass
+def sanitise_replace_chain(text):
+    for character, replacement in REPLACEMENTS:
+        text = text.replace(character, replacement)
+
+    return text
+
+
+def parser_for(path):
+    return Mal.parse_print if os.path.basename(path).startswith('manga') else Mal.parse_anime
+
+
+def dicts(results):
+    if isinstance(results, tuple):
+        return tuple(dicts(half) for half in results)
+
+    return [result.to_dict() for result in results]
+
+
+def measure(label, function, documents, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for document in documents:
+            function(document)
+    elapsed = time.perf_counter() - started
+
+    count = repeats * len(documents)
+    print('{:<32} {:>9.0f} docs/s  {:>7.1f} us/doc'.format(label, count / elapsed, elapsed / count * 1e6))
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else REPEATS
+
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.xml'))):
+        with open(path, encoding='utf-8') as fixture:
+            fixtures.append((path, fixture.read()))
+
+    texts = [text for _, text in fixtures]
+    print('fixtures: {} ({:.1f} kB)'.format(len(fixtures), sum(map(len, texts)) / 1e3))
+
+    for path, text in fixtures:
+        parser = parser_for(path)
+        same = dicts(parser(sanitise_replace_chain(text))) == dicts(parser(Mal.sanitise_shitty_xml(text)))
+        print('{}: same results: {}'.format(os.path.basename(path), same))
+
+    measure('sanitise (replace chain)', sanitise_replace_chain, texts, repeats)
+    measure('sanitise (single pass)', Mal.sanitise_shitty_xml, texts, repeats)
+
+    for label, sanitise in (('replace chain', sanitise_replace_chain), ('single pass', Mal.sanitise_shitty_xml)):
+        measure('sanitise + parse ({})'.format(label), lambda fixture: parser_for(fixture[0])(sanitise(fixture[1])),
+                fixtures, repeats // 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# Compares the memory held per result by the slotted response types with the plain __dict__ classes they replaced, for
+# a bare MangaUpdates-style result, an AniDB-style one and a fully populated Anilist-style one with a long description.
+# Also reports construction time (under tracemalloc, so only comparable between the two), since long descriptions are
+# now compressed on the way in.
+#
+#   python benchmarks/response_memory.py [count]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Acerola import response_types
+from Acerola.enums import Type, Status
+
+COUNT = 20000
+
+DESCRIPTION = ('Several hundred years ago, humans were nearly exterminated by titans. Titans are typically several '
+               'stories tall, seem to have no intelligence, devour human beings and, worst of all, seem to do it for '
+               'the pleasure rather than as a food source. ') * 4
+
+
+# The response types as they were before they were slotted
+class old_types:
+    class Anime:
+        def __init__(self, **kwargs):
+            self.id = kwargs.get('id')
+            self.url = kwargs.get('url')
+
+            self.title_romaji = kwargs.get('title_romaji')
+            self.title_english = kwargs.get('title_english')
+            self.title_japanese = kwargs.get('title_japanese')
+
+            self.synonyms = kwargs.get('synonyms') or set()
+            self.genres = kwargs.get('genres') or set()
+
+            self.episode_count = kwargs.get('episode_count')
+
+            self.status = kwargs.get('status')
+            self.type = kwargs.get('type')
+            self.description = kwargs.get('description')
+            self.source = kwargs.get('source')
+            self.nsfw = kwargs.get('nsfw')
+            self.score = kwargs.get('score')
+
+    class Manga:
+        def __init__(self, **kwargs):
+            self.id = kwargs.get('id')
+            self.url = kwargs.get('url')
+
+            self.title_romaji = kwargs.get('title_romaji')
+            self.title_english = kwargs.get('title_english')
+            self.title_japanese = kwargs.get('title_japanese')
+
+            self.synonyms = kwargs.get('synonyms') or set()
+            self.genres = kwargs.get('genres') or set()
+
+            self.chapter_count = kwargs.get('chapter_count')
+            self.volume_count = kwargs.get('volume_count')
+
+            self.status = kwargs.get('status')
+            self.type = kwargs.get('type')
+            self.description = kwargs.get('description')
+            self.nsfw = kwargs.get('nsfw')
+            self.score = kwargs.get('score')
+
+
+def minimal(types, index):
+    return types.Manga(title_english='Series {}'.format(index),
+                       url='https://www.mangaupdates.com/series.html?id={}'.format(index))
+
+
+def anidb(types, index):
+    return types.Anime(id=str(index), url='http://anidb.net/perl-bin/animedb.pl?show=anime&aid={}'.format(index),
+                       title_english='Title {}'.format(index), title_romaji='Romaji {}'.format(index),
+                       synonyms={'Synonym {}'.format(index), 'Other {}'.format(index)})
+
+
+def full(types, index):
+    return types.Anime(id=index, url='https://anilist.co/anime/{}'.format(index), title_romaji='Romaji {}'.format(index),
+                       title_english='English {}'.format(index), title_japanese='Japanese',
+                       synonyms={'Synonym {}'.format(index)}, genres={'Action', 'Drama'}, episode_count=25,
+                       status=Status.FINISHED, type=Type.TV, description=DESCRIPTION + str(index), score=8.5,
+                       nsfw=False)
+
+
+def measure(types, build, count):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    results = [build(types, index) for index in range(count)]
+
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del results
+    return size / count, elapsed / count
+
+
+def same_fields(build):
+    old, new = build(old_types, 1), build(response_types, 1)
+    return all(getattr(old, field) == getattr(new, field) for field in new.FIELDS)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+
+    for build in (minimal, anidb, full):
+        old_size, old_time = measure(old_types, build, count)
+        new_size, new_time = measure(response_types, build, count)
+
+        print('{:<8} old {:>6.0f} B/result  new {:>6.0f} B/result  ({:.0f}% smaller)  '
+              'build {:.1f} -> {:.1f} us  same fields: {}'.format(build.__name__, old_size, new_size,
+                                                                   100 - 100 * new_size / old_size, old_time * 1e6,
+                                                                   new_time * 1e6, same_fields(build)))
+
+
+if __name__ == '__main__':
+    main()
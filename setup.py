@@ -2,7 +2,7 @@ from distutils.core import setup
 
 setup(
     name='Acerola',
-    packages=['Acerola', 'Acerola.data_sources'],
+    packages=['Acerola', 'Acerola.data_sources', 'Acerola.aio'],
     version='0.1',
     description='An anime searching library',
     author='Roboragi',
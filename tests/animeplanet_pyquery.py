@@ -0,0 +1,86 @@
+from pyquery import PyQuery
+
+from Acerola.response_types import Anime, Manga, LightNovel
+from Acerola.data_sources.animeplanet import BASE_URL
+
+
+# AnimePlanet's PyQuery parsers from before they were moved onto compiled XPath over lxml. Nothing in the library uses
+# them any more; they're kept here, outside the package, as the reference the lxml parsers are tested and benchmarked
+# against, and take the PyQuery document from parse_page rather than an lxml root.
+class PyQueryParser:
+    @staticmethod
+    def parse_page(text):
+        return PyQuery(text)
+
+    @staticmethod
+    def no_results(results):
+        return 'no results' in results.find('.error').text().lower()
+
+    @staticmethod
+    def parse_anime(results):
+        anime_list = []
+
+        # Have we been taken to the search page or directly to a series?
+        if results.find('.cardDeck.pure-g.cd-narrow[data-type="anime"]'):
+            for entry in results.find('.card.pure-1-6'):
+                try:
+                    anime_list.append(Anime(title_english=PyQuery(entry).find('h4').text(),
+                                            url=BASE_URL + PyQuery(entry).find('a').attr('href')))
+                except AttributeError:
+                    pass  # todo - logging here
+        else:
+            try:
+                anime = Anime(title_english=results.find('h1[itemprop="name"]').text(),
+                              url=results.find("meta[property='og:url']").attr('content'))
+
+                if 'anime' in anime.url:
+                    anime_list.append(anime)
+            except AttributeError:
+                pass  # todo - logging here
+
+        return anime_list
+
+    @staticmethod
+    def parse_print(results):
+        manga_list = []
+        ln_list = []
+
+        # Have we been taken to the search page or directly to a series?
+        if results.find('.cardDeck.pure-g.cd-narrow[data-type="manga"]'):
+            for entry in results.find('.card.pure-1-6'):
+                try:
+                    card = PyQuery(entry)
+                    link = card.find('a')
+                    title = card.find('h4').text()
+                    url = BASE_URL + link.attr('href')
+
+                    if '<li>Light Novel</li>' in link.attr('title'):
+                        ln_list.append(LightNovel(title_english=title, url=url,
+                                                  synonyms={link.text().replace('(Light Novel)', '').rstrip()}))
+                    else:
+                        manga_list.append(Manga(title_english=title, url=url))
+                except AttributeError:
+                    pass  # todo - logging here
+        else:
+            try:
+                title = results.find('h1[itemprop="name"]').text()
+                url = results.find("meta[property='og:url']").attr('content')
+
+                if '/anime/' not in url:
+                    if results.find('a[href="/manga/tags/light-novel"]'):
+                        ln_list.append(LightNovel(title_english=title, url=url,
+                                                  synonyms={title.replace('(Light Novel)', '').rstrip()}))
+                    else:
+                        manga_list.append(Manga(title_english=title, url=url))
+            except AttributeError:
+                pass  # todo - logging here
+
+        return manga_list, ln_list
+
+    @staticmethod
+    def parse_manga(results):
+        return PyQueryParser.parse_print(results)[0]
+
+    @staticmethod
+    def parse_light_novel(results):
+        return PyQueryParser.parse_print(results)[1]
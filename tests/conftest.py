@@ -0,0 +1,95 @@
+import http.server
+import threading
+from collections import deque
+
+import pytest
+
+ANIDB_TITLES = '''<?xml version="1.0" encoding="UTF-8"?>
+<animetitles><anime aid="5391"><title xml:lang="x-jat" type="main">K-On!</title>
+<title xml:lang="en" type="official">K-ON!</title></anime></animetitles>'''
+
+
+class StubServer:
+    # A local HTTP server that answers each path from a queue of canned (status, headers, body) responses, the last
+    # one repeating, and records every request path it gets
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            # keep-alive, so connection reuse can be tested
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.respond(self)
+
+            def do_POST(self):
+                stub.respond(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/'.format(self._server.server_port)
+
+    def add(self, path, body=b'', status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        self.routes.setdefault(path, deque()).append((status, headers or {}, body))
+
+    def respond(self, handler):
+        self.requests.append(handler.path)
+
+        path = handler.path.split('?')[0]
+        responses = self.routes.get(path)
+
+        if not responses:
+            status, headers, body = 404, {}, b''
+        elif len(responses) > 1:
+            status, headers, body = responses.popleft()
+        else:
+            status, headers, body = responses[0]
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def hits(self, path):
+        return sum(1 for request in self.requests if request.split('?')[0] == path)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+# A full Acerola config with the AniDB dump and databases in tmp_path and nothing refreshing in the background
+@pytest.fixture
+def acerola_config(tmp_path):
+    titles = tmp_path / 'anime-titles.xml'
+    titles.write_text(ANIDB_TITLES, encoding='utf-8')
+
+    return {'MyAnimeList': {'Timeout': 5, 'Auth': 'Basic x', 'UserAgent': 'tests'},
+            'Anilist': {'Timeout': 5, 'ClientId': 'id', 'ClientSecret': 'secret'},
+            'Kitsu': {'Timeout': 5},
+            'AnimePlanet': {'Timeout': 5},
+            'MangaUpdates': {'Timeout': 5},
+            'AniDB': {'path_to_xml': str(titles), 'path_to_database': str(tmp_path / 'titles.db'),
+                      'auto_refresh_database': False, 'storage': 'sqlite'}}
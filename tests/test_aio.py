@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from Acerola.aio import AsyncAcerola
+from Acerola.aio.data_sources import AsyncMal, AsyncKitsu, AsyncAnilist, AsyncMangaUpdates
+from Acerola.aio.searcher import AsyncAnimeSearcher
+from Acerola.data_sources import mal, kitsu, anilist, mangaupdates
+from Acerola.errors import NoResultsFound
+
+MAL_ANIME = '''<?xml version="1.0" encoding="utf-8"?>
+<anime><entry><id>5680</id><title>K-On!</title><english>K-On!</english><synonyms>Keion!</synonyms>
+<episodes>13</episodes><score>7.89</score><type>TV</type><status>Finished Airing</status>
+<synopsis>Light music club&amp;hellip;</synopsis></entry></anime>'''
+
+KITSU_ANIME = {'data': [{'id': '4240', 'attributes': {'titles': {'en_jp': 'K-On!', 'en': 'K-On!'},
+                                                      'abbreviatedTitles': ['Keion'], 'episodeCount': 13,
+                                                      'showType': 'TV', 'synopsis': 'Light music club',
+                                                      'nsfw': False}}]}
+
+
+def source_config(**extra):
+    return dict({'Timeout': 5}, **extra)
+
+
+@pytest.fixture
+def stub_urls(stub_server, monkeypatch):
+    monkeypatch.setattr(mal, 'BASE_API', stub_server.url + 'mal/')
+    monkeypatch.setattr(kitsu, 'BASE_URL', stub_server.url + 'kitsu/')
+    monkeypatch.setattr(anilist, 'BASE_URL', stub_server.url + 'anilist/')
+    monkeypatch.setattr(anilist, 'AUTH_URL', stub_server.url + 'anilist/auth')
+    monkeypatch.setattr(mangaupdates, 'BASE_URL', stub_server.url + 'mu')
+    return stub_server
+
+
+def run(source, call):
+    async def go():
+        try:
+            return await call(source)
+        finally:
+            await source.close()
+
+    return asyncio.run(go())
+
+
+def test_mal_search(stub_urls):
+    stub_urls.add('/mal/anime/search.xml', MAL_ANIME)
+    source = AsyncMal(source_config(Auth='Basic x', UserAgent='tests'))
+
+    anime, = run(source, lambda s: s.search_anime('k-on'))
+
+    assert (anime.id, anime.title_romaji, anime.episode_count) == (5680, 'K-On!', 13)
+    assert anime.description == 'Light music club...'
+
+
+def test_mal_errors_are_logged_not_printed(stub_urls, caplog, capsys):
+    stub_urls.add('/mal/anime/search.xml', '<anime><entry>')
+    source = AsyncMal(source_config(Auth='Basic x', UserAgent='tests'))
+
+    with caplog.at_level(logging.ERROR, logger='AcerolaLogger'):
+        assert run(source, lambda s: s.search_anime('broken')) == []
+
+    assert 'MAL error for: broken' in caplog.text
+    assert capsys.readouterr().out == ''
+
+
+def test_kitsu_search_and_no_results(stub_urls):
+    stub_urls.add('/kitsu/anime', json.dumps(KITSU_ANIME))
+    source = AsyncKitsu(source_config())
+
+    anime, = run(source, lambda s: s.search_anime('k-on'))
+    assert (anime.id, anime.title_romaji, anime.synonyms) == ('4240', 'K-On!', {'Keion'})
+
+    stub_urls.routes.clear()
+    stub_urls.add('/kitsu/anime', json.dumps({'data': []}))
+
+    with pytest.raises(NoResultsFound):
+        run(AsyncKitsu(source_config()), lambda s: s.search_anime('nothing'))
+
+
+def test_anilist_refreshes_expired_token_once(stub_urls):
+    stub_urls.add('/anilist/auth', json.dumps({'access_token': 'fresh'}))
+    stub_urls.add('/anilist/anime/search/k-on', status=401)
+    stub_urls.add('/anilist/anime/search/k-on', json.dumps([]))
+    source = AsyncAnilist(source_config(ClientId='id', ClientSecret='secret'))
+
+    async def search_twice(s):
+        return await asyncio.gather(s.search_anime('k-on'), s.search_anime('k-on'), return_exceptions=True)
+
+    results = run(source, search_twice)
+
+    assert all(isinstance(result, NoResultsFound) for result in results)
+    assert source.access_token == 'fresh'
+    assert stub_urls.hits('/anilist/auth') == 1
+
+
+def test_mangaupdates_non_200_is_empty(stub_urls):
+    stub_urls.add('/mu', status=503)
+    source = AsyncMangaUpdates(source_config())
+
+    assert run(source, lambda s: s.search_print('berserk')) == ([], [])
+
+
+def test_connections_are_reused(stub_urls):
+    stub_urls.add('/kitsu/anime', json.dumps(KITSU_ANIME))
+    source = AsyncKitsu(source_config())
+
+    async def search_three_times(s):
+        for _ in range(3):
+            await s.search_anime('k-on')
+
+    run(source, search_three_times)
+
+    assert source.stats() == {'handshakes': 1, 'requests': 3, 'reused': 2}
+
+
+def test_refresh_anidb_database(acerola_config):
+    async def go():
+        async with AsyncAcerola(acerola_config) as acerola:
+            status = await acerola.refresh_anidb_database()
+            found = acerola._anidb.search_anime('k-on')
+            return status, found
+
+    status, found = asyncio.run(go())
+
+    assert status['state'] == 'idle'
+    assert status['last_refreshed'] is not None
+    assert status['diff'] == {'added': 1, 'removed': 0, 'changed': 0}
+    assert [anime.id for anime in found] == ['5391']
+
+
+def test_close_closes_the_anidb_store(acerola_config):
+    closed = []
+
+    async def go():
+        acerola = AsyncAcerola(acerola_config)
+        store_close = acerola._anidb.titles_store.close
+        acerola._anidb.titles_store.close = lambda: closed.append(True) or store_close()
+        await acerola.close()
+
+    asyncio.run(go())
+
+    assert closed == [True]
+
+
+def test_search_many_stays_within_the_rate_limiters_queue(stub_urls):
+    stub_urls.add('/kitsu/anime', json.dumps(KITSU_ANIME))
+
+    # 20 lookups at once would queue a second deep at this rate, past the 0.1 s the limiter lets anyone wait
+    source = AsyncKitsu(source_config(RateLimit=50, MaxWait=0.1, PoolSize=2))
+    searcher = AsyncAnimeSearcher(source)
+
+    results = run(source, lambda s: searcher.search_many(s.source_type, ['k-on {}'.format(n) for n in range(20)]))
+
+    assert [result.error for result in results] == [None] * 20
+    assert stub_urls.hits('/kitsu/anime') == 20
@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+
+from Acerola.data_sources import anidb as anidb_module
+from Acerola.data_sources.anidb import AniDB
+from Acerola.errors import NoResultsFound
+
+TITLES = '''<?xml version="1.0" encoding="UTF-8"?>
+<animetitles>
+<anime aid="5391"><title xml:lang="x-jat" type="main">K-On!</title><title xml:lang="en" type="official">K-ON!</title>
+<title xml:lang="ja" type="official">けいおん!</title></anime>
+<anime aid="23"><title xml:lang="x-jat" type="main">Cowboy Bebop</title>
+<title xml:lang="en" type="synonym">Cowboy Bebop TV</title></anime>
+{extra}
+</animetitles>'''
+
+EXTRA = '<anime aid="9541"><title xml:lang="x-jat" type="main">Shingeki no Kyojin</title></anime>'
+
+
+@pytest.fixture(params=['tinydb', 'sqlite'])
+def anidb(request, tmp_path):
+    titles = tmp_path / 'anime-titles.xml'
+    titles.write_text(TITLES.format(extra=''), encoding='utf-8')
+
+    anidb = AniDB({'path_to_xml': str(titles), 'path_to_database': str(tmp_path / 'titles.db'),
+                   'auto_refresh_database': False, 'storage': request.param})
+    anidb.refresh_database(force=True)
+
+    yield anidb
+    anidb.close()
+
+
+def update_dump(anidb, extra):
+    with open(anidb.path_to_xml, 'w', encoding='utf-8') as titles:
+        titles.write(TITLES.format(extra=extra))
+
+
+def test_parse_titles(anidb):
+    records = {record['id']: record for record in AniDB.parse_titles(anidb.path_to_xml)}
+
+    assert records['5391']['main'] == 'K-On!'
+    assert records['5391']['english'] == 'K-ON!'
+    assert sorted(records['5391']['synonyms']) == ['K-ON!', 'K-On!']
+    assert records['23']['english'] is None
+
+
+def test_refresh_diff(anidb):
+    assert anidb.last_refresh_diff == {'added': 2, 'removed': 0, 'changed': 0}
+    assert not anidb.refresh_database()
+
+    update_dump(anidb, EXTRA)
+    assert anidb.refresh_database(force=True)
+    assert anidb.last_refresh_diff == {'added': 1, 'removed': 0, 'changed': 0}
+
+
+def test_search_and_get(anidb):
+    assert [anime.id for anime in anidb.search_anime('bebop')] == ['23']
+    assert anidb.get_anime(5391)[0].title_romaji == 'K-On!'
+
+    with pytest.raises(NoResultsFound):
+        anidb.search_anime('kyojin')
+
+
+def test_ranked_search(anidb):
+    assert [anime.id for anime in anidb.search_anime_ranked('ｋ－ｏｎ')] == ['5391']
+    assert anidb.search_anime_ranked('cowboy bepop')[0].id == '23'
+
+    with pytest.raises(NoResultsFound):
+        anidb.search_anime_ranked('zzzz')
+
+
+def test_refresh_swaps_in_a_new_matcher(anidb, monkeypatch):
+    anidb.search_anime_ranked('k-on')
+    old = anidb._matcher
+
+    update_dump(anidb, EXTRA)
+    anidb.refresh_database(force=True)
+
+    assert anidb._matcher is not old
+    assert len(anidb._matcher) == 3
+
+    # ranked searches after the refresh don't build anything themselves
+    built = []
+    monkeypatch.setattr(anidb_module, 'TitleMatcher', lambda records: built.append(True))
+
+    assert anidb.search_anime_ranked('shingeki no kyojin')[0].id == '9541'
+    assert built == []
+
+
+def test_refresh_keeps_the_old_matcher_until_the_new_one_is_ready(anidb, monkeypatch):
+    anidb.search_anime_ranked('k-on')
+    old = anidb._matcher
+
+    building = threading.Event()
+    release = threading.Event()
+    real_matcher = anidb_module.TitleMatcher
+
+    def slow_matcher(records):
+        building.set()
+        release.wait(5)
+        return real_matcher(records)
+
+    monkeypatch.setattr(anidb_module, 'TitleMatcher', slow_matcher)
+
+    update_dump(anidb, EXTRA)
+    refresh = threading.Thread(target=anidb.refresh_database, args=(True,))
+    refresh.start()
+
+    assert building.wait(5)
+    assert anidb.matcher is old
+    assert anidb.search_anime_ranked('k-on')[0].id == '5391'
+
+    release.set()
+    refresh.join(5)
+
+    assert anidb.search_anime_ranked('shingeki no kyojin')[0].id == '9541'
+
+
+def test_refresh_doesnt_build_an_unused_matcher(anidb):
+    update_dump(anidb, EXTRA)
+    anidb.refresh_database(force=True)
+
+    assert anidb._matcher is None
+
+
+def test_refresh_tolerates_another_process_refreshing_the_same_file(tmp_path):
+    titles = tmp_path / 'anime-titles.xml'
+    titles.write_text(TITLES.format(extra=''), encoding='utf-8')
+
+    config = {'path_to_xml': str(titles), 'path_to_database': str(tmp_path / 'titles.db'),
+              'auto_refresh_database': False, 'storage': 'sqlite'}
+    first, second = AniDB(config), AniDB(config)
+    first.refresh_database(force=True)
+
+    # the second instance applies the same refresh between the first working out its diff and applying it
+    apply_diff = first.titles_store.apply_diff
+
+    def interleaved(added, removed, changed):
+        second.refresh_database(force=True)
+        apply_diff(added, removed, changed)
+
+    first.titles_store.apply_diff = interleaved
+    update_dump(first, EXTRA)
+
+    try:
+        assert first.refresh_database(force=True)
+        assert first.last_refresh_diff == {'added': 1, 'removed': 0, 'changed': 0}
+
+        assert [anime.id for anime in first.search_anime('kyojin')] == ['9541']
+        assert len(first.titles_store.records()) == 3
+    finally:
+        first.close()
+        second.close()
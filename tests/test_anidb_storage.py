@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from Acerola.data_sources.anidb import AniDB
+from Acerola.data_sources.anidb_storage import SQLiteTitleStore, TinyDBTitleStore
+
+TITLES = [{'id': '1', 'url': 'u1', 'main': 'Straße der Helden', 'english': None,
+           'synonyms': ['Straße der Helden', 'Road of Heroes']},
+          {'id': '2', 'url': 'u2', 'main': 'Élan Vital', 'english': 'Elan', 'synonyms': ['Élan Vital', 'elan']},
+          {'id': '3', 'url': 'u3', 'main': 'K-On!', 'english': None, 'synonyms': ['K-On!', 'Keion']},
+          {'id': '4', 'url': 'u4', 'main': 'İstanbul Kaiju', 'english': None, 'synonyms': ['İstanbul Kaiju']},
+          {'id': '5', 'url': 'u5', 'main': None, 'english': None, 'synonyms': []}]
+
+TERMS = ['strasse', 'straße', 'STRASSE', 'é', 'É', 'él', 'ÉLAN', 'elan', 'k-on', 'on', 'o', '', 'i̇s', 'istanbul',
+         '"', 'x']
+
+
+def scan(term):
+    return [title for title in TITLES if AniDB.contains_search_term(title['synonyms'], term)]
+
+
+@pytest.fixture(params=['tinydb', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'tinydb':
+        store = TinyDBTitleStore(str(tmp_path / 'titles.json'))
+    else:
+        store = SQLiteTitleStore(str(tmp_path / 'titles.db'))
+
+    store.apply_diff(TITLES, [], [])
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('term', TERMS)
+def test_search_matches_linear_scan(store, term):
+    assert store.search(term) == scan(term)
+
+
+def test_search_after_update(store):
+    changed = dict(TITLES[0], synonyms=['Ölstraße'])
+    store.apply_diff([], [], [changed])
+
+    assert store.search('ölst') == [changed]
+    assert store.search('helden') == []
+
+
+def test_old_sqlite_files_are_reindexed(tmp_path):
+    path = str(tmp_path / 'titles.db')
+
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE titles ('
+                       'aid TEXT NOT NULL UNIQUE, url TEXT, main TEXT, english TEXT, synonyms TEXT NOT NULL)')
+    connection.execute('CREATE VIRTUAL TABLE titles_fts USING fts5(synonyms, tokenize="trigram")')
+    for title in TITLES:
+        cursor = connection.execute('INSERT INTO titles VALUES (?, ?, ?, ?, ?)',
+                                    (title['id'], title['url'], title['main'], title['english'],
+                                     json.dumps(title['synonyms'])))
+        connection.execute('INSERT INTO titles_fts (rowid, synonyms) VALUES (?, ?)',
+                           (cursor.lastrowid, '\n'.join(title['synonyms'])))
+    connection.commit()
+    connection.close()
+
+    store = SQLiteTitleStore(path)
+    try:
+        assert store.search('ÉLAN') == scan('ÉLAN')
+        assert store.search('straße') == scan('straße')
+    finally:
+        store.close()
+
+
+def test_close_closes_every_threads_connection(tmp_path):
+    store = SQLiteTitleStore(str(tmp_path / 'titles.db'))
+    store.apply_diff(TITLES, [], [])
+
+    connections = []
+
+    def search():
+        store.search('elan')
+        connections.append(store.connection)
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    thread.join()
+
+    store.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+    # and the store still works afterwards, on a fresh connection
+    assert store.search('elan') == scan('elan')
+    store.close()
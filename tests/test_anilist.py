@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from Acerola.aio.data_sources import AsyncAnilist
+from Acerola.aio.searcher import AsyncAnimeSearcher
+from Acerola.cache import ResultCache
+from Acerola.data_sources import anilist
+from Acerola.data_sources.anilist import Anilist
+from Acerola.enums import DataSource, SeriesSource, Status, Type
+from Acerola.errors import NoResultsFound
+from Acerola.searcher import AnimeSearcher
+
+CONFIG = {'Timeout': 5, 'ClientId': 'id', 'ClientSecret': 'secret'}
+
+# The single-entity endpoints answer with the entry itself rather than a list
+ANIME = {'id': 5680, 'title_romaji': 'K-On!', 'title_english': 'K-ON!', 'title_japanese': 'けいおん！',
+         'synonyms': ['Keion'], 'genres': ['Comedy', 'Music'], 'total_episodes': 13,
+         'airing_status': 'finished airing', 'type': 'TV', 'description': 'Light music club', 'source': 'Manga',
+         'adult': False}
+
+MANGA = {'id': 30002, 'title_romaji': 'Berserk', 'title_english': 'Berserk', 'title_japanese': 'ベルセルク',
+         'synonyms': [], 'genres': ['Action'], 'total_chapters': 0, 'total_volumes': 41,
+         'publishing_status': 'publishing', 'type': 'Manga', 'description': 'Guts', 'adult': True}
+
+
+@pytest.fixture
+def stub_urls(stub_server, monkeypatch):
+    monkeypatch.setattr(anilist, 'BASE_URL', stub_server.url + 'anilist/')
+    monkeypatch.setattr(anilist, 'AUTH_URL', stub_server.url + 'anilist/auth')
+    return stub_server
+
+
+def get_sync(function, id):
+    source = Anilist(CONFIG)
+    try:
+        return getattr(source, function)(id)
+    finally:
+        source.close()
+
+
+def get_async(function, id):
+    async def go():
+        source = AsyncAnilist(CONFIG)
+        try:
+            return await getattr(source, function)(id)
+        finally:
+            await source.close()
+
+    return asyncio.run(go())
+
+
+@pytest.fixture(params=[get_sync, get_async], ids=['sync', 'async'])
+def get(request):
+    return request.param
+
+
+def test_get_anime(stub_urls, get):
+    stub_urls.add('/anilist/anime/5680', json.dumps(ANIME))
+
+    anime, = get('get_anime', 5680)
+
+    assert (anime.id, anime.url) == (5680, 'https://anilist.co/anime/5680')
+    assert (anime.title_english, anime.synonyms, anime.genres) == ('K-ON!', {'Keion'}, {'Comedy', 'Music'})
+    assert (anime.episode_count, anime.status, anime.type) == (13, Status.FINISHED, Type.TV)
+    assert (anime.source, anime.nsfw) == (SeriesSource.MANGA, False)
+
+
+def test_get_manga(stub_urls, get):
+    stub_urls.add('/anilist/manga/30002', json.dumps(MANGA))
+
+    manga, = get('get_manga', '30002')
+
+    assert (manga.id, manga.title_japanese, manga.volume_count, manga.chapter_count) == (30002, 'ベルセルク', 41, None)
+    assert (manga.status, manga.type, manga.nsfw) == (Status.ONGOING, Type.MANGA, True)
+
+
+def test_missing_id_is_no_results(stub_urls, get):
+    stub_urls.add('/anilist/anime/1', status=404)
+
+    with pytest.raises(NoResultsFound):
+        get('get_anime', 1)
+
+
+def test_manga_id_asked_for_as_a_light_novel_is_no_results(stub_urls, get):
+    stub_urls.add('/anilist/manga/30002', json.dumps(MANGA))
+
+    with pytest.raises(NoResultsFound):
+        get('get_light_novel', 30002)
+
+
+def test_get_is_cached(stub_urls):
+    stub_urls.add('/anilist/anime/5680', json.dumps(ANIME))
+
+    cache = ResultCache()
+    source = Anilist(CONFIG)
+    searcher = AnimeSearcher(source, cache=cache)
+
+    try:
+        first, second = searcher.get(DataSource.ANILIST, 5680), searcher.get(DataSource.ANILIST, '5680')
+    finally:
+        source.close()
+
+    assert second[0] is first[0]
+    assert stub_urls.hits('/anilist/anime/5680') == 1
+    assert cache.get(ResultCache.make_key(DataSource.ANILIST, 'anime', 'get', 5680))[0] is first[0]
+
+
+def test_async_get_is_cached(stub_urls):
+    stub_urls.add('/anilist/anime/5680', json.dumps(ANIME))
+
+    cache = ResultCache()
+    source = AsyncAnilist(CONFIG)
+    searcher = AsyncAnimeSearcher(source, cache=cache)
+
+    async def go():
+        try:
+            return await searcher.get(DataSource.ANILIST, 5680), await searcher.get(DataSource.ANILIST, '5680')
+        finally:
+            await source.close()
+
+    first, second = asyncio.run(go())
+
+    assert second[0] is first[0]
+    assert stub_urls.hits('/anilist/anime/5680') == 1
+    assert cache.get(ResultCache.make_key(DataSource.ANILIST, 'anime', 'get', 5680))[0] is first[0]
@@ -0,0 +1,78 @@
+import glob
+import os
+
+import pytest
+
+from Acerola.data_sources.animeplanet import AnimePlanet
+from animeplanet_pyquery import PyQueryParser
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'animeplanet')
+PAGES = sorted(os.path.basename(path) for path in glob.glob(os.path.join(FIXTURES, '*.html')))
+PARSERS = ['parse_anime', 'parse_manga', 'parse_light_novel', 'parse_print']
+
+
+def page(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as fixture:
+        return fixture.read()
+
+
+def dicts(results):
+    if isinstance(results, tuple):
+        return tuple(dicts(half) for half in results)
+
+    return [result.to_dict() for result in results]
+
+
+def outcome(parser, document):
+    try:
+        return dicts(parser(document))
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize('name', PAGES)
+@pytest.mark.parametrize('parser', PARSERS)
+def test_matches_pyquery_parser(name, parser):
+    text = page(name)
+
+    expected = outcome(getattr(PyQueryParser, parser), PyQueryParser.parse_page(text))
+
+    assert outcome(getattr(AnimePlanet, parser), AnimePlanet.parse_page(text)) == expected
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_no_results_matches_pyquery_parser(name):
+    text = page(name)
+
+    assert AnimePlanet.no_results(AnimePlanet.parse_page(text)) == \
+        PyQueryParser.no_results(PyQueryParser.parse_page(text))
+
+
+@pytest.mark.parametrize('name, parser', [('anime_search.html', 'parse_anime'), ('manga_search.html', 'parse_manga'),
+                                          ('manga_search.html', 'parse_light_novel'), ('manga_search.html', 'parse_print'),
+                                          ('light_novel_series.html', 'parse_print')])
+def test_parsers_still_take_pyquery_documents(name, parser):
+    text = page(name)
+
+    assert dicts(getattr(AnimePlanet, parser)(PyQueryParser.parse_page(text))) == \
+        dicts(getattr(AnimePlanet, parser)(AnimePlanet.parse_page(text)))
+
+
+def test_search_page():
+    manga, light_novels = AnimePlanet.parse_print(AnimePlanet.parse_page(page('manga_search.html')))
+
+    assert len(manga) + len(light_novels) == 40
+    assert light_novels[0].url == 'http://www.anime-planet.com/manga/title-0-light-novel'
+    assert light_novels[0].synonyms == {'Title 0'}
+
+
+def test_series_pages():
+    light_novel, = AnimePlanet.parse_light_novel(AnimePlanet.parse_page(page('light_novel_series.html')))
+    assert (light_novel.title_english, light_novel.synonyms) == ('Foo (Light Novel)', {'Foo'})
+
+    assert AnimePlanet.parse_print(AnimePlanet.parse_page(page('anime_series.html'))) == ([], [])
+
+
+def test_no_results_page():
+    assert AnimePlanet.no_results(AnimePlanet.parse_page(page('no_results.html')))
+    assert not AnimePlanet.no_results(AnimePlanet.parse_page(''))
@@ -0,0 +1,177 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from Acerola.aio.searcher import AsyncAnimeSearcher
+from Acerola.cache import ResultCache, SQLiteResultCache, NO_RESULTS, PRUNE_INTERVAL
+from Acerola.enums import DataSource
+from Acerola.errors import NoResultsFound
+from Acerola.response_types import Anime
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def anime(id, description=None):
+    return Anime(id=id, url='https://kitsu.io/anime/' + str(id), title_romaji='Title ' + str(id),
+                 description=description)
+
+
+def key(term):
+    return ResultCache.make_key(DataSource.KITSU, 'anime', 'search', term)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path, clock):
+    if request.param == 'memory':
+        cache = ResultCache(ttl=60, negative_ttl=10, clock=clock)
+    else:
+        cache = SQLiteResultCache(str(tmp_path / 'cache.db'), ttl=60, negative_ttl=10, clock=clock)
+
+    yield cache
+    cache.close()
+
+
+def test_round_trip(cache):
+    cache.put(key('k-on'), [anime(1, 'x' * 2000)])
+
+    assert [result.to_dict() for result in cache.get(key('K-On'))] == [anime(1, 'x' * 2000).to_dict()]
+    assert cache.stats()['hits'] == 1
+
+
+def test_miss_and_negative(cache):
+    assert cache.get(key('k-on')) is None
+
+    cache.put_negative(key('k-on'))
+
+    assert cache.get(key('k-on')) is NO_RESULTS
+    assert cache.stats()['negative_hits'] == 1
+
+
+def test_entries_expire(cache, clock):
+    cache.put(key('k-on'), [anime(1)])
+    cache.put_negative(key('bebop'))
+
+    clock.now += 11
+    assert cache.get(key('bebop')) is None
+    assert cache.get(key('k-on')) is not None
+
+    clock.now += 50
+    assert cache.get(key('k-on')) is None
+
+
+def test_empty_results_are_not_stored(cache):
+    cache.put(key('k-on'), [])
+
+    assert cache.get(key('k-on')) is None
+
+
+def test_memory_cache_evicts_least_recently_used(clock):
+    cache = ResultCache(max_size=2, clock=clock)
+    cache.put(key('a'), [anime(1)])
+    cache.put(key('b'), [anime(2)])
+    cache.get(key('a'))
+    cache.put(key('c'), [anime(3)])
+
+    assert cache.get(key('b')) is None
+    assert cache.get(key('a')) is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_sqlite_cache_prunes_least_recently_read(tmp_path, clock):
+    cache = SQLiteResultCache(str(tmp_path / 'cache.db'), max_bytes=1, clock=clock)
+
+    for index in range(PRUNE_INTERVAL):
+        clock.now += 1
+        cache.put(key(str(index)), [anime(index)])
+
+    # max_bytes is measured against the stored values, so one byte leaves nothing behind
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['evictions'] == PRUNE_INTERVAL
+    cache.close()
+
+
+def test_sqlite_cache_close_closes_every_threads_connection(tmp_path):
+    cache = SQLiteResultCache(str(tmp_path / 'cache.db'))
+    connections = []
+
+    def use():
+        cache.get(key('k-on'))
+        connections.append(cache.connection)
+
+    thread = threading.Thread(target=use)
+    thread.start()
+    thread.join()
+
+    cache.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute('SELECT 1')
+
+    # and it still works afterwards, on a fresh connection
+    cache.put(key('k-on'), [anime(1)])
+    assert cache.get(key('k-on')) is not None
+    cache.close()
+
+
+class StubKitsu:
+    source_type = DataSource.KITSU
+
+    async def search_anime(self, search_term):
+        if search_term == 'nothing':
+            raise NoResultsFound(self.source_type, search_term)
+
+        return [anime(1)]
+
+
+class ThreadRecordingCache(SQLiteResultCache):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, results):
+        self.threads.add(threading.get_ident())
+        super().put(key, results)
+
+    def put_negative(self, key):
+        self.threads.add(threading.get_ident())
+        super().put_negative(key)
+
+
+def test_async_searcher_keeps_sqlite_cache_off_the_loop(tmp_path):
+    cache = ThreadRecordingCache(str(tmp_path / 'cache.db'))
+    searcher = AsyncAnimeSearcher(StubKitsu(), cache=cache)
+
+    async def go():
+        await searcher.search(DataSource.KITSU, 'k-on')
+        cached = await searcher.search(DataSource.KITSU, 'k-on')
+
+        with pytest.raises(NoResultsFound):
+            await searcher.search(DataSource.KITSU, 'nothing')
+
+        many = await searcher.search_many(DataSource.KITSU, ['k-on', 'nothing'])
+
+        return cached, many, threading.get_ident()
+
+    cached, many, loop_thread = asyncio.run(go())
+    cache.close()
+
+    assert [result.id for result in cached] == [1]
+    assert [bool(result.results) for result in many] == [True, False]
+    assert cache.threads and loop_thread not in cache.threads
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import threading
+
+import pytest
+import requests
+
+from Acerola.aio.data_sources import AsyncKitsu
+from Acerola.circuitbreaker import CircuitBreaker
+from Acerola.data_sources import kitsu
+from Acerola.enums import BreakerState, DataSource
+from Acerola.errors import CircuitOpenError, DataSourceUnavailableError
+from Acerola.session import PooledSession
+
+KITSU_ANIME = {'data': [{'id': '1', 'attributes': {'titles': {'en_jp': 'K-On!'}, 'abbreviatedTitles': [],
+                                                   'episodeCount': 13, 'showType': 'TV', 'synopsis': None,
+                                                   'nsfw': False}}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def breaker(clock, failure_threshold=3, recovery_timeout=30):
+    return CircuitBreaker(DataSource.KITSU, failure_threshold=failure_threshold, recovery_timeout=recovery_timeout,
+                          clock=clock)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_failure_threshold_consecutive_failures(clock):
+    circuit = breaker(clock)
+
+    for _ in range(2):
+        circuit.before_call()
+        circuit.record_failure()
+
+    assert circuit.state == BreakerState.CLOSED
+
+    # a success in between starts the count again
+    circuit.before_call()
+    circuit.record_success()
+
+    for _ in range(2):
+        circuit.before_call()
+        circuit.record_failure()
+
+    assert circuit.state == BreakerState.CLOSED
+
+    circuit.before_call()
+    circuit.record_failure()
+
+    assert circuit.state == BreakerState.OPEN
+
+
+def test_open_breaker_fails_fast_until_the_recovery_timeout(clock):
+    circuit = breaker(clock)
+    trip(circuit)
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+    clock.now += 1
+    circuit.before_call()
+
+    assert circuit.state == BreakerState.HALF_OPEN
+
+
+def test_only_one_probe_at_a_time(clock):
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    results = []
+    start = threading.Barrier(8)
+
+    def call():
+        start.wait()
+        try:
+            circuit.before_call()
+            results.append('probe')
+        except CircuitOpenError:
+            results.append('rejected')
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == ['probe'] + ['rejected'] * 7
+
+
+def test_probe_success_closes_the_breaker(clock):
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    circuit.before_call()
+    circuit.record_success()
+
+    assert circuit.state == BreakerState.CLOSED
+
+    # and the failure count starts from nothing
+    circuit.before_call()
+    circuit.record_failure()
+    assert circuit.state == BreakerState.CLOSED
+
+
+def test_probe_failure_reopens_for_another_recovery_timeout(clock):
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    circuit.before_call()
+    circuit.record_failure()
+
+    assert circuit.state == BreakerState.OPEN
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+    clock.now += 1
+    circuit.before_call()
+    assert circuit.state == BreakerState.HALF_OPEN
+
+
+def test_release_lets_another_probe_through_without_counting_a_failure(clock):
+    circuit = breaker(clock)
+    trip(circuit)
+    clock.now += 30
+
+    circuit.before_call()
+    circuit.release()
+
+    assert circuit.state == BreakerState.HALF_OPEN
+
+    circuit.before_call()
+    circuit.record_success()
+    assert circuit.state == BreakerState.CLOSED
+
+
+def test_release_doesnt_count_towards_the_threshold(clock):
+    circuit = breaker(clock, failure_threshold=1)
+
+    for _ in range(5):
+        circuit.before_call()
+        circuit.release()
+
+    assert circuit.state == BreakerState.CLOSED
+
+
+def test_from_config():
+    circuit = CircuitBreaker.from_config({'FailureThreshold': '2', 'RecoveryTimeout': '5'}, DataSource.KITSU)
+
+    assert (circuit.failure_threshold, circuit.recovery_timeout) == (2, 5)
+
+
+def test_session_opens_on_server_errors(stub_server, clock):
+    stub_server.add('/anime', status=503)
+    stub_server.add('/anime', status=503)
+    stub_server.add('/anime', 'ok')
+
+    session = PooledSession(circuit_breaker=breaker(clock, failure_threshold=2))
+
+    try:
+        assert [session.get(stub_server.url + 'anime').status_code for _ in range(2)] == [503, 503]
+
+        with pytest.raises(CircuitOpenError):
+            session.get(stub_server.url + 'anime')
+        assert stub_server.hits('/anime') == 2
+
+        clock.now += 30
+        assert session.get(stub_server.url + 'anime').text == 'ok'
+        assert session.circuit_breaker.state == BreakerState.CLOSED
+    finally:
+        session.close()
+
+
+def test_session_releases_the_probe_on_other_errors(stub_server, clock):
+    stub_server.add('/anime', 'ok')
+
+    session = PooledSession(circuit_breaker=breaker(clock, failure_threshold=1))
+    session.circuit_breaker.before_call()
+    session.circuit_breaker.record_failure()
+    clock.now += 30
+
+    try:
+        # a bad URL says nothing about the source, so the probe is handed back rather than reopening the breaker
+        with pytest.raises(requests.exceptions.MissingSchema):
+            session.get('anime')
+        assert session.circuit_breaker.state == BreakerState.HALF_OPEN
+
+        assert session.get(stub_server.url + 'anime').text == 'ok'
+        assert session.circuit_breaker.state == BreakerState.CLOSED
+    finally:
+        session.close()
+
+
+def test_async_source_goes_through_the_breaker(stub_server, clock, monkeypatch):
+    monkeypatch.setattr(kitsu, 'BASE_URL', stub_server.url + 'kitsu/')
+    stub_server.add('/kitsu/anime', status=503)
+    stub_server.add('/kitsu/anime', status=503)
+    stub_server.add('/kitsu/anime', json.dumps(KITSU_ANIME))
+
+    source = AsyncKitsu({'Timeout': 5, 'FailureThreshold': 2})
+    source.circuit_breaker.clock = clock
+
+    async def go():
+        try:
+            for _ in range(2):
+                with pytest.raises(DataSourceUnavailableError):
+                    await source.search_anime('k-on')
+
+            with pytest.raises(CircuitOpenError):
+                await source.search_anime('k-on')
+
+            clock.now += 30
+            return await source.search_anime('k-on')
+        finally:
+            await source.close()
+
+    anime, = asyncio.run(go())
+
+    assert anime.id == '1'
+    assert stub_server.hits('/kitsu/anime') == 3
+    assert source.circuit_breaker.state == BreakerState.CLOSED
+
+
+def test_async_source_releases_the_probe_when_cancelled(stub_server, clock, monkeypatch):
+    monkeypatch.setattr(kitsu, 'BASE_URL', stub_server.url + 'kitsu/')
+
+    source = AsyncKitsu({'Timeout': 5, 'FailureThreshold': 1, 'RateLimit': 1, 'MaxWait': 60})
+    source.circuit_breaker.clock = clock
+    source.circuit_breaker.before_call()
+    source.circuit_breaker.record_failure()
+    clock.now += 30
+
+    async def go():
+        try:
+            # the rate limiter holds the probe back long enough to cancel it
+            source.rate_limiter.reserve()
+            probe = asyncio.ensure_future(source.search_anime('k-on'))
+            await asyncio.sleep(0.05)
+            probe.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+        finally:
+            await source.close()
+
+    asyncio.run(go())
+
+    assert source.circuit_breaker.state == BreakerState.HALF_OPEN
+    source.circuit_breaker.before_call()
+    assert stub_server.hits('/kitsu/anime') == 0
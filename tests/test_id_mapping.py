@@ -0,0 +1,86 @@
+import json
+from collections import Counter
+
+import pytest
+
+from Acerola.enums import DataSource
+from Acerola.id_mapping import IdMapping
+
+MAL, ANILIST, KITSU, ANIDB = DataSource.MAL, DataSource.ANILIST, DataSource.KITSU, DataSource.ANIDB
+
+
+@pytest.fixture
+def mapping(tmp_path):
+    mapping = IdMapping(str(tmp_path / 'ids.db'))
+    yield mapping
+    mapping.close()
+
+
+def sources_per_group(mapping):
+    rows = mapping._connection.execute('SELECT series, source FROM ids').fetchall()
+    return Counter(rows)
+
+
+def test_link_and_related_ids(mapping):
+    mapping.link('anime', {MAL: 1, ANILIST: 10, KITSU: None})
+
+    assert mapping.related_ids('anime', MAL, 1) == {ANILIST: '10'}
+    assert mapping.related_ids('anime', ANILIST, '10') == {MAL: '1'}
+    assert mapping.related_ids('manga', MAL, 1) == {}
+    assert len(mapping) == 1
+
+
+def test_single_ids_arent_linked(mapping):
+    mapping.link('anime', {MAL: 1, ANILIST: None})
+
+    assert len(mapping) == 0
+
+
+def test_linking_groups_merges_them(mapping):
+    mapping.link('anime', {MAL: 1, ANILIST: 10})
+    mapping.link('anime', {KITSU: 20, ANIDB: 30})
+    mapping.link('anime', {ANILIST: 10, KITSU: 20})
+
+    assert mapping.related_ids('anime', MAL, 1) == {ANILIST: '10', KITSU: '20', ANIDB: '30'}
+    assert len(mapping) == 1
+
+
+def test_new_id_replaces_the_old_one(mapping):
+    mapping.link('anime', {MAL: 1, ANILIST: 10})
+    mapping.link('anime', {MAL: 1, ANILIST: 11})
+
+    assert mapping.related_ids('anime', MAL, 1) == {ANILIST: '11'}
+    assert mapping.related_ids('anime', ANILIST, 10) == {}
+
+
+def test_merge_keeps_one_id_per_source(mapping):
+    mapping.link('anime', {MAL: 1, ANILIST: 10})
+    mapping.link('anime', {MAL: 2, KITSU: 20})
+    mapping.link('anime', {ANILIST: 10, KITSU: 20})
+
+    assert max(sources_per_group(mapping).values()) == 1
+
+    # the most recently linked MAL id wins
+    assert mapping.related_ids('anime', ANILIST, 10) == {MAL: '2', KITSU: '20'}
+    assert mapping.related_ids('anime', MAL, 1) == {}
+
+
+def test_merge_of_three_groups(mapping):
+    mapping.link('anime', {MAL: 1, ANIDB: 30})
+    mapping.link('anime', {ANILIST: 10, ANIDB: 31})
+    mapping.link('anime', {KITSU: 20, ANIDB: 32})
+    mapping.link('anime', {MAL: 1, ANILIST: 10, KITSU: 20})
+
+    assert max(sources_per_group(mapping).values()) == 1
+    assert mapping.related_ids('anime', MAL, 1) == {ANILIST: '10', KITSU: '20', ANIDB: '32'}
+    assert len(mapping) == 1
+
+
+def test_load(mapping, tmp_path):
+    path = tmp_path / 'ids.json'
+    path.write_text(json.dumps({'anime': [{'MAL': 1, 'ANIDB': 23}, {'MAL': 5}],
+                                'manga': [{'MAL': 2, 'KITSU': '7', 'ANILIST': None}]}), encoding='utf-8')
+
+    assert mapping.load(str(path)) == 2
+    assert mapping.related_ids('anime', ANIDB, 23) == {MAL: '1'}
+    assert mapping.related_ids('manga', KITSU, 7) == {MAL: '2'}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from Acerola.aio.data_sources import AsyncKitsu
+from Acerola.aio.searcher import AsyncMangaSearcher
+from Acerola.cache import ResultCache
+from Acerola.data_sources import kitsu
+from Acerola.data_sources.kitsu import Kitsu
+from Acerola.enums import DataSource, Type
+from Acerola.errors import NoResultsFound
+from Acerola.searcher import MangaSearcher
+
+CONFIG = {'Timeout': 5}
+
+# The single-entity endpoints answer with just that entry under data, rather than a list
+ANIME = {'data': {'id': '4240', 'type': 'anime',
+                  'attributes': {'titles': {'en_jp': 'K-On!', 'en': 'K-On!', 'ja_jp': 'けいおん！'},
+                                 'abbreviatedTitles': ['Keion'], 'episodeCount': 13, 'showType': 'TV',
+                                 'synopsis': 'Light music club', 'nsfw': False}}}
+
+MANGA = {'data': {'id': '14', 'type': 'manga',
+                  'attributes': {'titles': {'en_jp': 'Berserk', 'en': 'Berserk'}, 'abbreviatedTitles': None,
+                                 'volumeCount': 41, 'chapterCount': None, 'mangaType': 'manga',
+                                 'synopsis': 'Guts'}}}
+
+
+@pytest.fixture
+def stub_urls(stub_server, monkeypatch):
+    monkeypatch.setattr(kitsu, 'BASE_URL', stub_server.url + 'kitsu/')
+    return stub_server
+
+
+def get_sync(function, id):
+    source = Kitsu(CONFIG)
+    try:
+        return getattr(source, function)(id)
+    finally:
+        source.close()
+
+
+def get_async(function, id):
+    async def go():
+        source = AsyncKitsu(CONFIG)
+        try:
+            return await getattr(source, function)(id)
+        finally:
+            await source.close()
+
+    return asyncio.run(go())
+
+
+@pytest.fixture(params=[get_sync, get_async], ids=['sync', 'async'])
+def get(request):
+    return request.param
+
+
+def test_get_anime(stub_urls, get):
+    stub_urls.add('/kitsu/anime/4240', json.dumps(ANIME))
+
+    anime, = get('get_anime', 4240)
+
+    assert (anime.id, anime.url) == ('4240', 'https://kitsu.io/anime/4240')
+    assert (anime.title_romaji, anime.title_japanese, anime.synonyms) == ('K-On!', 'けいおん！', {'Keion'})
+    assert (anime.episode_count, anime.type) == (13, Type.TV)
+
+
+def test_get_manga(stub_urls, get):
+    stub_urls.add('/kitsu/manga/14', json.dumps(MANGA))
+
+    manga, = get('get_manga', '14')
+
+    assert (manga.id, manga.title_english, manga.volume_count, manga.chapter_count) == ('14', 'Berserk', 41, None)
+    assert manga.type == Type.MANGA
+
+
+def test_missing_id_is_no_results(stub_urls, get):
+    stub_urls.add('/kitsu/anime/1', status=404)
+
+    with pytest.raises(NoResultsFound):
+        get('get_anime', 1)
+
+
+def test_manga_id_asked_for_as_a_light_novel_is_no_results(stub_urls, get):
+    stub_urls.add('/kitsu/manga/14', json.dumps(MANGA))
+
+    with pytest.raises(NoResultsFound):
+        get('get_light_novel', 14)
+
+
+def test_get_is_cached(stub_urls):
+    stub_urls.add('/kitsu/manga/14', json.dumps(MANGA))
+
+    cache = ResultCache()
+    source = Kitsu(CONFIG)
+    searcher = MangaSearcher(source, cache=cache)
+
+    try:
+        first, second = searcher.get(DataSource.KITSU, 14), searcher.get(DataSource.KITSU, '14')
+    finally:
+        source.close()
+
+    assert second[0] is first[0]
+    assert stub_urls.hits('/kitsu/manga/14') == 1
+    assert cache.get(ResultCache.make_key(DataSource.KITSU, 'manga', 'get', 14))[0] is first[0]
+
+
+def test_async_get_is_cached(stub_urls):
+    stub_urls.add('/kitsu/manga/14', json.dumps(MANGA))
+
+    cache = ResultCache()
+    source = AsyncKitsu(CONFIG)
+    searcher = AsyncMangaSearcher(source, cache=cache)
+
+    async def go():
+        try:
+            return await searcher.get(DataSource.KITSU, 14), await searcher.get(DataSource.KITSU, '14')
+        finally:
+            await source.close()
+
+    first, second = asyncio.run(go())
+
+    assert second[0] is first[0]
+    assert stub_urls.hits('/kitsu/manga/14') == 1
+    assert cache.get(ResultCache.make_key(DataSource.KITSU, 'manga', 'get', 14))[0] is first[0]
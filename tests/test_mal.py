@@ -0,0 +1,52 @@
+import os
+
+from Acerola.data_sources.mal import Mal
+from Acerola.enums import Type, Status
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'mal')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as xml:
+        return Mal.sanitise_shitty_xml(xml.read())
+
+
+def test_parse_anime():
+    anime = {entry.id: entry for entry in Mal.parse_anime(fixture('anime_search_bebop.xml'))}
+
+    assert list(anime) == [1, 5, 4037, 17205, 37085]
+
+    bebop = anime[1]
+    assert (bebop.title_romaji, bebop.episode_count, bebop.type, bebop.status) == \
+           ('Cowboy Bebop', 26, Type.TV, Status.FINISHED)
+    # entities that aren't in ENTITIES are left escaped, as they always were
+    assert 'referred to as &quot;Cowboys.&quot;' in bebop.description
+    assert 'travels-Ein' in bebop.description
+    assert "each member's dark" in bebop.description
+    assert '&lt;br /&gt;' in bebop.description
+
+    assert anime[5].synonyms == {"Cowboy Bebop: Knockin' on Heaven's Door"}
+    assert anime[4037].synonyms == {'Cowboy Bebop Session XX ', '  Mish-Mash Blues'}
+    assert anime[17205].title_english == "Ein's Summer Vacation"
+    assert anime[37085].synonyms == {'Bebop x Pirates', ' Pokémon Parody ♥'}
+    assert anime[37085].episode_count is None
+
+
+def test_parse_print_splits_light_novels():
+    manga, light_novels = Mal.parse_print(fixture('manga_search_berserk.xml'))
+
+    assert [entry.id for entry in manga] == ['2', '36179', '117379']
+    assert [entry.id for entry in light_novels] == ['92299']
+
+    novel = light_novels[0]
+    assert novel.synonyms == {'Berserk: Flame Dragon Knight ', '  Berserk Ø Novel'}
+    assert "Grunbeld's past ... and his rise to the Kushan Empire's apostles." in novel.description
+
+    assert manga[0].chapter_count is None
+    assert manga[2].description == 'The official guidebook - character profiles, interviews x artwork and ∞ more.'
+
+
+def test_double_escaped_ampersands_stay_escaped():
+    manga = Mal.parse_manga(fixture('manga_search_berserk.xml'))
+
+    assert manga[1].description.endswith('½ of which was never reprinted - drawn by Kentarou Miura &amp; co.')
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from Acerola.data_sources import mangaupdates
+from Acerola.data_sources.mangaupdates import MangaUpdates, LazyManga, DETAIL_FIELDS
+from Acerola.enums import Status, Type
+from Acerola.response_types import Manga, LightNovel
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'mangaupdates')
+
+
+def page(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as fixture:
+        return fixture.read()
+
+
+@pytest.fixture
+def stub_urls(stub_server, monkeypatch):
+    monkeypatch.setattr(mangaupdates, 'BASE_URL', stub_server.url + 'mu')
+
+    # the series links point at the stub server, which answers every series page from /series.html
+    stub_server.add('/mu', page('search_berserk.html').replace(b'https://www.mangaupdates.com/',
+                                                               stub_server.url.encode('utf-8')))
+    return stub_server
+
+
+@pytest.fixture
+def source():
+    source = MangaUpdates({'Timeout': 5, 'LazyHydration': 'true'})
+    yield source
+    source.close()
+
+
+def test_parse_print_skips_header_and_separator_rows():
+    manga, light_novels = MangaUpdates.parse_print(MangaUpdates.parse_page(page('search_berserk.html')))
+
+    assert [series.title_english for series in manga] == ['Berserk', 'Berserk of Gluttony', 'Berserk: The Prototype']
+    assert [series.url for series in light_novels] == [series.url for series in manga]
+    assert manga[0].url == 'https://www.mangaupdates.com/series.html?id=88'
+
+    assert type(manga[0]) is Manga and type(light_novels[0]) is LightNovel
+    assert manga[0].status is None
+
+
+def test_parse_details():
+    details = MangaUpdates.parse_details(MangaUpdates.parse_page(page('series_berserk.html')))
+
+    assert details == {'type': Type.MANGA, 'status': Status.ONGOING, 'volume_count': 41, 'chapter_count': 364}
+
+
+def test_parse_details_of_an_empty_page():
+    details = MangaUpdates.parse_details(MangaUpdates.parse_page(b''))
+
+    assert details == {'status': Status.UNKNOWN, 'volume_count': None, 'chapter_count': None}
+
+
+def test_lazy_details_load_every_field_on_first_read():
+    loaded = []
+
+    def load_details(url):
+        loaded.append(url)
+        return {'type': Type.MANGA, 'status': Status.ONGOING, 'volume_count': 41, 'chapter_count': 364}
+
+    manga = LazyManga(load_details, title_english='Berserk', url='series.html?id=88')
+    assert loaded == []
+
+    assert manga.volume_count == 41
+    assert [getattr(manga, field) for field in DETAIL_FIELDS] == [Status.ONGOING, Type.MANGA, 364, 41]
+    assert loaded == ['series.html?id=88']
+
+    with pytest.raises(AttributeError):
+        manga.publisher
+
+
+def test_lazy_hydration_fetches_each_series_page_once(stub_urls, source):
+    stub_urls.add('/series.html', page('series_berserk.html'))
+
+    manga, light_novels = source.search_print('berserk')
+    assert stub_urls.hits('/series.html') == 0
+
+    assert isinstance(manga[0], Manga)
+    assert (manga[0].status, manga[0].type, manga[0].chapter_count, manga[0].volume_count) == \
+           (Status.ONGOING, Type.MANGA, 364, 41)
+    assert stub_urls.hits('/series.html') == 1
+
+    # the light novel half and a later search share the page fetched for that URL
+    assert light_novels[0].volume_count == 41
+    assert source.search_manga('berserk')[0].chapter_count == 364
+    assert stub_urls.hits('/series.html') == 1
+
+    # a different series is a different page
+    assert manga[1].status == Status.ONGOING
+    assert stub_urls.hits('/series.html') == 2
+
+
+def test_failed_detail_fetch_leaves_fields_empty_and_isnt_cached(stub_urls, source):
+    stub_urls.add('/series.html', status=500)
+    stub_urls.add('/series.html', page('series_berserk.html'))
+
+    manga = source.search_manga('berserk')[0]
+    assert [getattr(manga, field) for field in DETAIL_FIELDS] == [None] * 4
+    assert stub_urls.hits('/series.html') == 1
+
+    assert source.search_manga('berserk')[0].status == Status.ONGOING
+    assert stub_urls.hits('/series.html') == 2
+
+
+def test_without_lazy_hydration_nothing_is_fetched(stub_urls):
+    source = MangaUpdates({'Timeout': 5})
+
+    try:
+        manga = source.search_manga('berserk')
+    finally:
+        source.close()
+
+    assert len(manga) == 3 and manga[0].status is None
+    assert stub_urls.hits('/series.html') == 0
@@ -0,0 +1,214 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import pytest
+
+from Acerola.aio.data_sources import AsyncKitsu
+from Acerola.enums import DataSource
+from Acerola.errors import RateLimitExceededError
+from Acerola.ratelimit import TokenBucket, parse_retry_after, RETRY_AFTER
+from Acerola.session import PooledSession
+
+
+class FakeClock:
+    # Stands in for both time.monotonic and time.sleep, so sleeping just moves the clock on
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def bucket(clock, rate=2, burst=2, max_wait=10):
+    return TokenBucket(DataSource.KITSU, rate, burst=burst, max_wait=max_wait, clock=clock, sleep=clock.sleep)
+
+
+def test_burst_goes_straight_through(clock):
+    limiter = bucket(clock)
+
+    assert [limiter.reserve(), limiter.reserve()] == [0, 0]
+
+
+def test_callers_over_the_limit_queue_in_turn(clock):
+    limiter = bucket(clock)
+
+    waits = [limiter.reserve() for _ in range(5)]
+
+    assert waits == [0, 0, 0.5, 1.0, 1.5]
+
+
+def test_tokens_refill_over_time(clock):
+    limiter = bucket(clock)
+    limiter.reserve()
+    limiter.reserve()
+
+    clock.now += 1
+
+    assert [limiter.reserve(), limiter.reserve(), limiter.reserve()] == [0, 0, 0.5]
+
+
+def test_acquire_sleeps_for_its_turn(clock):
+    limiter = bucket(clock, burst=1)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == [0.5, 0.5]
+    assert clock.now == 1001.0
+
+
+def test_waiting_past_max_wait_raises_without_taking_a_token(clock):
+    limiter = bucket(clock, rate=1, burst=1, max_wait=2)
+
+    assert [limiter.reserve() for _ in range(3)] == [0, 1, 2]
+
+    with pytest.raises(RateLimitExceededError):
+        limiter.reserve()
+
+    # the refused caller didn't join the queue
+    clock.now += 1
+    assert limiter.reserve() == 2
+
+
+def test_penalise_blocks_everyone_until_retry_after(clock):
+    limiter = bucket(clock)
+    limiter.penalise(3)
+
+    # spaced out at the rate from the end of the penalty, rather than all let go at once
+    assert [limiter.reserve(), limiter.reserve(), limiter.reserve()] == [3, 3.5, 4]
+
+    clock.now += 3
+    assert limiter.reserve() == 1.5
+
+
+def test_nothing_accrues_during_a_penalty(clock):
+    limiter = bucket(clock, rate=1, burst=1, max_wait=60)
+    limiter.penalise(5)
+
+    assert [limiter.reserve() for _ in range(8)] == [5, 6, 7, 8, 9, 10, 11, 12]
+
+
+def test_callers_after_a_penalty_never_come_more_than_burst_at_once(clock):
+    limiter = bucket(clock, rate=2, burst=2, max_wait=60)
+    limiter.penalise(3)
+
+    clock.now += 2
+    waits = [clock.now + limiter.reserve() for _ in range(6)]
+
+    assert waits == [1003, 1003.5, 1004, 1004.5, 1005, 1005.5]
+
+    # once the queue has drained, the bucket fills back up to burst and no further
+    clock.now += 100
+    assert [limiter.reserve(), limiter.reserve(), limiter.reserve()] == [0, 0, 0.5]
+
+
+def test_penalty_keeps_the_existing_queue(clock):
+    limiter = bucket(clock, rate=1, burst=1, max_wait=60)
+    assert [limiter.reserve(), limiter.reserve(), limiter.reserve()] == [0, 1, 2]
+
+    limiter.penalise(5)
+
+    # two callers were already promised slots; the next goes two intervals after the penalty ends
+    assert limiter.reserve() == 7
+
+
+def test_penalise_past_max_wait_raises(clock):
+    limiter = bucket(clock, max_wait=2)
+    limiter.penalise(5)
+
+    with pytest.raises(RateLimitExceededError):
+        limiter.reserve()
+
+    clock.now += 5
+    assert limiter.reserve() == 0
+
+
+def test_shorter_penalty_doesnt_shorten_a_longer_one(clock):
+    limiter = bucket(clock)
+    limiter.penalise(4)
+    limiter.penalise(1)
+
+    assert limiter.reserve() == 4
+
+
+@pytest.mark.parametrize('value, expected', [(None, RETRY_AFTER), ('', RETRY_AFTER), ('7', 7), ('1.5', 1.5),
+                                             ('-3', 0), ('soon', RETRY_AFTER)])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    date = format_datetime(datetime(2020, 1, 1, 0, 0, 30, tzinfo=timezone.utc), usegmt=True)
+    now = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    assert parse_retry_after(date, now=lambda: now) == 30
+    assert parse_retry_after(date, now=lambda: now + 60) == 0
+
+
+def test_from_config():
+    assert TokenBucket.from_config({'Timeout': 5}, DataSource.KITSU) is None
+
+    limiter = TokenBucket.from_config({'RateLimit': '0.5', 'Burst': '3', 'MaxWait': '4'}, DataSource.KITSU)
+    assert (limiter.rate, limiter.burst, limiter.max_wait) == (0.5, 3, 4)
+
+
+def test_session_retries_once_after_429(stub_server, clock):
+    stub_server.add('/anime', status=429, headers={'Retry-After': '2'})
+    stub_server.add('/anime', 'ok')
+    session = PooledSession(rate_limiter=bucket(clock), clock=clock)
+
+    response = session.get(stub_server.url + 'anime')
+    session.close()
+
+    assert response.status_code == 200
+    assert stub_server.hits('/anime') == 2
+    assert clock.sleeps == [2]
+
+
+def test_session_gives_up_when_retry_after_is_past_max_wait(stub_server, clock):
+    stub_server.add('/anime', status=429, headers={'Retry-After': '60'})
+    session = PooledSession(rate_limiter=bucket(clock), clock=clock)
+
+    with pytest.raises(RateLimitExceededError):
+        session.get(stub_server.url + 'anime')
+    session.close()
+
+    assert stub_server.hits('/anime') == 1
+
+
+def test_session_retries_429_only_once(stub_server, clock):
+    stub_server.add('/anime', status=429, headers={'Retry-After': '1'})
+    session = PooledSession(rate_limiter=bucket(clock), clock=clock)
+
+    response = session.get(stub_server.url + 'anime')
+    session.close()
+
+    assert response.status_code == 429
+    assert stub_server.hits('/anime') == 2
+
+
+def test_async_source_retries_once_after_429(stub_server):
+    stub_server.add('/anime', status=429, headers={'Retry-After': '0.05'})
+    stub_server.add('/anime', '{"data": []}')
+    source = AsyncKitsu({'Timeout': 5, 'RateLimit': 100})
+
+    async def go():
+        try:
+            async with source.request('GET', stub_server.url + 'anime') as response:
+                return response.status
+        finally:
+            await source.close()
+
+    assert asyncio.run(go()) == 200
+    assert stub_server.hits('/anime') == 2
@@ -0,0 +1,373 @@
+import asyncio
+import time
+
+import pytest
+
+from Acerola import Acerola
+from Acerola.aio import AsyncAcerola
+from Acerola.aio.searcher import AsyncAnimeSearcher, AsyncLightNovelSearcher
+from Acerola.cache import ResultCache
+from Acerola.enums import DataSource
+from Acerola.errors import FeatureNotImplementedError, NoResultsFound, DataSourceUnavailableError, \
+    DataSourceTimeoutError
+from Acerola.id_mapping import IdMapping
+from Acerola.response_types import Anime, Manga
+from Acerola.searcher import AnimeSearcher, MangaSearcher, LightNovelSearcher
+
+
+def count_ranked_calls(acerola, monkeypatch):
+    calls = []
+    ranked = acerola._anidb.search_anime_ranked
+
+    def counted(search_term, limit):
+        calls.append((search_term, limit))
+        return ranked(search_term, limit)
+
+    monkeypatch.setattr(acerola._anidb, 'search_anime_ranked', counted)
+    return calls
+
+
+def test_search_ranked(acerola_config, monkeypatch):
+    with Acerola(acerola_config) as acerola:
+        acerola.refresh_anidb_database()
+        calls = count_ranked_calls(acerola, monkeypatch)
+
+        assert [anime.id for anime in acerola.anime.search_ranked(DataSource.ANIDB, 'ｋ－ｏｎ')] == ['5391']
+        assert [anime.id for anime in acerola.anime.search_ranked(DataSource.ANIDB, 'ｋ－ｏｎ')] == ['5391']
+        acerola.anime.search_ranked(DataSource.ANIDB, 'ｋ－ｏｎ', limit=1)
+
+        # cached per limit, and apart from the plain search
+        assert calls == [('ｋ－ｏｎ', 10), ('ｋ－ｏｎ', 1)]
+
+        with pytest.raises(NoResultsFound):
+            acerola.anime.search(DataSource.ANIDB, 'ｋ－ｏｎ')
+
+        with pytest.raises(FeatureNotImplementedError):
+            acerola.anime.search_ranked(DataSource.MAL, 'k-on')
+
+        with pytest.raises(FeatureNotImplementedError):
+            acerola.manga.search_ranked(DataSource.MAL, 'k-on')
+
+
+def test_async_search_ranked(acerola_config, monkeypatch):
+    async def go():
+        async with AsyncAcerola(acerola_config) as acerola:
+            await acerola.refresh_anidb_database()
+            calls = count_ranked_calls(acerola, monkeypatch)
+
+            found = [await acerola.anime.search_ranked(DataSource.ANIDB, 'cowboy k-on', limit=1) for _ in range(2)]
+
+            with pytest.raises(NoResultsFound):
+                await acerola.anime.search_ranked(DataSource.ANIDB, 'zzzz')
+
+            with pytest.raises(FeatureNotImplementedError):
+                await acerola.anime.search_ranked(DataSource.KITSU, 'k-on')
+
+            return found, calls
+
+    found, calls = asyncio.run(go())
+
+    assert [[anime.id for anime in results] for results in found] == [['5391'], ['5391']]
+    assert calls == [('cowboy k-on', 1), ('zzzz', 10)]
+
+
+class PrintSource:
+    # Finds one manga and no light novels for every term, and counts the requests it gets
+    def __init__(self, source_type, empty_search_raises):
+        self.source_type = source_type
+        self.empty_search_raises = empty_search_raises
+        self.calls = []
+
+    def search_print(self, search_term):
+        self.calls.append('print')
+        return [Manga(id=1, title_romaji=search_term)], []
+
+    def search_manga(self, search_term):
+        self.calls.append('manga')
+        return [Manga(id=1, title_romaji=search_term)]
+
+    def search_light_novel(self, search_term):
+        self.calls.append('light_novel')
+        if self.empty_search_raises:
+            raise NoResultsFound(self.source_type, search_term)
+        return []
+
+
+class AsyncPrintSource(PrintSource):
+    async def search_print(self, search_term):
+        return PrintSource.search_print(self, search_term)
+
+    async def search_light_novel(self, search_term):
+        return PrintSource.search_light_novel(self, search_term)
+
+
+def test_search_print_caches_the_empty_half_as_the_source_would_answer_it():
+    cache = ResultCache()
+    kitsu, mal = PrintSource(DataSource.KITSU, True), PrintSource(DataSource.MAL, False)
+    manga, light_novel = MangaSearcher(kitsu, mal, cache=cache), LightNovelSearcher(kitsu, mal, cache=cache)
+
+    for source in (kitsu, mal):
+        manga.search_print(source.source_type, 'berserk')
+        assert [series.id for series in manga.search(source.source_type, 'berserk')] == [1]
+
+    # Kitsu's light novel search would have raised, so the cache can answer for it
+    with pytest.raises(NoResultsFound):
+        light_novel.search(DataSource.KITSU, 'berserk')
+    assert kitsu.calls == ['print']
+
+    # MAL's returns [], which the cache can't stand in for
+    assert light_novel.search(DataSource.MAL, 'berserk') == []
+    assert mal.calls == ['print', 'light_novel']
+
+
+def test_async_search_print_caches_the_empty_half_as_the_source_would_answer_it():
+    cache = ResultCache()
+    kitsu, mal = AsyncPrintSource(DataSource.KITSU, True), AsyncPrintSource(DataSource.MAL, False)
+    light_novel = AsyncLightNovelSearcher(kitsu, mal, cache=cache)
+
+    async def go():
+        for source in (kitsu, mal):
+            await light_novel.search_print(source.source_type, 'berserk')
+
+        with pytest.raises(NoResultsFound):
+            await light_novel.search(DataSource.KITSU, 'berserk')
+
+        return await light_novel.search(DataSource.MAL, 'berserk')
+
+    assert asyncio.run(go()) == []
+    assert kitsu.calls == ['print']
+    assert mal.calls == ['print', 'light_novel']
+
+
+class SearchOnlySource:
+    # Searches a fixed list of anime and records every call, with no get - like AnimePlanet
+    def __init__(self, source_type, *anime, error=None):
+        self.source_type = source_type
+        self.anime = anime
+        self.error = error
+        self.calls = []
+
+    def search_anime(self, search_term):
+        self.calls.append(('search', search_term))
+        found = [anime for anime in self.anime if search_term.casefold() in anime.title_romaji.casefold()]
+        if not found:
+            raise NoResultsFound(self.source_type, search_term)
+        return found
+
+
+class AnimeSource(SearchOnlySource):
+    def get_anime(self, id):
+        self.calls.append(('get', str(id)))
+        if self.error is not None:
+            raise self.error
+        found = [anime for anime in self.anime if str(anime.id) == str(id)]
+        if not found:
+            raise NoResultsFound(self.source_type, id)
+        return found
+
+
+class AsyncAnimeSource(AnimeSource):
+    async def search_anime(self, search_term):
+        return AnimeSource.search_anime(self, search_term)
+
+    async def get_anime(self, id):
+        return AnimeSource.get_anime(self, id)
+
+
+MAL, KITSU, ANIMEPLANET = DataSource.MAL, DataSource.KITSU, DataSource.ANIMEPLANET
+
+
+@pytest.fixture
+def mapping():
+    mapping = IdMapping()
+    yield mapping
+    mapping.close()
+
+
+def sources():
+    return (AnimeSource(MAL, Anime(id=1, title_romaji='K-On!'), Anime(id=2, title_romaji='K-On!!')),
+            AnimeSource(KITSU, Anime(id='10', title_romaji='K-On!!'), Anime(id='11', title_romaji='K-On!')),
+            SearchOnlySource(ANIMEPLANET, Anime(url='/anime/k-on-2', title_romaji='K-On!!'),
+                             Anime(url='/anime/k-on', title_romaji='K-On!')))
+
+
+def test_cross_reference_fetches_known_ids_directly(mapping):
+    mal, kitsu, animeplanet = sources()
+    searcher = AnimeSearcher(mal, kitsu, animeplanet, id_mapping=mapping)
+    mapping.link('anime', {MAL: 1, KITSU: '11'})
+
+    results = searcher.cross_reference(MAL, 1, [KITSU])
+
+    assert [anime.id for anime in results[KITSU].results] == ['11']
+    assert kitsu.calls == [('get', '11')]
+
+    # nothing needed the original, so it wasn't fetched
+    assert mal.calls == []
+
+
+def test_cross_reference_picks_known_ids_out_of_a_search_without_get(mapping):
+    mal, kitsu, animeplanet = sources()
+    searcher = AnimeSearcher(mal, kitsu, animeplanet, id_mapping=mapping)
+    mapping.link('anime', {MAL: 1, ANIMEPLANET: '/anime/k-on'})
+
+    results = searcher.cross_reference(MAL, 1, [ANIMEPLANET])
+
+    # both AnimePlanet results contain the title, but only the linked one is the same series
+    assert [anime.url for anime in results[ANIMEPLANET].results] == ['/anime/k-on']
+    assert animeplanet.calls == [('search', 'K-On!')]
+    assert mal.calls == [('get', '1')]
+
+
+def test_cross_reference_links_what_it_finds_by_title(mapping):
+    mal, kitsu, animeplanet = sources()
+    searcher = AnimeSearcher(mal, kitsu, animeplanet, id_mapping=mapping)
+
+    results = searcher.cross_reference(MAL, 1)
+
+    assert [anime.id for anime in results[KITSU].results] == ['11']
+    assert [anime.url for anime in results[ANIMEPLANET].results] == ['/anime/k-on']
+    assert searcher.related_ids(MAL, 1) == {KITSU: '11', ANIMEPLANET: '/anime/k-on'}
+
+    # the next time, Kitsu is asked for the linked id directly
+    kitsu.calls.clear()
+    assert [anime.id for anime in searcher.cross_reference(MAL, 1, [KITSU])[KITSU].results] == ['11']
+    assert kitsu.calls == [('get', '11')]
+
+
+def test_cross_reference_reports_origin_errors_per_target(mapping):
+    mal, kitsu, animeplanet = sources()
+    mal.error = DataSourceUnavailableError(MAL)
+    searcher = AnimeSearcher(mal, kitsu, animeplanet, id_mapping=mapping)
+    mapping.link('anime', {MAL: 1, KITSU: '11'})
+
+    results = searcher.cross_reference(MAL, 1)
+
+    # Kitsu didn't need the original; AnimePlanet had to search for its title, so it gets MAL's error
+    assert [anime.id for anime in results[KITSU].results] == ['11']
+    assert results[ANIMEPLANET].error is mal.error
+    assert animeplanet.calls == []
+
+
+def test_cross_reference_with_no_title_match(mapping):
+    mal, kitsu, animeplanet = sources()
+    kitsu.anime = (Anime(id='12', title_romaji='K-On! Movie'),)
+    searcher = AnimeSearcher(mal, kitsu, animeplanet, id_mapping=mapping)
+
+    results = searcher.cross_reference(MAL, 1, [KITSU])
+
+    assert isinstance(results[KITSU].error, NoResultsFound)
+    assert searcher.related_ids(MAL, 1) == {}
+
+
+def test_async_cross_reference_links_what_it_finds_by_title(mapping):
+    mal = AsyncAnimeSource(MAL, Anime(id=1, title_romaji='K-On!'))
+    kitsu = AsyncAnimeSource(KITSU, Anime(id='10', title_romaji='K-On!!'), Anime(id='11', title_romaji='K-On!'))
+    searcher = AsyncAnimeSearcher(mal, kitsu, id_mapping=mapping)
+
+    async def go():
+        return await searcher.cross_reference(MAL, 1), await searcher.cross_reference(MAL, 1)
+
+    first, second = asyncio.run(go())
+
+    assert [anime.id for anime in first[KITSU].results] == ['11']
+    assert [anime.id for anime in second[KITSU].results] == ['11']
+    assert kitsu.calls == [('search', 'K-On!'), ('get', '11')]
+
+
+class DelayedSource:
+    # Answers every search after delay seconds, with results or by raising error, and records when it was asked
+    def __init__(self, source_type, delay, results=None, error=None):
+        self.source_type = source_type
+        self.delay = delay
+        self.results = results
+        self.error = error
+        self.started = None
+
+    def search_anime(self, search_term):
+        self.started = time.monotonic()
+        time.sleep(self.delay)
+        return self.answer(search_term)
+
+    def answer(self, search_term):
+        if self.error is not None:
+            raise self.error
+        if not self.results:
+            raise NoResultsFound(self.source_type, search_term)
+        return self.results
+
+
+class AsyncDelayedSource(DelayedSource):
+    async def search_anime(self, search_term):
+        self.started = time.monotonic()
+        await asyncio.sleep(self.delay)
+        return self.answer(search_term)
+
+
+def search_first(*sources, **kwargs):
+    started = time.monotonic()
+
+    if isinstance(sources[0], AsyncDelayedSource):
+        searcher = AsyncAnimeSearcher(*sources)
+        outcome = asyncio.run(searcher.search_first('k-on', **kwargs))
+    else:
+        searcher = AnimeSearcher(*sources)
+        outcome = searcher.search_first('k-on', **kwargs)
+
+    return outcome, time.monotonic() - started
+
+
+@pytest.fixture(params=[DelayedSource, AsyncDelayedSource], ids=['sync', 'async'])
+def delayed(request):
+    return request.param
+
+
+def test_search_first_hedges_after_the_delay(delayed):
+    slow = delayed(MAL, 0.5, results=['slow'])
+    fast = delayed(KITSU, 0, results=['fast'])
+
+    (source_type, results), elapsed = search_first(slow, fast, hedge_delay=0.1)
+
+    # the hedge won, well before the slow source would have answered
+    assert (source_type, results) == (KITSU, ['fast'])
+    assert fast.started - slow.started >= 0.1
+    assert elapsed < 0.4
+
+
+def test_search_first_takes_the_first_answer_with_results(delayed):
+    first = delayed(MAL, 0.05, results=['first'])
+    second = delayed(KITSU, 0.3, results=['second'])
+
+    (source_type, results), elapsed = search_first(first, second, hedge_delay=0.1)
+
+    assert (source_type, results) == (MAL, ['first'])
+    assert second.started is None
+    assert elapsed < 0.3
+
+
+def test_search_first_hedges_at_once_when_everything_in_flight_has_failed(delayed):
+    failing = delayed(MAL, 0, error=DataSourceUnavailableError(MAL))
+    empty = delayed(KITSU, 0)
+    working = delayed(ANIMEPLANET, 0, results=['found'])
+
+    (source_type, results), elapsed = search_first(failing, empty, working, hedge_delay=5)
+
+    assert (source_type, results) == (ANIMEPLANET, ['found'])
+    assert elapsed < 1
+
+
+def test_search_first_times_out_at_the_deadline(delayed):
+    with pytest.raises(DataSourceTimeoutError):
+        search_first(delayed(MAL, 1, results=['late']), deadline=0.1, hedge_delay=0.05)
+
+
+def test_search_first_raises_the_most_preferred_real_error(delayed):
+    empty = delayed(MAL, 0)
+    unavailable = DataSourceUnavailableError(KITSU)
+    broken = delayed(ANIMEPLANET, 0, error=ValueError('broken'))
+
+    with pytest.raises(DataSourceUnavailableError) as error:
+        search_first(empty, delayed(KITSU, 0, error=unavailable), broken, hedge_delay=5)
+    assert error.value is unavailable
+
+    with pytest.raises(NoResultsFound):
+        search_first(delayed(MAL, 0), delayed(KITSU, 0), hedge_delay=5)
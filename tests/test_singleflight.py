@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from Acerola import Acerola
+from Acerola.aio import AsyncAcerola
+from Acerola.enums import DataSource
+from Acerola.singleflight import SingleFlight, AsyncSingleFlight
+
+
+class BlockingLookup:
+    # Holds every call until release() and counts how many actually ran
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.released = threading.Event()
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.released.wait(5)
+
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def wait_for(condition):
+    give_up_at = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < give_up_at
+        time.sleep(0.001)
+
+
+def run_together(count, call):
+    outcomes = []
+
+    def run():
+        try:
+            outcomes.append(('result', call()))
+        except Exception as e:
+            outcomes.append(('error', e))
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+
+    return threads, outcomes
+
+
+def test_concurrent_calls_share_one_lookup():
+    single_flight = SingleFlight()
+    lookup = BlockingLookup(result=['bebop'])
+
+    threads, outcomes = run_together(5, lambda: single_flight.do('key', lookup, 'term'))
+    wait_for(lambda: single_flight.coalesced == 4)
+
+    lookup.released.set()
+    for thread in threads:
+        thread.join()
+
+    assert lookup.calls == 1
+    assert [outcome for outcome, _ in outcomes] == ['result'] * 5
+    assert all(result is outcomes[0][1] for _, result in outcomes)
+
+
+def test_concurrent_calls_all_get_the_same_error():
+    single_flight = SingleFlight()
+    error = ValueError('upstream broke')
+    lookup = BlockingLookup(error=error)
+
+    threads, outcomes = run_together(3, lambda: single_flight.do('key', lookup))
+    wait_for(lambda: single_flight.coalesced == 2)
+
+    lookup.released.set()
+    for thread in threads:
+        thread.join()
+
+    assert lookup.calls == 1
+    assert outcomes == [('error', error)] * 3
+
+
+def test_only_overlapping_calls_with_the_same_key_are_merged():
+    single_flight = SingleFlight()
+    lookup = BlockingLookup(result=1)
+    lookup.released.set()
+
+    single_flight.do('key', lookup)
+    single_flight.do('key', lookup)
+    single_flight.do('other', lookup)
+
+    assert lookup.calls == 3
+    assert single_flight.coalesced == 0
+
+
+def test_coalesced_calls(acerola_config, monkeypatch):
+    with Acerola(acerola_config) as acerola:
+        lookup = BlockingLookup(result=['k-on'])
+        monkeypatch.setattr(acerola._anidb, 'search_anime', lookup)
+
+        threads, outcomes = run_together(4, lambda: acerola.anime.search(DataSource.ANIDB, 'k-on', use_cache=False))
+        wait_for(lambda: acerola.coalesced_calls() == 3)
+
+        lookup.released.set()
+        for thread in threads:
+            thread.join()
+
+        assert lookup.calls == 1
+        assert outcomes == [('result', ['k-on'])] * 4
+
+
+class SlowLookup:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.finished = False
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        self.finished = True
+
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_async_concurrent_calls_share_one_lookup():
+    single_flight = AsyncSingleFlight()
+    lookup = SlowLookup(result=['bebop'])
+
+    async def go():
+        return await asyncio.gather(*(single_flight.do('key', lookup, 'term') for _ in range(5)))
+
+    results = asyncio.run(go())
+
+    assert lookup.calls == 1
+    assert single_flight.coalesced == 4
+    assert results == [['bebop']] * 5
+    assert all(result is results[0] for result in results)
+
+
+def test_async_concurrent_calls_all_get_the_same_error():
+    single_flight = AsyncSingleFlight()
+    error = ValueError('upstream broke')
+    lookup = SlowLookup(error=error)
+
+    async def go():
+        return await asyncio.gather(*(single_flight.do('key', lookup) for _ in range(3)), return_exceptions=True)
+
+    assert asyncio.run(go()) == [error] * 3
+    assert lookup.calls == 1
+
+
+@pytest.mark.parametrize('cancelled', [0, 1], ids=['leader', 'follower'])
+def test_async_cancelling_one_caller_leaves_the_others(cancelled):
+    single_flight = AsyncSingleFlight()
+    lookup = SlowLookup(result=['bebop'])
+
+    async def go():
+        callers = [asyncio.ensure_future(single_flight.do('key', lookup)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        callers[cancelled].cancel()
+
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    outcomes = asyncio.run(go())
+
+    assert isinstance(outcomes.pop(cancelled), asyncio.CancelledError)
+    assert outcomes == [['bebop']] * 2
+    assert lookup.calls == 1
+    assert lookup.finished
+
+
+def test_async_coalesced_calls(acerola_config):
+    async def go():
+        async with AsyncAcerola(acerola_config) as acerola:
+            lookup = SlowLookup(result=['k-on'])
+            acerola.anime._type_searcher._sources[DataSource.ANIDB].search_anime = lookup
+
+            results = await asyncio.gather(*(acerola.anime.search(DataSource.ANIDB, 'k-on', use_cache=False)
+                                             for _ in range(4)))
+            return results, lookup.calls, acerola.coalesced_calls()
+
+    results, calls, coalesced = asyncio.run(go())
+
+    assert results == [['k-on']] * 4
+    assert (calls, coalesced) == (1, 3)
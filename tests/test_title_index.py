@@ -0,0 +1,31 @@
+import pytest
+
+from Acerola.data_sources.anidb import AniDB
+from Acerola.title_index import TitleIndex
+
+RECORDS = [{'id': '1', 'synonyms': ['Straße der Helden', 'Road of Heroes']},
+           {'id': '2', 'synonyms': ['Élan Vital', 'elan']},
+           {'id': '3', 'synonyms': ['K-On!', 'Keion']},
+           {'id': '4', 'synonyms': ['ＫＯＮ full width', 'İstanbul Kaiju']},
+           {'id': '5', 'synonyms': ['Cowboy Bebop', 'Cowboy Bebop: Tengoku no Tobira']}]
+
+TERMS = ['strasse', 'straße', 'STRASSE', 'é', 'É', 'elan', 'k-on', 'on', 'o', '!', '', ' ', 'ｋｏｎ', 'istanbul',
+         'i̇stanbul', 'bebop', 'BEBOP: t', 'x']
+
+
+def scan(term):
+    return [record for record in RECORDS if AniDB.contains_search_term(record['synonyms'], term)]
+
+
+@pytest.mark.parametrize('term', TERMS)
+def test_search_matches_linear_scan(term):
+    assert TitleIndex(RECORDS).search(term) == scan(term)
+
+
+def test_search_many_matches_search():
+    index = TitleIndex(RECORDS)
+    assert index.search_many(TERMS) == {term: scan(term) for term in TERMS}
+
+
+def test_casefold_only_matches_are_not_found():
+    assert TitleIndex(RECORDS).search('strasse') == []